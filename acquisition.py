@@ -0,0 +1,165 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+
+from health import CONNECTED, DEGRADED, OPEN
+from metrics import Gauge, Histogram
+from sensor_class import sensor_list
+
+DEFAULT_PERIOD = 0.5  # saniye
+IDLE_CHECK = 0.1  # sensör listesindeki değişikliklerin kontrol aralığı
+
+log = logging.getLogger(__name__)
+
+read_seconds = Histogram('sensor_read_seconds', "Sensör başına bir okumanın (bağlantı + istekler) süresi", ['sensor'])
+
+
+class AcquisitionService:
+    """Sensörleri tarayıcıdan bağımsız, sabit periyotla okuyan arka plan servisi.
+
+    Servis kendi thread'inde bir asyncio event loop çalıştırır. Her sensör kendi
+    task'ında okunur, böylece yavaş ya da ölü bir gateway diğer sensörleri bekletmez
+    ve bir tur en yavaş tek istek kadar sürer.
+    """
+
+    def __init__(self, sensors, default_period=DEFAULT_PERIOD):
+        self.sensors = sensors
+        self.default_period = default_period
+        self.loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._stopped = None
+        self._tasks = {}  # sensor_id -> (sensor, task)
+
+    def period_of(self, sensor):
+        period = getattr(sensor, 'period', None) or self.default_period
+        # Sinyal sakinse uyarlanan periyot (adaptive.py) normal periyottan uzun olabilir
+        adaptive = getattr(sensor, 'adaptive', None)
+        return adaptive.period(period) if adaptive is not None else period
+
+    def set_default_period(self, period):
+        self.default_period = period
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._ready.clear()
+        self._thread = threading.Thread(target=asyncio.run, args=(self._main(),), name="acquisition", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self):
+        if self.loop is None:
+            return
+        self.loop.call_soon_threadsafe(self._stopped.set)
+        self._thread.join()
+        self.loop = None
+
+    def device_states(self):
+        """Arayüz ve metrikler için sensör başına bağlantı durumu."""
+        return [sensor.health.snapshot() for sensor in list(self.sensors) if hasattr(sensor, 'health')]
+
+    def run(self, coro, timeout=None):
+        """Dash callback'lerinden servis loop'unda bir coroutine çalıştırır (örn. kalibrasyon yazma).
+
+        Servis çalışmıyorsa RuntimeError, süre dolarsa TimeoutError fırlatır (coroutine iptal edilir).
+        """
+        if self.loop is None:
+            coro.close()
+            raise RuntimeError("Okuma servisi çalışmıyor")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"{timeout} s içinde tamamlanmadı") from None
+
+    async def read(self, sensor):
+        # Devresi açık cihaz okunmaz; yeniden bağlanma kendi task'ında sürer (health.py)
+        health = getattr(sensor, 'health', None)
+        if health is not None and not health.available:
+            return
+        started = time.perf_counter()
+        try:
+            await sensor.generate_sensor_data()
+        except Exception as e:
+            log.exception("%s: acquisition hatası: %s", sensor.sensor_id, e)
+        read_seconds.observe(time.perf_counter() - started, sensor=sensor.sensor_id)
+
+    async def poll_once(self, sensors):
+        """Verilen sensörleri eşzamanlı olarak bir kez okur."""
+        await asyncio.gather(*(self.read(sensor) for sensor in sensors))
+
+    async def _main(self):
+        self.loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._ready.set()
+        try:
+            while not self._stopped.is_set():
+                await self._sync_tasks()
+                try:
+                    await asyncio.wait_for(self._stopped.wait(), IDLE_CHECK)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self._close(list(self._tasks.values()))
+            self._tasks = {}
+
+    async def _close(self, entries):
+        # Önce okuma task'ları biter, sonra bağlantılar kapatılır
+        for _, task in entries:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in entries), return_exceptions=True)
+        await asyncio.gather(*(sensor.close() for sensor, _ in entries), return_exceptions=True)
+
+    async def _sync_tasks(self):
+        # sensor_list kurulum sayfasından değişebilir; yeni sensörler için task başlat,
+        # silinenlerin task'ını durdur
+        current = {sensor.sensor_id: sensor for sensor in list(self.sensors)}
+        removed = [sensor_id for sensor_id, (sensor, _) in self._tasks.items() if current.get(sensor_id) is not sensor]
+        if removed:
+            await self._close([self._tasks.pop(sensor_id) for sensor_id in removed])
+        for sensor_id, sensor in current.items():
+            if sensor_id not in self._tasks:
+                task = asyncio.create_task(self._poll(sensor), name=f"poll-{sensor_id}")
+                self._tasks[sensor_id] = (sensor, task)
+
+    async def _poll(self, sensor):
+        try:
+            await asyncio.to_thread(sensor.warm_start)
+        except Exception as e:
+            log.warning("%s: warm start hatası: %s", sensor.sensor_id, e)
+
+        next_due = self.loop.time()
+        while True:
+            delay = next_due - self.loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            await self.read(sensor)
+
+            # Kayma düzeltmesi: bir sonraki zaman okuma süresinden değil, plandan hesaplanır.
+            # Okuma periyottan uzun sürdüyse kaçırılan tikler atlanır, birikme yapılmaz.
+            period = self.period_of(sensor)
+            next_due += period
+            now = self.loop.time()
+            if next_due <= now:
+                next_due += ((now - next_due) // period + 1) * period
+
+
+acquisition_service = AcquisitionService(sensor_list)
+
+
+def _device_states():
+    # Sensör başına her durum için 1/0, böylece durum değişimi grafikte görünür
+    for device in acquisition_service.device_states():
+        for state in (CONNECTED, DEGRADED, OPEN):
+            yield (device['device'], state), int(device['state'] == state)
+
+
+Gauge('sensor_device_state', "Sensörün bağlantı durumu (connected / degraded / open-circuit)", ['sensor', 'state'],
+      function=_device_states)
+Gauge('sensor_device_failures', "Art arda başarısız okuma sayısı", ['sensor'],
+      function=lambda: [((device['device'],), device['failures']) for device in acquisition_service.device_states()])
@@ -0,0 +1,154 @@
+"""ADAM-4000 tarzı ASCII komut protokolü için asyncio istemcisi.
+
+Komutlar `#AA\\r` (modüldeki tüm kanallar) ve `#AAN\\r` (tek kanal) biçimindedir, AA
+onaltılık modül adresidir. Yanıt `>` ile başlar ve CR ile biter; tüm kanallar okunurken
+değerler işaretleriyle art arda gelir: `>+07.2500+04.0000-00.0100\\r`. Geçersiz komuta
+modül `?AA\\r` ile yanıt verir.
+
+Yanıt CR gelene kadar okunur (TCP parçalı gönderebilir) ve her istek REQUEST_TIMEOUT
+ile sınırlıdır. Zaman aşımında bağlantı kapatılır; geç gelen yanıt sonraki isteğe
+karışmaz. Aynı (host, port) üzerindeki referans sensörleri tek bağlantıyı paylaşır ve
+aynı modülü kısa aralıkla okuyan sensörler tek `#AA` isteğinin sonucunu kullanır.
+"""
+import asyncio
+import logging
+import re
+
+from modbus_pool import REQUEST_TIMEOUT
+
+log = logging.getLogger(__name__)
+
+COALESCE_WINDOW = 0.2  # saniye, bu kadar yeni modül okuması tekrar istenmez
+_VALUE = re.compile(rb'[+-]?\d+(?:\.\d*)?')
+
+
+class AdamError(Exception):
+    pass
+
+
+def parse_values(reply):
+    """`>+07.2500-01.0000` yanıtındaki değerleri listeye çevirir."""
+    if not reply.startswith(b'>'):
+        raise AdamError(f"Geçersiz yanıt: {reply!r}")
+    body = reply[1:].strip()
+    values = _VALUE.findall(body)
+    if not values or b''.join(values) != body.replace(b' ', b''):
+        raise AdamError(f"Geçersiz yanıt: {reply!r}")
+    return [float(value) for value in values]
+
+
+class AdamLink:
+    """Bir ADAM modülüne (ya da seri-TCP dönüştürücüsüne) açılan tek bağlantı."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.users = 0
+        self.reader = None
+        self.writer = None
+        self._lock = asyncio.Lock()  # hatta aynı anda tek komut bulunabilir
+        self._connecting = None
+        self._readings = {}  # adres -> (loop zamanı, değerler)
+        self._inflight = {}  # adres -> task
+
+    def __str__(self):
+        return f"{self.host}:{self.port}"
+
+    @property
+    def connected(self):
+        return self.writer is not None and not self.writer.is_closing()
+
+    async def connect(self):
+        if self.connected:
+            return True
+        if self._connecting is None or self._connecting.done():
+            self._connecting = asyncio.create_task(self._connect())
+        return await asyncio.shield(self._connecting)
+
+    async def _connect(self):
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), REQUEST_TIMEOUT)
+            return True
+        except (OSError, asyncio.TimeoutError) as e:
+            log.warning("ADAM %s bağlantı hatası: %s", self, e)
+            self.reader = self.writer = None
+            return False
+
+    async def command(self, text):
+        """Komutu gönderir, CR ile biten yanıtı (CR hariç) döndürür."""
+        async with self._lock:
+            if not await self.connect():
+                raise ConnectionError(f"ADAM {self} bağlanamadı")
+            try:
+                self.writer.write(text.encode('ascii') + b'\r')
+                await self.writer.drain()
+                reply = await asyncio.wait_for(self.reader.readuntil(b'\r'), REQUEST_TIMEOUT)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+                self._drop()
+                raise ConnectionError(f"ADAM {self} '{text}' yanıt vermedi: {e!r}") from e
+            except asyncio.CancelledError:
+                self._drop()  # yarım kalan yanıt sonraki komuta karışmasın
+                raise
+        return reply[:-1].strip(b'\n ')
+
+    async def read_channel(self, address, channel):
+        reply = await self.command(f'#{address:02X}{channel}')
+        return parse_values(reply)[0]
+
+    async def read_module(self, address, max_age=COALESCE_WINDOW):
+        """Modüldeki tüm kanalları tek istekte okur; yeni bir okuma varsa onu döndürür."""
+        now = asyncio.get_running_loop().time()
+        cached = self._readings.get(address)
+        if cached is not None and now - cached[0] <= max_age:
+            return cached[1]
+        task = self._inflight.get(address)
+        if task is None:
+            task = self._inflight[address] = asyncio.create_task(self._read_module(address))
+            task.add_done_callback(lambda _: self._inflight.pop(address, None))
+        return await asyncio.shield(task)
+
+    async def _read_module(self, address):
+        values = parse_values(await self.command(f'#{address:02X}'))
+        self._readings[address] = (asyncio.get_running_loop().time(), values)
+        return values
+
+    def _drop(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+        self._readings.clear()
+
+    def close(self):
+        if self._connecting is not None:
+            self._connecting.cancel()
+        for task in self._inflight.values():
+            task.cancel()
+        self._drop()
+
+
+class AdamPool:
+    """(host, port) başına tek AdamLink tutan havuz."""
+
+    def __init__(self):
+        self._links = {}
+
+    def acquire(self, host, port):
+        key = (host, int(port))
+        link = self._links.get(key)
+        if link is None:
+            link = self._links[key] = AdamLink(*key)
+        link.users += 1
+        return link
+
+    def release(self, link):
+        link.users -= 1
+        if link.users <= 0:
+            link.close()
+            self._links.pop((link.host, link.port), None)
+
+    def links(self):
+        return list(self._links.values())
+
+
+adam_pool = AdamPool()
@@ -0,0 +1,62 @@
+"""Sinyal değişimine göre uyarlanan okuma periyodu ve ölü bant (deadband) filtresi.
+
+Sinyal son okumalarda ölü bant içinde kaldıkça periyot her okumada SLOWDOWN katı
+uzatılır (en fazla max_period). Referans değerden ölü banttan fazla sapan ya da son
+ADAPT_WINDOW okumada standart sapması ölü bandı aşan ilk örnekte periyot hemen
+sensörün normal periyoduna döner; yavaş modda bile bir geçiş (transient) en geç
+max_period içinde yakalanır ve sonrası tam hızda okunur.
+
+filter_samples açıksa referanstan ölü bant kadar sapmayan örnekler kaydedilmez;
+grafiklerde boşluk ile bağlantı kopukluğu ayırt edilebilsin diye en az HEARTBEAT
+saniyede bir örnek yine yazılır.
+"""
+import math
+import time
+
+from rolling_stats import RollingWindow
+
+ADAPT_WINDOW = 10  # değişim kontrolünde bakılan son okuma sayısı
+SLOWDOWN = 1.5  # sakin her okumada periyot çarpanı
+HEARTBEAT = 60.0  # saniye, filtre açıkken de en az bu aralıkla kayıt
+
+
+class AdaptiveRate:
+    def __init__(self, deadband, max_period=None, filter_samples=False, heartbeat=HEARTBEAT):
+        self.deadband = deadband
+        self.max_period = max_period  # None ise periyot uzatılmaz, sadece filtre uygulanır
+        self.filter_samples = filter_samples
+        self.heartbeat = heartbeat
+        self.window = RollingWindow(ADAPT_WINDOW)
+        self.reference = None  # son anlamlı değişimdeki değer
+        self.scale = 1.0
+        self.dropped = 0
+        self._last_stored = None
+
+    def period(self, base):
+        """Sensörün normal periyodu `base` iken bir sonraki okumaya kadar beklenecek süre."""
+        if self.max_period is None or self.max_period <= base:
+            return base
+        self.scale = min(self.scale, self.max_period / base)
+        return base * self.scale
+
+    def update(self, value, now=None):
+        """Yeni okumayı değerlendirir; örneğin kaydedilip kaydedilmeyeceğini döndürür."""
+        if value is None or math.isnan(value):
+            return True
+        now = time.monotonic() if now is None else now
+        self.window.add(value)
+
+        changed = self.reference is None or abs(value - self.reference) > self.deadband
+        if changed:
+            self.reference = value
+        if changed or math.sqrt(self.window.variance) > self.deadband:
+            self.scale = 1.0
+        else:
+            self.scale *= SLOWDOWN
+
+        if (changed or not self.filter_samples or self._last_stored is None
+                or now - self._last_stored >= self.heartbeat):
+            self._last_stored = now
+            return True
+        self.dropped += 1
+        return False
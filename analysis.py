@@ -0,0 +1,144 @@
+"""Analiz sayfasının ağır hesapları; jobs.py ile ayrı süreçlerde çalıştırılır.
+
+Fonksiyonlar ilk argüman olarak JobContext alır, veriyi kendileri okur (büyük
+DataFrame'ler süreçler arasında taşınmaz) ve sadece sonuç tablolarını döndürür.
+"""
+import numpy as np
+import pandas as pd
+
+from queries import read_range
+
+NUMERIC_COLUMNS = ['mV', 'chlorine', 'average_mV', 'average_chlorine']
+GRID_MS = 10_000  # ortak zaman ızgarası (eski merge_asof toleransıyla aynı)
+LAG_GRID_MS = 1_000  # gecikme analizi için daha ince ızgara
+MAX_LAG_MS = 60_000  # aranan en büyük gecikme (iki yönde)
+MAX_GRID_POINTS = 100_000  # aralık uzunsa ızgara bu sayıya inecek kadar büyütülür
+MIN_OVERLAP = 3  # korelasyon için iki seride birlikte dolu en az kova
+FILL_MS = 60_000  # gecikme analizinde doğrusal doldurulan en uzun boşluk
+
+
+def grid_step(span_ms, base_ms):
+    return max(base_ms, -(-span_ms // MAX_GRID_POINTS // base_ms) * base_ms)
+
+
+def resample(df, columns, grid_ms):
+    """Tüm sensörleri ortak ızgaraya (kova ortalaması) yerleştirir.
+
+    Sensör başına sütunlar yan yana olan T x (S * C) matris ve sütun etiketleri
+    (sensör, sütun) döndürür; verisi olmayan kovalar NaN'dır.
+    """
+    ms = df['timestamp'].to_numpy('datetime64[ms]').astype(np.int64)
+    buckets = (ms - ms.min()) // grid_ms
+    n_buckets = int(buckets.max()) + 1
+    codes, sensors = pd.factorize(df['sensor_id'], sort=True)
+    flat = buckets * len(sensors) + codes
+
+    blocks = []
+    for column in columns:
+        values = df[column].to_numpy(dtype=float)
+        present = ~np.isnan(values)
+        size = n_buckets * len(sensors)
+        sums = np.bincount(flat[present], weights=values[present], minlength=size)
+        counts = np.bincount(flat[present], minlength=size)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            blocks.append((sums / counts).reshape(n_buckets, len(sensors)))
+    # Sütun sırası sensör-sütun: aynı sensörün değerleri yan yana
+    matrix = np.stack(blocks, axis=2).reshape(n_buckets, len(sensors) * len(columns))
+    labels = [(sensor, column) for sensor in sensors for column in columns]
+    return matrix, labels
+
+
+def masked_corr(a, b):
+    """a (T x N) ve b (T x M) sütunları arasındaki Pearson korelasyonu (N x M).
+
+    Her çift için sadece ikisinin de dolu olduğu satırlar kullanılır; tüm çiftler
+    birkaç matris çarpımıyla tek seferde hesaplanır.
+    """
+    mask_a, mask_b = ~np.isnan(a), ~np.isnan(b)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Ortalamayı çıkarmak büyük değerli serilerde (mV) sayısal hatayı azaltır. np.nanmean
+        # tamamen boş sütunda uyarı verir; boş sütunun ortalaması NaN olur, değerleri zaten 0'lanır
+        a = np.where(mask_a, a - np.where(mask_a, a, 0.0).sum(axis=0) / mask_a.sum(axis=0), 0.0)
+        b = np.where(mask_b, b - np.where(mask_b, b, 0.0).sum(axis=0) / mask_b.sum(axis=0), 0.0)
+        mask_a, mask_b = mask_a.astype(float), mask_b.astype(float)
+
+        n = mask_a.T @ mask_b
+        sum_a = a.T @ mask_b
+        sum_b = mask_a.T @ b
+        cov = a.T @ b - sum_a * sum_b / n
+        var_a = (a * a).T @ mask_b - sum_a * sum_a / n
+        var_b = mask_a.T @ (b * b) - sum_b * sum_b / n
+        r = cov / np.sqrt(var_a * var_b)
+    r[n < MIN_OVERLAP] = np.nan
+    return np.clip(r, -1.0, 1.0)
+
+
+def fill_gaps(matrix, limit):
+    """Sütunlardaki en fazla `limit` kovalık iç boşlukları doğrusal doldurur.
+
+    Izgaradan seyrek örneklenen sensörlerde (sensör periyodu, adaptive.py) kovaların
+    çoğu boştur; doldurulmazsa ardışık farkların hepsi NaN olur. Uzun kesintiler boş kalır.
+    """
+    df = pd.DataFrame(matrix)
+    missing = df.isna()
+    # Her boşluğun uzunluğu: boşluk, önündeki son dolu satırın grubuna düşer
+    gap = missing.apply(lambda column: column.groupby((~column).cumsum()).transform('sum'))
+    filled = df.interpolate(limit_area='inside')
+    return filled.where(~missing | (gap <= limit)).to_numpy()
+
+
+def lagged_correlation(matrix, max_lag, progress=None):
+    """Her sensör çifti için korelasyonun en yüksek olduğu gecikme (ızgara adımı) ve değeri.
+
+    best_lag[i, j] = k ise j sensörü i'yi k adım geriden izler: x_i(t) ~ x_j(t + k).
+    Seviyeler yerine ardışık farklar karşılaştırılır; yavaş değişen (trendli) serilerde
+    seviye korelasyonu her gecikmede 1'e yakın olur ve gecikme ayırt edilemez.
+    """
+    matrix = np.diff(matrix, axis=0)
+    n = matrix.shape[1]
+    best_r = np.full((n, n), -np.inf)
+    best_lag = np.zeros((n, n), dtype=np.int64)
+    lags = range(-max_lag, max_lag + 1)
+    for step, lag in enumerate(lags):
+        if progress is not None and step % 10 == 0:
+            progress(step, len(lags))
+        if lag >= 0:
+            r = masked_corr(matrix[:len(matrix) - lag], matrix[lag:])
+        else:
+            r = masked_corr(matrix[-lag:], matrix[:len(matrix) + lag])
+        better = np.nan_to_num(r, nan=-np.inf) > best_r
+        best_r[better] = r[better]
+        best_lag[better] = lag
+    best_r[np.isinf(best_r)] = np.nan
+    return best_lag, best_r
+
+
+def correlation_job(ctx, start_ms, end_ms, lag_metric=None):
+    """Tüm sensör/sütun çiftlerinin korelasyon matrisi ve isteğe bağlı gecikme tablosu."""
+    ctx.progress(0, 3, "Veri okunuyor")
+    df = read_range(start_ms, end_ms)
+    if df.empty or df['sensor_id'].nunique() < 2:
+        return None
+
+    ctx.progress(1, 3, "Ortak zaman ızgarası")
+    grid = grid_step(end_ms - start_ms, GRID_MS)
+    matrix, labels = resample(df, NUMERIC_COLUMNS, grid)
+    ctx.progress(2, 3, "Korelasyon")
+    names = [f'{column} ({sensor})' for sensor, column in labels]
+    corr = pd.DataFrame(masked_corr(matrix, matrix), index=names, columns=names)
+
+    lags = None
+    if lag_metric in NUMERIC_COLUMNS:
+        lag_grid = grid_step(end_ms - start_ms, LAG_GRID_MS)
+        series, sensor_labels = resample(df, [lag_metric], lag_grid)
+        series = fill_gaps(series, max(FILL_MS // lag_grid, 1))
+        best_lag, best_r = lagged_correlation(
+            series, max(MAX_LAG_MS // lag_grid, 1),
+            lambda done, total: ctx.progress(done, total, f"Gecikme analizi ({lag_metric})"))
+        sensors = [sensor for sensor, _ in sensor_labels]
+        rows = [(sensors[i], sensors[j], best_lag[i, j] * lag_grid / 1000, best_r[i, j])
+                for i in range(len(sensors)) for j in range(i + 1, len(sensors))]
+        lags = pd.DataFrame(rows, columns=['sensor_1', 'sensor_2', 'lag_s', 'corr'])
+    ctx.progress(3, 3)
+    return {'corr': corr, 'lags': lags, 'grid_s': grid / 1000}
+
@@ -1,58 +1,97 @@
 import dash
 import dash_bootstrap_components as dbc
 from dash import Dash, html, dcc
+import os
 
+from acquisition import acquisition_service
+from archive import archiver
+from db_writer import sample_writer
+from export import export_blueprint
+from jobs import analysis_jobs
+from live_stream import live_hub, live_stream_blueprint
+from metrics import instrument_callbacks, metrics_blueprint, register_stats
+from profiler import install_profiler
+from query_cache import query_cache
 from database import initialize_database, initialize_calibration_database
-from sensor_class import sensor_list
+from logs import setup_logging
 
-initialize_database()
-initialize_calibration_database()
 
+def create_app():
+    """Veritabanını hazırlar, Dash uygulamasını sayfaları ve Flask uçlarıyla kurar."""
+    initialize_database()
+    initialize_calibration_database()
 
+    app = Dash(__name__,
+               external_stylesheets=[
+                   dbc.themes.BOOTSTRAP,
+                   '/assets/style.css'],
+               use_pages=True)
 
-app = Dash(__name__,
-           external_stylesheets=[
-               dbc.themes.BOOTSTRAP,
-               '/assets/style.css'],
-           use_pages=True)
+    server = app.server
+    # Büyük aralıkları akış halinde indiren uçlar (/export/...)
+    server.register_blueprint(export_blueprint)
+    # Canlı moddaki sayfalara yeni örnekleri gönderen SSE ucu (/stream)
+    server.register_blueprint(live_stream_blueprint)
+    # Prometheus metrikleri (/metrics): okuma/yazma süreleri, kuyruklar, callback süreleri
+    server.register_blueprint(metrics_blueprint)
+    instrument_callbacks(app)
+    register_stats('query_cache', query_cache.stats, counters=('hits', 'misses', 'evictions'))
+    register_stats('analysis_jobs', analysis_jobs.stats, counters=('hits', 'misses'))
+    register_stats('live_stream', live_hub.stats, counters=('published', 'dropped'))
+    # PROFILE_CALLBACKS=1 ise sayfa callback'lerinin aşama profili (/debug/profile)
+    install_profiler(app)
 
-server = app.server
-
-app.layout = html.Div([
-    # Navigasyon Çubuğu
-    html.Nav([
-        html.Div([
-            html.Div(
-                html.H1("Sensör Takip Sistemi", style={'color': 'white', 'margin': '0'}),
-                className="nav-header"
-            ),
+    app.layout = html.Div([
+        # Navigasyon Çubuğu
+        html.Nav([
             html.Div([
-                dcc.Link(
-                    html.Div(page['name'], className="nav-link"),
-                    href=page["relative_path"],
-                    className="nav-item"
-                ) for page in dash.page_registry.values()
-            ], className="nav-links")
-        ], className="nav-container")
-    ], className="navbar"),
-
-    # Sayfa İçeriği
-    dash.page_container,
-
-    # Footer
-    html.Footer(
-        html.Div([
+                html.Div(
+                    html.H1("Sensör Takip Sistemi", style={'color': 'white', 'margin': '0'}),
+                    className="nav-header"
+                ),
+                html.Div([
+                    dcc.Link(
+                        html.Div(page['name'], className="nav-link"),
+                        href=page["relative_path"],
+                        className="nav-item"
+                    ) for page in dash.page_registry.values()
+                ], className="nav-links")
+            ], className="nav-container")
+        ], className="navbar"),
+
+        # Sayfa İçeriği
+        dash.page_container,
+
+        # Footer
+        html.Footer(
             html.Div([
-                html.P("© 2025 Sensör Takip Sistemi. Tüm hakları saklıdır.",
-                      style={'margin': '5px', 'color': 'white'}),
-                html.P("İletişim: gorkemcandan15@gmail.com",
-                      style={'margin': '5px', 'color': 'white'})
-            ], style={'textAlign': 'center', 'padding': '15px'})
-        ], className="footer-content"),
-        className="footer"
-    )
-], style={'minHeight': '100vh', 'display': 'flex', 'flexDirection': 'column'})
+                html.Div([
+                    html.P("© 2025 Sensör Takip Sistemi. Tüm hakları saklıdır.",
+                          style={'margin': '5px', 'color': 'white'}),
+                    html.P("İletişim: gorkemcandan15@gmail.com",
+                          style={'margin': '5px', 'color': 'white'})
+                ], style={'textAlign': 'center', 'padding': '15px'})
+            ], className="footer-content"),
+            className="footer"
+        )
+    ], style={'minHeight': '100vh', 'display': 'flex', 'flexDirection': 'column'})
+    return app
+
+
+# jobs.py'nin işçi süreçleri ('spawn') bu dosyayı __mp_main__ olarak içe aktarır. İşlere
+# sadece analysis.py gerekir: migration, Dash uygulaması, sayfalar (sensör nesneleri),
+# log dinleyicisi ve servisler yalnızca asıl süreçte kurulur.
+if __name__ != '__mp_main__':
+    setup_logging()
+    app = create_app()
+    server = app.server
 
+    # Debug modunda reloader'ın izleyici süreci de bu dosyayı çalıştırır; servis sadece
+    # uygulamayı gerçekten sunan süreçte başlatılmalı (aksi halde sensörler iki kez okunur).
+    if __name__ != '__main__' or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        sample_writer.start()
+        acquisition_service.start()
+        archiver.start()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,258 @@
+"""Eski ham veriyi SQLite'tan günlük sütunlu dosyalara taşıyan arşiv.
+
+ARCHIVE_AFTER_DAYS günden eski veri, UTC günü başına bir dosyaya yazılır (pyarrow varsa
+Parquet, yoksa sıkıştırılmış NumPy .npz) ve sensor_data tablosundan silinir. Dosyaların
+zaman aralığı ve sensörleri manifest.json'da tutulur; read_archive() sadece istenen
+aralıkla kesişen dosyaları açar. queries.py sıcak (SQLite) ve soğuk (arşiv) veriyi
+birleştirir. Özet ve sketch tabloları SQLite'ta kalır, uzun aralık grafikleri arşive inmez.
+
+Önce dosya ve manifest yazılır, sonra satırlar silinir: yarıda kalırsa tekrar
+çalıştırıldığında o gün mevcut dosyayla birleştirilir. SQLite dosyası küçülmez,
+boşalan sayfalar yeni veriye kullanılır (küçültmek için VACUUM).
+
+Kullanım:
+    python archive.py [--days 30] [sensor_data.db]
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from database import DB_PATH
+from metrics import Counter, Gauge
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow yoksa .npz segmentleri kullanılır
+    pa = None
+
+log = logging.getLogger(__name__)
+
+ARCHIVE_AFTER_DAYS = 30
+ARCHIVE_INTERVAL = 3600  # saniye, arşivleyici bu aralıkla çalışır
+START_DELAY = 600  # saniye, ilk geçiş uygulama açılırken değil bu kadar sonra yapılır
+DAY_MS = 86_400_000
+COLUMNS = ['timestamp', 'sensor_id', 'mV', 'chlorine', 'average_mV', 'average_chlorine']
+MANIFEST = 'manifest.json'
+
+archived_rows = Counter('archive_moved_rows_total', "SQLite'tan arşiv dosyalarına taşınan satırlar")
+
+
+def archive_dir(path=DB_PATH):
+    return os.path.join(os.path.dirname(os.path.abspath(path)), 'archive')
+
+
+class Manifest:
+    """Arşiv dosyası -> {'min', 'max', 'rows', 'sensors'}; dosya değiştikçe yeniden okunur."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, MANIFEST)
+
+    def refresh(self):
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                self.files, self._mtime = {}, None
+                return self.files
+            if mtime != self._mtime:
+                with open(self.path, encoding='utf-8') as f:
+                    self.files = json.load(f)['files']
+                self._mtime = mtime
+            return self.files
+
+    def save(self, files):
+        with self._lock:
+            temp = self.path + '.tmp'
+            with open(temp, 'w', encoding='utf-8') as f:
+                json.dump({'files': files}, f, indent=1, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, self.path)  # okuyucular yarım manifest görmez
+            self.files = files
+            self._mtime = os.stat(self.path).st_mtime_ns
+
+    def select(self, start_ms, end_ms, sensor_ids=None):
+        """[start_ms, end_ms] ile kesişen ve istenen sensörlerden birini içeren dosyalar."""
+        wanted = None if sensor_ids is None else set(sensor_ids)
+        return sorted(name for name, meta in self.refresh().items()
+                      if meta['min'] <= end_ms and meta['max'] >= start_ms
+                      and (wanted is None or wanted.intersection(meta['sensors'])))
+
+
+_manifests = {}
+
+
+def manifest_for(path=DB_PATH):
+    directory = archive_dir(path)
+    manifest = _manifests.get(directory)
+    if manifest is None:
+        manifest = _manifests[directory] = Manifest(directory)
+    return manifest
+
+
+def _write_file(filename, df):
+    temp = filename + '.tmp'
+    if filename.endswith('.parquet'):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(table, temp, compression='zstd', row_group_size=100_000)
+    else:
+        with open(temp, 'wb') as f:
+            np.savez_compressed(f, **{column: df[column].to_numpy(
+                dtype=str if column == 'sensor_id' else None) for column in COLUMNS})
+    os.replace(temp, filename)
+
+
+def _read_file(filename, start_ms, end_ms, sensor_ids, columns):
+    if filename.endswith('.parquet'):
+        filters = [('timestamp', '>=', start_ms), ('timestamp', '<=', end_ms)]
+        if sensor_ids is not None:
+            filters.append(('sensor_id', 'in', list(sensor_ids)))
+        return pq.read_table(filename, columns=columns, filters=filters).to_pandas()
+    with np.load(filename) as data:
+        timestamps = data['timestamp']
+        mask = (timestamps >= start_ms) & (timestamps <= end_ms)
+        if sensor_ids is not None:
+            mask &= np.isin(data['sensor_id'], list(sensor_ids))
+        return pd.DataFrame({column: data[column][mask] for column in columns})
+
+
+def read_archive(start_ms, end_ms, sensor_ids=None, columns=None, path=DB_PATH):
+    """[start_ms, end_ms] aralığındaki arşiv satırları (timestamp epoch ms, zamana göre sıralı)."""
+    columns = columns or COLUMNS
+    files = manifest_for(path).select(start_ms, end_ms, sensor_ids)
+    if (sensor_ids is not None and not sensor_ids) or not files:
+        return pd.DataFrame(columns=columns)
+    if any(name.endswith('.parquet') for name in files) and pa is None:
+        raise RuntimeError("Parquet arşivini okumak için pyarrow gerekli")
+    directory = archive_dir(path)
+    frames = [_read_file(os.path.join(directory, name), start_ms, end_ms, sensor_ids, columns)
+              for name in files]
+    df = pd.concat(frames, ignore_index=True)
+    return df.sort_values('timestamp', kind='stable', ignore_index=True)
+
+
+def _day_name(day_ms):
+    day = datetime.fromtimestamp(day_ms / 1000, tz=timezone.utc).date().isoformat()
+    return f"{day}.{'parquet' if pa is not None else 'npz'}"
+
+
+def _archive_day(conn, manifest, day_ms):
+    rows = conn.execute(f'''
+        SELECT {', '.join(COLUMNS)} FROM sensor_data
+        WHERE timestamp >= ? AND timestamp < ?
+    ''', (day_ms, day_ms + DAY_MS)).fetchall()
+    if not rows:
+        return 0
+    df = pd.DataFrame(rows, columns=COLUMNS).astype({column: float for column in COLUMNS[2:]})
+    name = _day_name(day_ms)
+    files = dict(manifest.refresh())
+    if name in files:
+        # Önceki çalıştırma silmeden kesildiyse ya da o güne geç veri geldiyse birleştir
+        old = _read_file(os.path.join(manifest.directory, name), day_ms, day_ms + DAY_MS, None, COLUMNS)
+        df = pd.concat([old, df], ignore_index=True).drop_duplicates(['sensor_id', 'timestamp'], keep='last')
+    df = df.sort_values(['timestamp', 'sensor_id'], ignore_index=True)
+    _write_file(os.path.join(manifest.directory, name), df)
+    files[name] = {'min': int(df['timestamp'].min()), 'max': int(df['timestamp'].max()),
+                   'rows': len(df), 'sensors': sorted(df['sensor_id'].unique().tolist())}
+    manifest.save(files)
+
+    # Birincil anahtar (sensor_id, timestamp) üzerinden sensör sensör sil; yazar uzun beklemesin
+    for sensor_id in files[name]['sensors']:
+        with conn:
+            conn.execute('DELETE FROM sensor_data WHERE sensor_id = ? AND timestamp >= ? AND timestamp < ?',
+                         (sensor_id, day_ms, day_ms + DAY_MS))
+    return len(rows)
+
+
+def archive_old_data(max_age_days=ARCHIVE_AFTER_DAYS, path=DB_PATH, verbose=False):
+    """max_age_days günden eski tam günleri arşive taşır; taşınan satır sayısını döndürür."""
+    cutoff = int(time.time() * 1000) - max_age_days * DAY_MS
+    cutoff -= cutoff % DAY_MS
+    manifest = manifest_for(path)
+    moved = 0
+    with closing(sqlite3.connect(path)) as conn:
+        conn.execute('PRAGMA busy_timeout=5000')
+        first = conn.execute('SELECT MIN(timestamp) FROM sensor_data').fetchone()[0]
+        if first is None:
+            return 0
+        os.makedirs(manifest.directory, exist_ok=True)
+        day_ms = first - first % DAY_MS
+        while day_ms < cutoff:
+            count = _archive_day(conn, manifest, day_ms)
+            if verbose and count:
+                print(f"Arşiv: {_day_name(day_ms)} ({count} satır)")
+            moved += count
+            day_ms += DAY_MS
+    archived_rows.inc(moved)
+    return moved
+
+
+class Archiver:
+    """archive_old_data'yı START_DELAY sonra, ardından ARCHIVE_INTERVAL'da bir çalıştıran thread."""
+
+    def __init__(self, max_age_days=ARCHIVE_AFTER_DAYS, interval=ARCHIVE_INTERVAL, path=DB_PATH,
+                 start_delay=START_DELAY):
+        self.max_age_days = max_age_days
+        self.interval = interval
+        self.path = path
+        self.start_delay = start_delay
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="archiver", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        # Açılışta sensörlerin warm start'ı ve ilk sayfa istekleri taşıma ile yarışmasın
+        if self._stop.wait(self.start_delay):
+            return
+        while not self._stop.is_set():
+            try:
+                moved = archive_old_data(self.max_age_days, self.path)
+                if moved:
+                    log.info("Arşiv: %d satır taşındı", moved)
+            except (sqlite3.Error, OSError, RuntimeError) as e:
+                log.error("Arşiv hatası: %s", e)
+            self._stop.wait(self.interval)
+
+
+archiver = Archiver()
+
+Gauge('archive_files', "Arşivdeki günlük dosyalar", function=lambda: len(manifest_for(archiver.path).refresh()))
+Gauge('archive_rows', "Arşiv dosyalarındaki satırlar",
+      function=lambda: sum(meta['rows'] for meta in manifest_for(archiver.path).refresh().values()))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument('path', nargs='?', default=DB_PATH)
+    args = parser.parse_args()
+    print(f"{archive_old_data(args.days, args.path, verbose=True)} satır arşivlendi")
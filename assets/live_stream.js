@@ -0,0 +1,97 @@
+/* assets/live_stream.js */
+
+/* Canlı modda /stream (SSE) mesajlarını grafiklere ve tabloya ekler.
+   Sunucu her batch'i tüm sayfalara bir kez gönderir; sayfa sorgu yapmaz. */
+window.liveStream = (function () {
+    var source = null;
+    var state = null;
+
+    function close() {
+        if (source !== null) {
+            source.close();
+            source = null;
+        }
+        state = null;
+    }
+
+    function plotDiv(id) {
+        var graph = document.getElementById(id);
+        return graph ? graph.querySelector('.js-plotly-plot') : null;
+    }
+
+    function onSamples(event) {
+        var message = JSON.parse(event.data);
+        if (state === null || message.high_water <= state.highWater) {
+            return;
+        }
+        if (!document.getElementById(state.config.graphs[0])) {
+            close();  // başka sayfaya geçildi
+            return;
+        }
+        // Satır: [epoch ms, yerel zaman, sensor_id, mV, chlorine, average_mV, average_chlorine]
+        var highWater = state.highWater;
+        var rows = message.rows.filter(function (row) {
+            return row[0] > highWater && state.traces.hasOwnProperty(row[2]);
+        });
+        state.highWater = message.high_water;
+        if (!rows.length) {
+            return;
+        }
+
+        state.config.columns.forEach(function (column, c) {
+            var div = plotDiv(state.config.graphs[c]);
+            if (!div || !window.Plotly) {
+                return;
+            }
+            var xs = [], ys = [], indices = [], slots = {};
+            rows.forEach(function (row) {
+                var trace = state.traces[row[2]];
+                if (!slots.hasOwnProperty(trace)) {
+                    slots[trace] = indices.length;
+                    indices.push(trace);
+                    xs.push([]);
+                    ys.push([]);
+                }
+                xs[slots[trace]].push(row[1]);
+                ys[slots[trace]].push(row[3 + c]);
+            });
+            window.Plotly.extendTraces(div, {x: xs, y: ys}, indices, state.config.maxPoints);
+        });
+
+        // Tablo: en yeni en üstte, maxRows satır
+        var fresh = rows.map(function (row) {
+            var record = {timestamp: row[1], sensor_id: row[2]};
+            state.config.columns.forEach(function (column, c) {
+                record[column] = row[3 + c];
+            });
+            return record;
+        }).reverse();
+        state.table = fresh.concat(state.table).slice(0, state.config.maxRows);
+        window.dash_clientside.set_props(state.config.table, {data: state.table});
+    }
+
+    function onReset() {
+        // Bağlantı uzun süre koptu, aradaki örnekler geçmişte yok: sayfa veriyi baştan okusun
+        var reset = state.config.reset;
+        close();
+        window.dash_clientside.set_props(reset, {data: Date.now()});
+    }
+
+    function configure(cursor, sensors, table, config) {
+        close();
+        if (!cursor || !sensors.length || !window.EventSource) {
+            return null;
+        }
+        var traces = {};
+        sensors.forEach(function (sensor, index) {
+            traces[sensor] = index;
+        });
+        state = {highWater: cursor.high_water, traces: traces, table: table.slice(), config: config};
+        source = new EventSource('/stream?since=' + cursor.high_water);
+        source.addEventListener('samples', onSamples);
+        source.addEventListener('reset', onReset);
+        return cursor.high_water;
+    }
+
+    return {configure: configure, close: close};
+})();
@@ -0,0 +1,56 @@
+"""Seri ve eşzamanlı okuma turu sürelerini yerel simüle problara karşı ölçer.
+
+Kullanım (proje kök dizininden):
+    python -m benchmarks.acquisition_benchmark --latency 0.05
+"""
+import argparse
+import asyncio
+import time
+
+from simulator import start_probes, stop_probes
+from sensor_class import Sensor
+
+SENSOR_COUNTS = (1, 10, 100)
+BASE_PORT = 15020
+
+
+async def serial_cycle(sensors):
+    for sensor in sensors:
+        await sensor.read_registers()
+
+
+async def concurrent_cycle(sensors):
+    await asyncio.gather(*(sensor.read_registers() for sensor in sensors))
+
+
+async def measure(cycle, sensors, rounds):
+    durations = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await cycle(sensors)
+        durations.append(time.perf_counter() - start)
+    return sorted(durations)[len(durations) // 2]
+
+
+async def main(latency, rounds):
+    print(f"Simüle gecikme: {latency * 1000:.0f} ms, tur sayısı: {rounds}")
+    print(f"{'sensör':>7} {'seri (ms)':>11} {'eşzamanlı (ms)':>15}")
+    for count in SENSOR_COUNTS:
+        servers = await start_probes(count, base_port=BASE_PORT, latency=latency)
+        sensors = [Sensor(i, '127.0.0.1', BASE_PORT + i) for i in range(count)]
+        try:
+            await asyncio.gather(*(sensor.connect() for sensor in sensors))
+            serial = await measure(serial_cycle, sensors, rounds)
+            concurrent = await measure(concurrent_cycle, sensors, rounds)
+            print(f"{count:>7} {serial * 1000:>11.1f} {concurrent * 1000:>15.1f}")
+        finally:
+            await asyncio.gather(*(sensor.close() for sensor in sensors))
+            await stop_probes(servers)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency', type=float, default=0.05, help="probe yanıt gecikmesi (saniye)")
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.latency, args.rounds))
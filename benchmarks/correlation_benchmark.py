@@ -0,0 +1,80 @@
+"""Sensör çifti başına merge_asof ile ortak ızgarada vektörel korelasyonu karşılaştırır.
+
+Kullanım (proje kök dizininden):
+    python -m benchmarks.correlation_benchmark --sensors 30 --hours 2
+"""
+import argparse
+import time
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from analysis import GRID_MS, NUMERIC_COLUMNS, lagged_correlation, masked_corr, resample
+
+DELAY_S = 7  # son sensör ilk sensörü bu kadar geriden izler
+
+
+def sample_frame(sensors, hours, period=1.0):
+    rng = np.random.default_rng(0)
+    n = int(hours * 3600 / period)
+    start = pd.Timestamp('2025-01-01')
+    base = np.cumsum(rng.normal(0, 1, n + 60))
+    frames = []
+    for i in range(sensors):
+        shift = DELAY_S if i == sensors - 1 else 0
+        signal = 1000 + base[60 - shift:60 - shift + n] + rng.normal(0, 0.5, n)
+        jitter = rng.uniform(0, 0.2, n)  # sensörler aynı anda okunmaz
+        frames.append(pd.DataFrame({
+            'timestamp': start + pd.to_timedelta(np.arange(n) * period + jitter, unit='s'),
+            'sensor_id': str(i + 1),
+            'mV': signal,
+            'chlorine': signal / 500,
+            'average_mV': signal,
+            'average_chlorine': signal / 500,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def pairwise_merge_asof(df):
+    # Eski yol: her çift için ayrı merge_asof ve tam korelasyon matrisi
+    numeric_cols = ['timestamp'] + NUMERIC_COLUMNS
+    sensor_dfs = {sensor_id: group[numeric_cols] for sensor_id, group in df.groupby('sensor_id')}
+    results = []
+    for (s1, df1), (s2, df2) in combinations(sensor_dfs.items(), 2):
+        merged = pd.merge_asof(df1.sort_values('timestamp'), df2.sort_values('timestamp'), on='timestamp',
+                               direction='nearest', tolerance=pd.Timedelta(seconds=10),
+                               suffixes=(f'_{s1}', f'_{s2}'))
+        results.append(merged.corr(numeric_only=True))
+    return results
+
+
+def common_grid(df):
+    matrix, _ = resample(df, NUMERIC_COLUMNS, GRID_MS)
+    return masked_corr(matrix, matrix)
+
+
+def measure(fn, df):
+    start = time.perf_counter()
+    fn(df)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sensors', type=int, default=30)
+    parser.add_argument('--hours', type=float, default=2)
+    args = parser.parse_args()
+
+    df = sample_frame(args.sensors, args.hours)
+    print(f"{len(df)} satır, {args.sensors} sensör")
+    print(f"çift başına merge_asof: {measure(pairwise_merge_asof, df):8.2f} s")
+    print(f"ortak ızgara:           {measure(common_grid, df):8.2f} s")
+
+    start = time.perf_counter()
+    series, labels = resample(df, ['mV'], 1000)
+    best_lag, best_r = lagged_correlation(series, 60)
+    elapsed = time.perf_counter() - start
+    first, last = labels.index(('1', 'mV')), labels.index((str(args.sensors), 'mV'))
+    print(f"gecikme analizi (±60 s): {elapsed:7.2f} s, sensör 1 -> {args.sensors}: "
+          f"{best_lag[first, last]} s (beklenen {DELAY_S}), r={best_r[first, last]:.3f}")
@@ -0,0 +1,59 @@
+"""Satır başına commit ile toplu yazıcının saniyedeki satır sayısını karşılaştırır.
+
+Kullanım (proje kök dizininden):
+    python -m benchmarks.db_writer_benchmark --rows 20000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from database import initialize_database, to_epoch_ms
+from db_writer import SampleWriter, INSERT_SQL
+
+
+def sample_rows(count):
+    now = to_epoch_ms(datetime.now())
+    return [(now + i, str(i % 30), 1000.0, 1.2, 1000.0, 1.2) for i in range(count)]
+
+
+def per_row_commit(path, rows):
+    # Eski yol: her örnek için yeni bağlantı ve commit
+    for row in rows:
+        with sqlite3.connect(path) as conn:
+            conn.execute(INSERT_SQL, row)
+            conn.commit()
+
+
+def batched_writer(path, rows):
+    writer = SampleWriter(path)
+    writer.start()
+    for row in rows:
+        writer.submit(*row)
+    writer.stop()
+
+
+def measure(fn, rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'sensor_data.db')
+        initialize_database(path)
+        start = time.perf_counter()
+        fn(path, rows)
+        elapsed = time.perf_counter() - start
+        with sqlite3.connect(path) as conn:
+            written = conn.execute("SELECT COUNT(*) FROM sensor_data").fetchone()[0]
+    assert written == len(rows), (written, len(rows))
+    return len(rows) / elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    before = measure(per_row_commit, sample_rows(min(args.rows, 2000)))
+    after = measure(batched_writer, sample_rows(args.rows))
+    print(f"satır başına commit: {before:>10.0f} satır/s")
+    print(f"toplu yazıcı:        {after:>10.0f} satır/s")
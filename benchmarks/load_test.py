@@ -0,0 +1,160 @@
+"""Simüle prob sayısı arttıkça acquisition servisinin yükünü ölçer.
+
+Her adımda simulator.py ile N klor probu (ayrı gateway'ler) ve ADAM modülleri başlatılır,
+gerçek AcquisitionService + SampleWriter geçici bir veritabanına yazar. Raporlanan:
+saniyedeki kayıtlı örnek, okuma (tur) gecikmesi p50/p99 ve örneğin alınmasından
+veritabanına yazılıp canlı akışa (live_stream.py) düşmesine kadar geçen süre p50/p99.
+
+Kullanım (proje kök dizininden):
+    python -m benchmarks.load_test --probes 1,10,50,100 --duration 10 --latency 0.02 --dropout 0.01
+"""
+import argparse
+import asyncio
+import json
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from acquisition import AcquisitionService
+from database import initialize_database
+from db_writer import sample_writer
+from live_stream import live_hub
+from logs import setup_logging
+from sensor_class import ReferanceSensor, Sensor
+from simulator import start_adam_modules, start_probes, stop_adam_modules, stop_probes
+
+HOST = '127.0.0.1'
+BASE_PORT = 16020
+ADAM_BASE_PORT = 17020
+
+
+class TimedService(AcquisitionService):
+    """Her okumanın süresini kaydeden acquisition servisi."""
+
+    def __init__(self, sensors, default_period):
+        super().__init__(sensors, default_period)
+        self.latencies = []  # (bitiş zamanı, süre)
+
+    async def read(self, sensor):
+        start = time.perf_counter()
+        await super().read(sensor)
+        end = time.perf_counter()
+        self.latencies.append((end, end - start))
+
+
+class IngestLag:
+    """Canlı akışa yayınlanan her örnek için alınma -> yazılma süresi (ms)."""
+
+    def __init__(self):
+        self.lags = []
+        self._subscriber, _ = live_hub.subscribe()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                message = self._subscriber.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            now = time.time() * 1000
+            data = message.split(b'data: ', 1)[1]
+            self.lags.extend(now - row[0] for row in json.loads(data)['rows'])
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        live_hub.unsubscribe(self._subscriber)
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if len(values) else float('nan')
+
+
+async def run_step(step, probes, args):
+    port = BASE_PORT + step * 1000
+    adam_port = ADAM_BASE_PORT + step * 100
+    servers = await start_probes(probes, HOST, port, args.latency, jitter=args.jitter, dropout=args.dropout)
+    modules = await start_adam_modules(args.adam, HOST, adam_port, args.latency, args.jitter, args.dropout,
+                                       channels=args.channels)
+    sensors = [Sensor(f'p{i}', HOST, port + i) for i in range(probes)]
+    sensors += [ReferanceSensor(f'r{m}.{channel}', HOST, adam_port + m, channel=channel)
+                for m in range(args.adam) for channel in range(args.channels)]
+
+    service = TimedService(sensors, args.period)
+    lag = IngestLag()
+    started = time.perf_counter()
+    start_ms = int(time.time() * 1000)
+    try:
+        service.start()
+        await asyncio.sleep(args.duration)
+        states = [state['state'] for state in service.device_states()]
+        await asyncio.to_thread(service.stop)
+        await asyncio.sleep(sample_writer.flush_interval * 4)  # kuyrukta kalanlar yazılsın
+    finally:
+        lag.stop()
+        await stop_adam_modules(modules)
+        await stop_probes(servers)
+
+    # Bağlantı kurulumu ölçüme karışmasın
+    measured_from = started + args.warmup
+    latencies = [duration for end, duration in service.latencies if end >= measured_from]
+    with sqlite3.connect('sensor_data.db') as conn:
+        rows = conn.execute('SELECT COUNT(*) FROM sensor_data WHERE timestamp >= ? AND timestamp < ?',
+                            (start_ms + args.warmup * 1000, start_ms + args.duration * 1000)).fetchone()[0]
+    return {
+        'probes': probes,
+        'sensors': len(sensors),
+        'expected': len(sensors) / args.period,
+        'rate': rows / (args.duration - args.warmup),
+        'p50': percentile(latencies, 50) * 1000,
+        'p99': percentile(latencies, 99) * 1000,
+        'lag50': percentile(lag.lags, 50),
+        'lag99': percentile(lag.lags, 99),
+        'healthy': sum(state == 'connected' for state in states),
+    }
+
+
+async def main(args):
+    # Dropout'ta sensörler ve simüle sunucu her hatayı loglar; tabloya karışmasın
+    setup_logging({'': 'ERROR', 'pymodbus': 'CRITICAL'})
+    print(f"periyot {args.period} s, gecikme {args.latency * 1000:.0f} ms (+{args.jitter * 1000:.0f} ms), "
+          f"dropout {args.dropout:.1%}, {args.adam} ADAM x {args.channels} kanal, süre {args.duration} s")
+    print(f"{'prob':>5} {'sensör':>7} {'hedef/s':>8} {'örnek/s':>8} {'p50 ms':>7} {'p99 ms':>7} "
+          f"{'yazma p50':>10} {'yazma p99':>10} {'bağlı':>6}")
+    for step, probes in enumerate(args.probes):
+        result = await run_step(step, probes, args)
+        print(f"{result['probes']:>5} {result['sensors']:>7} {result['expected']:>8.0f} {result['rate']:>8.1f} "
+              f"{result['p50']:>7.1f} {result['p99']:>7.1f} {result['lag50']:>10.1f} {result['lag99']:>10.1f} "
+              f"{result['healthy']:>6}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--probes', type=lambda value: [int(item) for item in value.split(',')],
+                        default=[1, 10, 50, 100])
+    parser.add_argument('--adam', type=int, default=1, help="ADAM modülü sayısı")
+    parser.add_argument('--channels', type=int, default=4, help="modül başına okunan kanal")
+    parser.add_argument('--period', type=float, default=0.5, help="sensör okuma periyodu (saniye)")
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--warmup', type=float, default=2)
+    parser.add_argument('--latency', type=float, default=0.02, help="cihaz yanıt gecikmesi (saniye)")
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--dropout', type=float, default=0.0)
+    args = parser.parse_args()
+
+    # Ölçüm geçici bir dizindeki veritabanına yazılır
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        initialize_database()
+        sample_writer.start()
+        try:
+            asyncio.run(main(args))
+        finally:
+            sample_writer.stop()
@@ -0,0 +1,325 @@
+"""Yazma, sorgu, dışa aktarma ve sayfa callback'lerinin süresini farklı veritabanı boyutlarında ölçer.
+
+Her boyut için sentetik bir sensor_data.db bir kez üretilir (özet ve sketch tablolarıyla
+birlikte) ve sonraki çalıştırmalarda tekrar kullanılır. Her durum REPEAT kez çalıştırılır,
+medyan süre raporlanır. --save-baseline sonuçları JSON'a yazar; sonraki çalıştırmada bir
+durum taban çizgisinden --threshold oranından fazla yavaşsa çıkış kodu 1 olur.
+
+Kullanım (proje kök dizininden):
+    python -m benchmarks.suite --rows 10k,1m --save-baseline
+    python -m benchmarks.suite --rows 10k,1m            # taban çizgisiyle karşılaştırır
+    python -m benchmarks.suite --rows 10m --cases range,analyze
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import dash
+import numpy as np
+
+from database import initialize_database, to_epoch_ms
+from db_writer import SampleWriter
+from export import export_blueprint, export_url
+from live_stream import LiveHub
+from queries import MAX_POINTS, read_latest, read_range
+from query_cache import query_cache
+from rollups import rebuild_rollups
+from sketches import rebuild_sketches, summarize
+
+SIZES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+SENSORS = 8
+PERIOD_MS = 1000  # sensör başına örnek aralığı
+INSERT_CHUNK = 500_000
+INGEST_ROWS = 5_000
+LIVE_BATCHES = 200  # abone kuyruğuna (MAX_PENDING) sığacak kadar
+LIVE_VIEWERS = 10
+REPEAT = 5
+THRESHOLD = 0.25  # taban çizgisinden en fazla %25 yavaş
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+DATA_DIR = os.path.join(tempfile.gettempdir(), 'sensor_logger_bench')
+HOUR_MS = 3_600_000
+DAY_MS = 24 * HOUR_MS
+
+CASES = {}  # ad -> (grup, fonksiyon, temizlik)
+
+
+def case(name, group, cleanup=None):
+    def register(fn):
+        CASES[name] = (group, fn, cleanup)
+        return fn
+    return register
+
+
+class Dataset:
+    def __init__(self, path):
+        self.path = path
+        with sqlite3.connect(path) as conn:
+            self.first, self.last = conn.execute('SELECT MIN(timestamp), MAX(timestamp) FROM sensor_data').fetchone()
+            self.sensors = [row[0] for row in conn.execute('SELECT DISTINCT sensor_id FROM sensor_data ORDER BY 1')]
+
+    def window(self, span_ms):
+        """Verinin sonundaki span_ms uzunluğunda aralık (datetime)."""
+        start = max(self.first, self.last - span_ms)
+        return datetime.fromtimestamp(start / 1000), datetime.fromtimestamp(self.last / 1000)
+
+
+def generate(path, rows):
+    """rows satırlık, SENSORS sensörün PERIOD_MS aralıkla ölçtüğü, şimdi biten veritabanı."""
+    initialize_database(path)
+    per_sensor = rows // SENSORS
+    end = to_epoch_ms(datetime.now()) // PERIOD_MS * PERIOD_MS
+    start = end - per_sensor * PERIOD_MS
+    rng = np.random.default_rng(0)
+    with sqlite3.connect(path) as conn:
+        for sensor in range(SENSORS):
+            level = 1000.0
+            for offset in range(0, per_sensor, INSERT_CHUNK):
+                n = min(INSERT_CHUNK, per_sensor - offset)
+                timestamps = start + (offset + np.arange(n)) * PERIOD_MS
+                mV = level + np.cumsum(rng.normal(0, 0.5, n))
+                level = mV[-1]
+                chlorine = mV / 500
+                conn.executemany('''
+                    INSERT INTO sensor_data (sensor_id, timestamp, mV, chlorine, average_mV, average_chlorine)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', zip([str(sensor + 1)] * n, timestamps.tolist(), mV.tolist(), chlorine.tolist(),
+                         mV.tolist(), chlorine.tolist()))
+                conn.commit()
+        rebuild_rollups(conn)
+        rebuild_sketches(conn)
+
+
+def dataset(size, data_dir):
+    directory = os.path.join(data_dir, size)
+    path = os.path.join(directory, 'sensor_data.db')
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        started = time.perf_counter()
+        print(f"{size}: veritabanı üretiliyor ({path})", file=sys.stderr)
+        generate(path + '.tmp', SIZES[size])
+        os.replace(path + '.tmp', path)
+        print(f"{size}: {time.perf_counter() - started:.0f} s", file=sys.stderr)
+    return Dataset(path)
+
+
+def _dash_app():
+    # Sayfa modülleri dash.register_page çağırdığı için önce bir Dash uygulaması gerekir.
+    # app.py içe aktarılmaz: acquisition servisini ve gerçek sensörleri başlatır.
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    app = dash.Dash(__name__, use_pages=True, pages_folder=os.path.join(root, 'pages'))
+    app.server.register_blueprint(export_blueprint)
+    return app
+
+
+def _day_time(value):
+    return value.strftime('%Y-%m-%d'), value.strftime('%H:%M')
+
+
+# Yazma
+
+def _remove_ingested(ds):
+    with sqlite3.connect(ds.path) as conn:
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND (name LIKE 'sensor_data%' OR name LIKE 'sensor_sketch%')")]
+        for table in tables:
+            conn.execute(f"DELETE FROM {table} WHERE sensor_id = 'bench'")
+
+
+@case('ingest', 'ingest', cleanup=_remove_ingested)
+def ingest(ds):
+    # Kuyruğa ekleme + batch yazma + özet/sketch güncelleme, commit'e kadar
+    writer = SampleWriter(ds.path)
+    writer.start()
+    for i in range(INGEST_ROWS):
+        writer.submit(ds.last + 1 + i * 10, 'bench', 1000.0 + i % 7, 2.0, 1000.0, 2.0)
+    writer.stop()
+
+
+# Sorgular
+
+@case('live_latest', 'live')
+def live_latest(ds):
+    read_latest(ds.sensors, limit=200)
+
+
+def _live_batches(ds):
+    # Yazıcının yayınladığı biçimde (timestamp ms, sensor_id, değerler) son LIVE_BATCHES tur
+    if not hasattr(ds, 'live_batches'):
+        with sqlite3.connect(ds.path) as conn:
+            rows = conn.execute('''
+                SELECT timestamp, sensor_id, mV, chlorine, average_mV, average_chlorine FROM sensor_data
+                WHERE timestamp > ? ORDER BY timestamp
+            ''', (ds.last - LIVE_BATCHES * PERIOD_MS,)).fetchall()
+        batches = {}
+        for row in rows:
+            batches.setdefault(row[0], []).append(row)
+        ds.live_batches = sorted(batches.items())
+    return ds.live_batches
+
+
+@case('live_stream', 'live')
+def live_stream(ds):
+    # Canlı sayfalar yeni örnekleri /stream'den alır: batch başına bir JSON kodlama ve
+    # izleyici başına kuyruğa ekleme, sonra yeniden bağlanan bir izleyiciye geçmişin yarısı
+    batches = _live_batches(ds)
+    hub = LiveHub()
+    for _ in range(LIVE_VIEWERS):
+        hub.subscribe()
+    for high_water, batch in batches:
+        hub.publish(batch, high_water)
+    hub.subscribe(batches[len(batches) // 2][0])
+
+
+@case('range_hour_raw', 'range')
+def range_hour_raw(ds):
+    read_range(*ds.window(HOUR_MS), ds.sensors)
+
+
+@case('range_day_raw', 'range')
+def range_day_raw(ds):
+    read_range(*ds.window(DAY_MS), ds.sensors)
+
+
+@case('range_full_rollup', 'range')
+def range_full_rollup(ds):
+    read_range(*ds.window(ds.last - ds.first), ds.sensors, max_points=MAX_POINTS)
+
+
+# Dışa aktarma (Flask ucu üzerinden, akış tamamen okunur)
+
+def _export(ds, fmt):
+    client = ds.app.server.test_client()
+    response = client.get(export_url(fmt, *ds.window(DAY_MS)))
+    assert response.status_code == 200, response.status_code
+    assert response.get_data(), 'boş yanıt'
+
+
+@case('export_csv_day', 'export')
+def export_csv_day(ds):
+    _export(ds, 'csv')
+
+
+@case('export_parquet_day', 'export')
+def export_parquet_day(ds):
+    _export(ds, 'parquet')
+
+
+# Sayfa callback'leri (sorgu + figür)
+
+@case('graphs_live', 'graphs')
+def graphs_live(ds):
+    from pages.graphs import update_all
+    start, end = ds.window(HOUR_MS)  # canlı modda tarih seçimi kullanılmaz
+    update_all('live', *_day_time(start), *_day_time(end), ds.sensors, None, 1600)
+
+
+@case('graphs_range_full', 'graphs')
+def graphs_range_full(ds):
+    from pages.graphs import update_all
+    query_cache.clear()
+    start, end = ds.window(ds.last - ds.first)
+    update_all('stored', *_day_time(start), *_day_time(end), ds.sensors, None, 1600)
+
+
+class _Context:
+    def progress(self, done, total, message=None):
+        pass
+
+
+@case('analyze_correlation_day', 'analyze')
+def analyze_correlation_day(ds):
+    from analysis import correlation_job
+    from pages.analyze import correlation_analysis
+    start, end = ds.window(DAY_MS)
+    correlation_analysis(correlation_job(_Context(), to_epoch_ms(start), to_epoch_ms(end), 'mV'))
+
+
+@case('analyze_statistics_full', 'analyze')
+def analyze_statistics_full(ds):
+    from pages.analyze import statistical_analysis
+    statistical_analysis(summarize(ds.first, ds.last))
+
+
+@case('analyze_timeseries_full', 'analyze')
+def analyze_timeseries_full(ds):
+    from pages.analyze import update_timeseries
+    query_cache.clear()
+    start, end = ds.window(ds.last - ds.first)
+    update_timeseries('mV', *_day_time(start), *_day_time(end), 1600)
+
+
+def measure(fn, cleanup, ds, repeat):
+    durations = []
+    for i in range(repeat + 1):  # ilk çalıştırma ısınma (içe aktarma, SQLite önbelleği)
+        started = time.perf_counter()
+        fn(ds)
+        if i:
+            durations.append(time.perf_counter() - started)
+        if cleanup is not None:
+            cleanup(ds)
+    return float(np.median(durations))
+
+
+def main(args):
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    app = _dash_app()
+    results = {}
+    regressions = []
+    print(f"{'boyut':>6} {'durum':<26} {'medyan ms':>10} {'taban ms':>10} {'fark':>7}")
+    for size in args.rows:
+        ds = dataset(size, args.data_dir)
+        ds.app = app
+        cwd = os.getcwd()
+        os.chdir(os.path.dirname(ds.path))  # sayfalar varsayılan DB_PATH'i okur
+        try:
+            for name, (group, fn, cleanup) in CASES.items():
+                if args.cases and group not in args.cases and name not in args.cases:
+                    continue
+                median = measure(fn, cleanup, ds, args.repeat)
+                key = f'{size}/{name}'
+                results[key] = median
+                previous = baseline.get(key)
+                change = '' if previous is None else f'{median / previous - 1:+.0%}'
+                if previous is not None and median > previous * (1 + args.threshold):
+                    regressions.append(key)
+                    change += ' !'
+                print(f"{size:>6} {name:<26} {median * 1000:>10.1f} "
+                      f"{'' if previous is None else f'{previous * 1000:.1f}':>10} {change:>7}")
+        finally:
+            os.chdir(cwd)
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=1, sort_keys=True)
+        print(f"Taban çizgisi kaydedildi: {args.baseline}")
+    elif regressions:
+        print(f"%{args.threshold * 100:.0f} eşiğini aşan yavaşlama: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=lambda value: value.split(','), default=['10k', '1m'],
+                        help=f"veritabanı boyutları ({', '.join(SIZES)})")
+    parser.add_argument('--cases', type=lambda value: value.split(','), default=None,
+                        help="sadece bu grup/durumlar (ingest, live, range, export, graphs, analyze)")
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    args = parser.parse_args()
+    unknown = [size for size in args.rows if size not in SIZES]
+    if unknown:
+        parser.error(f"bilinmeyen boyut: {', '.join(unknown)}")
+    sys.exit(main(args))
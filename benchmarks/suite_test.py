@@ -0,0 +1,43 @@
+"""benchmarks.suite durumlarını küçük bir veritabanında bir kez çalıştıran duman testi.
+
+Taban çizgisiyle karşılaştırma makineye bağlı olduğundan burada yapılmaz; her durumun
+hatasız bittiği ve 10k satırda cömert bir üst sınırın altında kaldığı kontrol edilir.
+"""
+import os
+
+import pytest
+
+from benchmarks import suite
+
+ROWS = '10k'
+LIMIT_MS = {  # grup -> medyan üst sınırı (10k satırda ölçülen sürelerin ~10 katı)
+    'ingest': 2000,
+    'live': 500,
+    'range': 1000,
+    'export': 2000,
+    'graphs': 2000,
+    'analyze': 2000,
+}
+
+
+@pytest.fixture(scope='module')
+def ds(tmp_path_factory):
+    ds = suite.dataset(ROWS, str(tmp_path_factory.mktemp('bench')))
+    ds.app = suite._dash_app()
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(os.path.dirname(ds.path))  # sayfalar varsayılan DB_PATH'i okur
+        yield ds
+
+
+def test_dataset_has_requested_size(ds):
+    assert len(ds.sensors) == suite.SENSORS
+    assert (ds.last - ds.first) // suite.PERIOD_MS + 1 == suite.SIZES[ROWS] // suite.SENSORS
+
+
+@pytest.mark.parametrize('name', list(suite.CASES))
+def test_case_within_bounds(ds, name):
+    if name == 'export_parquet_day':
+        pytest.importorskip('pyarrow')  # isteğe bağlı bağımlılık
+    group, fn, cleanup = suite.CASES[name]
+    median = suite.measure(fn, cleanup, ds, repeat=1)
+    assert 0 < median * 1000 < LIMIT_MS[group], f'{name}: {median * 1000:.1f} ms'
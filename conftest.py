@@ -0,0 +1,39 @@
+"""Testlerin ortak fixture'ları: geçici veritabanı ve simülatör için boş port."""
+import socket
+import sqlite3
+
+import pytest
+
+from database import initialize_database
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Güncel şemayla oluşturulmuş geçici sensor_data.db yolu."""
+    path = str(tmp_path / 'sensor_data.db')
+    initialize_database(path)
+    return path
+
+
+@pytest.fixture
+def project_db(tmp_path, monkeypatch):
+    """Varsayılan DB_PATH ('sensor_data.db') ile okuyan modüller için geçici çalışma dizini."""
+    monkeypatch.chdir(tmp_path)
+    initialize_database()
+    return str(tmp_path / 'sensor_data.db')
+
+
+@pytest.fixture
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def insert_rows(path, rows):
+    """(timestamp, sensor_id, mV, chlorine, average_mV, average_chlorine) satırlarını doğrudan yazar."""
+    with sqlite3.connect(path) as conn:
+        conn.executemany('''
+            INSERT INTO sensor_data (timestamp, sensor_id, mV, chlorine, average_mV, average_chlorine)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
@@ -1,10 +1,71 @@
 import sqlite3
+from datetime import datetime
 
-def initialize_database():
-    with sqlite3.connect('sensor_data.db') as conn:
-        c = conn.cursor()
-        c.execute('''CREATE TABLE IF NOT EXISTS sensor_data
-                    (timestamp DATETIME, sensor_id TEXT, mV REAL, chlorine REAL, average_mV REAL, average_chlorine REAL)''')
+import pandas as pd
+
+DB_PATH = 'sensor_data.db'
+SCHEMA_VERSION = 4  # PRAGMA user_version ile veritabanında tutulur
+
+# v4: sketches.py yüzdelik özet tabloları eklendi
+# v3: rollups.py özet tabloları eklendi
+# v2: zaman damgası epoch milisaniye (INTEGER). Tablo (sensor_id, timestamp) birincil
+# anahtarına göre kümelenir (WITHOUT ROWID), böylece sensör + zaman aralığı sorguları
+# tablo taraması yerine anahtar aralığı okur.
+SENSOR_DATA_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS {table}
+    (sensor_id TEXT NOT NULL, timestamp INTEGER NOT NULL, mV REAL, chlorine REAL,
+     average_mV REAL, average_chlorine REAL,
+     PRIMARY KEY (sensor_id, timestamp)) WITHOUT ROWID
+'''
+# Sensör filtresi olmayan aralık sorguları (analiz, dışa aktarma) için
+SENSOR_DATA_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS sensor_data_timestamp ON sensor_data (timestamp)',
+)
+
+LOCAL_TZ = datetime.now().astimezone().tzinfo
+
+
+def to_epoch_ms(value):
+    """datetime (yerel saat) ya da ISO metnini epoch milisaniyeye çevirir."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return int(value.timestamp() * 1000)
+
+
+def from_epoch_ms(values):
+    """Epoch milisaniye sütununu yerel saatte, saat dilimsiz datetime'a çevirir."""
+    return pd.to_datetime(values, unit='ms', utc=True).dt.tz_convert(LOCAL_TZ).dt.tz_localize(None)
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def table_exists(conn, table):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone() is not None
+
+
+def create_sensor_data(conn, table='sensor_data'):
+    conn.execute(SENSOR_DATA_SCHEMA.format(table=table))
+
+
+def initialize_database(path=DB_PATH):
+    with sqlite3.connect(path) as conn:
+        if table_exists(conn, 'sensor_data') and schema_version(conn) < SCHEMA_VERSION:
+            # Eski düzendeki tablo parça parça yeni şemaya taşınır
+            from migrate import migrate
+            migrate(path)
+            return
+        from rollups import create_rollup_tables
+        from sketches import create_sketch_tables
+        create_sensor_data(conn)
+        for index in SENSOR_DATA_INDEXES:
+            conn.execute(index)
+        create_rollup_tables(conn)
+        create_sketch_tables(conn)
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
         conn.commit()
 
 def initialize_calibration_database():
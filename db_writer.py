@@ -0,0 +1,161 @@
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+from database import DB_PATH, to_epoch_ms
+from live_stream import live_hub
+from metrics import Counter, Gauge, Histogram
+from rollups import update_rollups
+from sketches import SketchAccumulator
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = 500  # bu kadar satır birikince hemen yaz
+FLUSH_INTERVAL = 0.25  # saniye, en fazla bu kadar bekletilir
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",  # okuyucular (dashboard) yazarı beklemez
+    "PRAGMA synchronous=NORMAL",  # WAL ile commit başına fsync gerekmez
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",  # ~16 MB
+    "PRAGMA busy_timeout=5000",
+)
+
+# Aynı sensör ve milisaniyede ikinci bir örnek (tekrar gönderim) bütün batch'i düşürmesin;
+# ilk yazılan kalır, tekrar özetlere ve sketch'lere iki kez sayılmaz
+INSERT_SQL = '''
+    INSERT OR IGNORE INTO sensor_data (timestamp, sensor_id, mV, chlorine, average_mV, average_chlorine)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+
+batch_rows = Histogram('db_insert_batch_rows', "Bir transaction'da yazılan örnek sayısı",
+                       buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000))
+commit_seconds = Histogram('db_commit_seconds', "Batch yazma süresi (insert + özet + sketch + commit)")
+write_errors = Counter('db_write_errors_total', "Yazılamayan batch'ler")
+dropped_rows = Counter('db_dropped_rows_total', "Veritabanı hatası yüzünden yazılamayan örnekler")
+
+
+def insert_rows(conn, rows):
+    """Satırları yazar; sadece gerçekten eklenenleri (tekrar olmayanları) döndürür."""
+    return [row for row in rows if conn.execute(INSERT_SQL, row).rowcount]
+
+
+def connect(path=DB_PATH):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class SampleWriter:
+    """Örnekleri bellek içi kuyrukta toplayıp tek transaction'da toplu yazan thread.
+
+    Kuyruk BATCH_SIZE satıra ulaştığında ya da ilk satırın üzerinden FLUSH_INTERVAL
+    geçtiğinde executemany ile yazılır.
+    """
+
+    def __init__(self, path=DB_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stop = threading.Event()
+        # Yazılmış en yeni örneğin zamanı (epoch ms); önbellekler geçerlilik için kullanır
+        self.high_water = 0
+        self.sketches = SketchAccumulator()
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def submit(self, timestamp, sensor_id, mV=None, chlorine=None, average_mV=None, average_chlorine=None):
+        self._queue.put((to_epoch_ms(timestamp), sensor_id, mV, chlorine, average_mV, average_chlorine))
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sample-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _collect(self):
+        # İlk satırı bekle, sonra süre dolana ya da batch dolana kadar topla
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        conn = connect(self.path)
+        try:
+            self.high_water = conn.execute('SELECT MAX(timestamp) FROM sensor_data').fetchone()[0] or 0
+            while not self._stop.is_set():
+                batch = self._collect()
+                if batch:
+                    self._flush(conn, batch)
+                elif self.sketches.dirty:
+                    self._persist_sketches(conn)
+            # Kapanışta kuyrukta kalanları yaz
+            batch = []
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if batch:
+                self._flush(conn, batch)
+            self._persist_sketches(conn, force=True)
+        finally:
+            conn.close()
+
+    def _flush(self, conn, batch):
+        started = time.perf_counter()
+        try:
+            # Transaction geri alınırsa bellekteki sketch kovaları da geri alınır
+            with self.sketches.transaction(), conn:
+                inserted = insert_rows(conn, batch)
+                update_rollups(conn, inserted)
+                self.sketches.add(conn, inserted)
+                self.sketches.persist(conn)
+        except sqlite3.Error as e:
+            log.error("Veritabanı hatası: %s (%d satır yazılamadı)", e, len(batch))
+            write_errors.inc()
+            dropped_rows.inc(len(batch))
+            return
+        commit_seconds.observe(time.perf_counter() - started)
+        batch_rows.observe(len(batch))
+        if inserted:
+            self.high_water = max(self.high_water, max(row[0] for row in inserted))
+            # Canlı sayfalara sadece veritabanına yazılmış örnekler gönderilir
+            live_hub.publish(inserted, self.high_water)
+
+    def _persist_sketches(self, conn, force=False):
+        try:
+            with self.sketches.transaction(), conn:
+                self.sketches.persist(conn, force)
+        except sqlite3.Error as e:
+            log.error("Veritabanı hatası: %s (sketch'ler yazılamadı)", e)
+
+
+sample_writer = SampleWriter()
+
+Gauge('db_writer_queue_depth', "Yazılmayı bekleyen örnekler", function=lambda: sample_writer.pending)
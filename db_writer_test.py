@@ -0,0 +1,75 @@
+import sqlite3
+
+import pytest
+
+import db_writer
+from db_writer import SampleWriter, connect
+from live_stream import LiveHub
+from rollups import table_name as rollup_table
+from sketches import table_name as sketch_table
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    hub = LiveHub()
+    monkeypatch.setattr(db_writer, 'live_hub', hub)
+    return hub
+
+
+def _rows(count, offset=0, sensor_id='1'):
+    return [(1_700_000_000_000 + 1000 * (i + offset), sensor_id, float(i + offset), 1.0, None, None)
+            for i in range(count)]
+
+
+def test_writer_thread_writes_and_publishes(db_path, hub):
+    writer = SampleWriter(db_path, flush_interval=0.01)
+    subscriber, _ = hub.subscribe()
+    writer.start()
+    for timestamp, sensor_id, mV, chlorine, *_ in _rows(20):
+        writer.submit(timestamp, sensor_id, mV, chlorine)
+    writer.stop()
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute('SELECT COUNT(*), MAX(timestamp) FROM sensor_data').fetchone() == (20, _rows(20)[-1][0])
+        assert conn.execute(f"SELECT n FROM {sketch_table('1h')} WHERE field = 'mV'").fetchone() == (20,)
+    assert writer.high_water == _rows(20)[-1][0]
+    assert subscriber.queue.qsize() >= 1
+
+
+def test_redelivered_samples_are_counted_once(db_path, hub):
+    writer = SampleWriter(db_path)
+    conn = connect(db_path)
+    writer._flush(conn, _rows(10))
+    # Aynı (sensör, zaman) tekrar gelir: ham satır ilk haliyle kalır, özetlere iki kez girmez
+    duplicate = [(timestamp, sensor_id, 999.0, *rest) for timestamp, sensor_id, _, *rest in _rows(5)]
+    writer._flush(conn, duplicate + _rows(1, offset=10) + _rows(1, offset=10))
+    writer.sketches.persist(conn, force=True)
+    conn.commit()
+
+    assert conn.execute('SELECT COUNT(*), SUM(mV) FROM sensor_data').fetchone() == (11, 55.0)
+    for resolution in ('10s', '1m', '1h'):
+        assert conn.execute(f'SELECT SUM(mV_n), SUM(mV_sum) FROM {rollup_table(resolution)}').fetchone() == (11, 55.0)
+    assert conn.execute(f"SELECT SUM(n), SUM(total) FROM {sketch_table('1h')} WHERE field = 'mV'").fetchone() == (11, 55.0)
+    assert hub.published == 2
+    conn.close()
+
+
+def test_failed_batch_leaves_no_phantom_counts(db_path, hub, monkeypatch):
+    writer = SampleWriter(db_path)
+    conn = connect(db_path)
+    writer._flush(conn, _rows(10))
+
+    def failing_persist(conn, force=False):
+        raise sqlite3.OperationalError('disk I/O error')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(writer.sketches, 'persist', failing_persist)
+        writer._flush(conn, _rows(5, offset=10))
+    writer._persist_sketches(conn, force=True)
+
+    assert conn.execute('SELECT COUNT(*) FROM sensor_data').fetchone() == (10,)
+    assert conn.execute(f"SELECT SUM(mV_n) FROM {rollup_table('1h')}").fetchone() == (10,)
+    assert conn.execute(f"SELECT SUM(n) FROM {sketch_table('1h')} WHERE field = 'mV'").fetchone() == (10,)
+    assert writer.high_water == _rows(10)[-1][0]
+    assert hub.published == 1
+    conn.close()
@@ -0,0 +1,98 @@
+"""Grafiklere gönderilmeden önce izleri seyrelten NumPy tabanlı yardımcılar.
+
+İki yöntem vardır:
+- lttb: Largest-Triangle-Three-Buckets, çizginin görsel şeklini korur
+- minmax: her piksel sütunu için min ve max noktası, tepe/dip değerlerini kaçırmaz
+"""
+import numpy as np
+
+DEFAULT_WIDTH = 1200  # grafik genişliği bilinmiyorsa (px)
+
+
+def point_budget(width_px, mode='lttb'):
+    """Grafik genişliğinden iz başına nokta bütçesi; minmax piksel başına 2 nokta kullanır."""
+    width_px = int(width_px or DEFAULT_WIDTH)
+    return 2 * width_px if mode == 'minmax' else width_px
+
+
+def _as_numeric(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def _padded(values, n_buckets, size, fill):
+    padded = np.full(n_buckets * size, fill)
+    padded[:len(values)] = values
+    return padded.reshape(n_buckets, size)
+
+
+def minmax_indices(y, n_out):
+    """Her kovadan min ve max noktalarının indekslerini (sıralı) döndürür."""
+    n = len(y)
+    n_buckets = max(n_out // 2, 1)
+    size = int(np.ceil(n / n_buckets))
+    n_buckets = int(np.ceil(n / size))
+    buckets = _padded(y, n_buckets, size, np.nan)
+    offsets = np.arange(n_buckets) * size
+    valid = ~np.all(np.isnan(buckets), axis=1)
+    filled = np.where(np.isnan(buckets), 0, buckets)
+    lo = np.argmin(np.where(np.isnan(buckets), np.inf, filled), axis=1) + offsets
+    hi = np.argmax(np.where(np.isnan(buckets), -np.inf, filled), axis=1) + offsets
+    return np.unique(np.concatenate([lo[valid], hi[valid]]))
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets ile seçilen noktaların indeksleri."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # İlk ve son nokta sabit, aradakiler n_out - 2 kovaya bölünür
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+    ends = np.maximum(ends, starts + 1)
+    # Her kovanın bir sonraki kovasının ortalaması (üçgenin üçüncü köşesi) tek seferde
+    cum_x = np.concatenate([[0.0], np.cumsum(x)])
+    cum_y = np.concatenate([[0.0], np.cumsum(y)])
+    next_starts = np.append(starts[1:], n - 1)
+    next_ends = np.append(ends[1:], n)
+    counts = next_ends - next_starts
+    avg_x = (cum_x[next_ends] - cum_x[next_starts]) / counts
+    avg_y = (cum_y[next_ends] - cum_y[next_starts]) / counts
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        xs = x[starts[i]:ends[i]]
+        ys = y[starts[i]:ends[i]]
+        area = np.abs((x[a] - avg_x[i]) * (ys - y[a]) - (x[a] - xs) * (avg_y[i] - y[a]))
+        a = starts[i] + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def decimate(x, y, n_out, mode='lttb'):
+    """x, y dizilerini x'e göre sıralayıp en fazla n_out noktaya indirir; NaN değerler atılır."""
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    keep = ~np.isnan(y)
+    if not keep.all():
+        x, y = x[keep], y[keep]
+
+    # Sonuç her zaman artan x sırasında (canlı modda extendData sona ekler)
+    x_num = _as_numeric(x)
+    order = np.argsort(x_num, kind='stable')
+    if not np.array_equal(order, np.arange(len(order))):
+        x, y, x_num = x[order], y[order], x_num[order]
+    if len(y) <= n_out:
+        return x, y
+
+    if mode == 'minmax':
+        indices = minmax_indices(y, n_out)
+    else:
+        indices = lttb_indices(x_num, y, n_out)
+    return x[indices], y[indices]
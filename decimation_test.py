@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from decimation import decimate, lttb_indices, minmax_indices, point_budget
+
+
+@pytest.fixture
+def signal():
+    rng = np.random.default_rng(7)
+    x = np.arange(10_000, dtype=float)
+    y = np.sin(x / 500) + rng.normal(0, 0.05, len(x))
+    y[1234] = 5.0  # tek noktalık tepe
+    y[8765] = -5.0
+    return x, y
+
+
+def test_lttb_keeps_endpoints_and_order(signal):
+    x, y = signal
+    indices = lttb_indices(x, y, 500)
+    assert len(indices) == 500
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
+    assert np.all(np.diff(indices) > 0)
+    # Belirgin tepe/dip LTTB'de de seçilir
+    assert {1234, 8765} <= set(indices.tolist())
+
+
+def test_lttb_small_inputs_are_returned_whole():
+    x = np.arange(5.0)
+    assert lttb_indices(x, x, 10).tolist() == [0, 1, 2, 3, 4]
+    assert lttb_indices(x, x, 2).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_minmax_keeps_every_bucket_extreme(signal):
+    x, y = signal
+    indices = minmax_indices(y, 400)
+    assert len(indices) <= 400
+    assert np.all(np.diff(indices) > 0)
+    buckets = np.array_split(np.arange(len(y)), 200)
+    for bucket in buckets:
+        assert bucket[np.argmax(y[bucket])] in indices
+        assert bucket[np.argmin(y[bucket])] in indices
+
+
+def test_decimate_sorts_and_drops_nan():
+    x = np.array([5.0, 1.0, 3.0, 2.0, 4.0])
+    y = np.array([50.0, 10.0, np.nan, 20.0, 40.0])
+    out_x, out_y = decimate(x, y, 10)
+    assert out_x.tolist() == [1.0, 2.0, 4.0, 5.0]
+    assert out_y.tolist() == [10.0, 20.0, 40.0, 50.0]
+
+
+@pytest.mark.parametrize('mode', ['lttb', 'minmax'])
+def test_decimate_datetime_axis(signal, mode):
+    _, y = signal
+    x = pd.date_range('2025-01-01', periods=len(y), freq='s').to_numpy()
+    n_out = point_budget(300, mode)
+    out_x, out_y = decimate(x[::-1], y[::-1], n_out, mode)
+    assert len(out_x) <= n_out
+    assert out_x.dtype == x.dtype
+    assert np.all(np.diff(out_x.astype(np.int64)) > 0)
+    assert out_y.max() == 5.0 and out_y.min() == -5.0
+
+
+def test_point_budget():
+    assert point_budget(800) == 800
+    assert point_budget(800, 'minmax') == 1600
+    assert point_budget(None) == 1200
@@ -0,0 +1,148 @@
+"""Tarih aralığındaki ham veriyi parça parça okuyup akış halinde indiren Flask uçları.
+
+    /export/sensor_data.csv?start=...&end=...&sensors=1,2&columns=mV,chlorine
+    /export/sensor_data.parquet?...
+    /export/sensor_data.arrow?...   (Arrow IPC stream)
+
+start/end ISO metni (yerel saat), sensors ve columns virgülle ayrılmış listelerdir;
+verilmezse tüm sensörler / sütunlar gelir. Seçim SQL sorgusuna eklenir ve satırlar
+queries.iter_range ile CHUNK_SIZE'lık gruplar halinde okunduğundan aralığın tamamı
+hiçbir zaman bellekte tutulmaz. Parquet/Arrow için pyarrow gerekir (isteğe bağlı).
+"""
+import csv
+import io
+from datetime import datetime
+from urllib.parse import urlencode
+
+from flask import Blueprint, Response, abort, request, stream_with_context
+
+from queries import iter_range, select_columns
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow kurulu değilse sadece CSV sunulur
+    pa = None
+
+export_blueprint = Blueprint('export', __name__)
+
+FORMATS = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+
+def export_url(fmt, start, end, sensor_ids=None, columns=None):
+    """Sayfalardaki indirme bağlantıları için URL üretir."""
+    params = {'start': start.isoformat(timespec='minutes'), 'end': end.isoformat(timespec='minutes')}
+    if sensor_ids is not None:
+        params['sensors'] = ','.join(sensor_ids)
+    if columns:
+        params['columns'] = ','.join(columns)
+    return f'/export/sensor_data.{fmt}?{urlencode(params, safe=",:")}'
+
+
+def _split(value):
+    if value is None:
+        return None
+    return [item for item in value.split(',') if item]
+
+
+def _local_time(ms):
+    return datetime.fromtimestamp(ms / 1000).isoformat(sep=' ', timespec='milliseconds')
+
+
+def _csv_stream(chunks, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in chunks:
+        writer.writerows((_local_time(row[0]), *row[1:]) for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _arrow_schema(columns):
+    fields = []
+    for column in columns:
+        if column == 'timestamp':
+            fields.append(pa.field(column, pa.timestamp('ms', tz='UTC')))
+        elif column == 'sensor_id':
+            fields.append(pa.field(column, pa.string()))
+        else:
+            fields.append(pa.field(column, pa.float64()))
+    return pa.schema(fields)
+
+
+def _record_batch(rows, schema):
+    arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink:
+    """pyarrow yazıcılarının ürettiği baytları, yanıt olarak gönderilene kadar biriktirir."""
+
+    def __init__(self):
+        self.parts = []
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def _columnar_stream(chunks, columns, fmt):
+    schema = _arrow_schema(columns)
+    sink = _ChunkSink()
+    # Parquet'te her parça bir row group olur; alt bilgi (footer) en sonda yazılır
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    for rows in chunks:
+        batch = _record_batch(rows, schema)
+        if fmt == 'parquet':
+            writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+@export_blueprint.route('/export/sensor_data.<fmt>')
+def export_sensor_data(fmt):
+    if fmt not in FORMATS:
+        abort(404)
+    if fmt != 'csv' and pa is None:
+        abort(501, description="Parquet/Arrow için pyarrow kurulu olmalı")
+    try:
+        start = datetime.fromisoformat(request.args['start'])
+        end = datetime.fromisoformat(request.args['end'])
+    except (KeyError, ValueError):
+        abort(400, description="start ve end ISO tarih olarak verilmeli")
+
+    columns = select_columns(_split(request.args.get('columns')))
+    chunks = iter_range(start, end, _split(request.args.get('sensors')), columns)
+    if fmt == 'csv':
+        body = _csv_stream(chunks, columns)
+    else:
+        body = _columnar_stream(chunks, columns, fmt)
+
+    filename = f'sensor_data_{start:%Y%m%d_%H%M}_{end:%Y%m%d_%H%M}.{fmt}'
+    return Response(stream_with_context(body), mimetype=FORMATS[fmt],
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
@@ -0,0 +1,75 @@
+import csv
+import io
+import time
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+import queries
+from archive import DAY_MS, archive_old_data
+from conftest import insert_rows
+from export import export_blueprint, export_url
+
+
+@pytest.fixture
+def client(project_db, monkeypatch):
+    monkeypatch.setattr(queries, 'CHUNK_SIZE', 7)  # birden çok parça/row group
+    now = int(time.time() * 1000)
+    old = now - 40 * DAY_MS
+    rows = [(old + 1000 * i, '1', 100.0 + i, 0.5, None, None) for i in range(10)]
+    rows += [(now - 60_000 + 1000 * i, sensor, 1000.0 + i, None, None, None) for i in range(20) for sensor in ('1', '2')]
+    insert_rows(project_db, rows)
+    archive_old_data(path=project_db)  # eski gün arşivden okunur
+    app = Flask(__name__)
+    app.register_blueprint(export_blueprint)
+    client = app.test_client()
+    client.window = (datetime.fromtimestamp((old - 1000) / 1000), datetime.fromtimestamp(now / 1000))
+    return client
+
+
+def _get(client, fmt, **params):
+    start, end = client.window
+    return client.get(f'/export/sensor_data.{fmt}',
+                      query_string={'start': start.isoformat(), 'end': end.isoformat(), **params})
+
+
+def test_csv_export(client):
+    response = _get(client, 'csv', sensors='1', columns='mV')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert 'attachment; filename=sensor_data_' in response.headers['Content-Disposition']
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0] == ['timestamp', 'sensor_id', 'mV']
+    assert len(rows) == 1 + 10 + 20
+    assert {row[1] for row in rows[1:]} == {'1'}
+    assert [float(row[2]) for row in rows[1:11]] == [100.0 + i for i in range(10)]
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+def test_columnar_export(client, fmt):
+    pa = pytest.importorskip('pyarrow')  # isteğe bağlı bağımlılık
+    import pyarrow.parquet as pq
+    response = _get(client, fmt)
+    assert response.status_code == 200
+    data = response.get_data()
+    if fmt == 'parquet':
+        table = pq.read_table(io.BytesIO(data))
+        assert pq.ParquetFile(io.BytesIO(data)).num_row_groups > 1
+    else:
+        table = pa.ipc.open_stream(data).read_all()
+    assert table.num_rows == 10 + 40
+    assert table.column_names == ['timestamp', 'sensor_id', 'mV', 'chlorine', 'average_mV', 'average_chlorine']
+    assert table.schema.field('timestamp').type == pa.timestamp('ms', tz='UTC')
+    assert table.column('chlorine').null_count == 40
+
+
+def test_bad_requests(client):
+    assert client.get('/export/sensor_data.xlsx?start=2025-01-01T00:00&end=2025-01-02T00:00').status_code == 404
+    assert client.get('/export/sensor_data.csv?start=2025-01-01T00:00').status_code == 400
+    assert client.get('/export/sensor_data.csv?start=dün&end=bugün').status_code == 400
+
+
+def test_export_url():
+    url = export_url('csv', datetime(2025, 1, 2, 3, 4), datetime(2025, 1, 2, 5, 6), ['1', '2'], ['mV'])
+    assert url == '/export/sensor_data.csv?start=2025-01-02T03:04&end=2025-01-02T05:06&sensors=1,2&columns=mV'
@@ -0,0 +1,110 @@
+"""Cihaz başına bağlantı durumu (connected / degraded / open-circuit) ve devre kesici.
+
+Art arda FAILURE_THRESHOLD okuma başarısız olursa devre açılır (open-circuit):
+acquisition servisi bu cihazı okumayı bırakır, böylece ölü bir cihaz okuma turlarında
+hiç zaman harcamaz. Yeniden bağlanma ayrı bir task'ta, üstel artan bekleme ile
+(BACKOFF_INITIAL, 2x, en fazla BACKOFF_MAX) denenir; deneme başarılı olunca cihaz
+tekrar connected olur ve normal okumaya döner.
+"""
+import asyncio
+import logging
+import random
+import time
+
+from metrics import Counter
+from modbus_pool import ExceptionResponse
+
+log = logging.getLogger(__name__)
+
+CONNECTED = 'connected'
+DEGRADED = 'degraded'  # hata var ama eşik aşılmadı, okunmaya devam edilir
+OPEN = 'open-circuit'  # okunmuyor, arka planda yeniden bağlanılıyor
+
+FAILURE_THRESHOLD = 3
+BACKOFF_INITIAL = 1.0  # saniye
+BACKOFF_MAX = 60.0
+JITTER = 0.2  # aynı gateway'deki cihazlar aynı anda denemesin
+
+read_errors = Counter('sensor_read_errors_total', "Başarısız okumalar (timeout, connection, exception, error)",
+                      ['sensor', 'kind'])
+
+
+def error_kind(error):
+    # pymodbus yanıt gelmeyen isteği ModbusIOException ile bildirir: kendi zaman aşımında
+    # "No response ...", gateway'in wait_for'u iptal ettiğinde "Request cancelled ..."
+    if isinstance(error, TimeoutError) or 'No response' in str(error) or 'Request cancelled' in str(error):
+        return 'timeout'
+    if isinstance(error, OSError):  # ConnectionError dahil
+        return 'connection'
+    if isinstance(error, ExceptionResponse):
+        return 'exception'
+    return 'error'
+
+
+class DeviceHealth:
+    def __init__(self, name, reconnect):
+        self.name = name
+        self.reconnect = reconnect  # async, başarılıysa True döndürür
+        self.state = CONNECTED
+        self.failures = 0  # art arda başarısız okuma
+        self.attempts = 0  # devre açıkken yapılan yeniden bağlanma denemesi
+        self.last_error = None
+        self.changed_at = time.time()
+        self.next_retry = None  # epoch saniye
+        self._task = None
+
+    @property
+    def available(self):
+        return self.state != OPEN
+
+    def snapshot(self):
+        return {'device': self.name, 'state': self.state, 'failures': self.failures,
+                'attempts': self.attempts, 'last_error': self.last_error,
+                'changed_at': self.changed_at, 'next_retry': self.next_retry}
+
+    def record_success(self):
+        self.failures = 0
+        self._set(CONNECTED)
+
+    def record_failure(self, error):
+        read_errors.inc(sensor=self.name, kind=error_kind(error))
+        self.failures += 1
+        self.last_error = str(error) or type(error).__name__
+        if self.failures < FAILURE_THRESHOLD:
+            self._set(DEGRADED)
+            return
+        self._set(OPEN)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._recover(), name=f"reconnect-{self.name}")
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _set(self, state):
+        if state != self.state:
+            if state == CONNECTED:
+                log.info("Cihaz %s: %s -> %s", self.name, self.state, state)
+            else:
+                log.warning("Cihaz %s: %s -> %s (%s)", self.name, self.state, state, self.last_error)
+            self.state = state
+            self.changed_at = time.time()
+
+    async def _recover(self):
+        delay = BACKOFF_INITIAL
+        self.attempts = 0
+        while True:
+            wait = delay * random.uniform(1 - JITTER, 1 + JITTER)
+            self.next_retry = time.time() + wait
+            await asyncio.sleep(wait)
+            self.attempts += 1
+            try:
+                if await self.reconnect():
+                    break
+                self.last_error = "bağlanamadı"
+            except Exception as e:
+                self.last_error = str(e) or type(e).__name__
+            delay = min(delay * 2, BACKOFF_MAX)
+        self.next_retry = None
+        self.record_success()
@@ -0,0 +1,203 @@
+"""Ağır analizleri Dash istek thread'i yerine süreç havuzunda çalıştıran iş kuyruğu.
+
+submit() hemen bir iş kimliği döndürür; sayfa status() ile ilerlemeyi sorgular,
+cancel() ile işi iptal eder. Aynı girdilerle istenen iş tekrar çalıştırılmaz:
+çalışmakta olan işe bağlanılır ya da önbellekteki sonuç döndürülür. Önbellek
+geçerliliği query_cache ile aynıdır (SampleWriter.high_water).
+
+İş fonksiyonu modül düzeyinde tanımlı olmalı ve ilk argüman olarak JobContext almalıdır;
+ctx.progress() ilerlemeyi bildirir ve iş iptal edildiyse JobCancelled fırlatır.
+Süreçler 'spawn' ile başlatılır: uygulamanın thread'leri (acquisition, yazıcı) kopyalanmaz.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from db_writer import sample_writer
+from query_cache import SETTLE_MS
+
+MAX_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+MAX_RESULTS = 32  # önbellekte tutulan sonuç sayısı
+JOB_TTL = 600  # saniye, biten işlerin durumu bu kadar saklanır
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobContext:
+    """İşçi süreçte iş fonksiyonuna verilen ilerleme/iptal arayüzü."""
+
+    def __init__(self, job_id, shared):
+        self.job_id = job_id
+        self.shared = shared  # Manager dict: iş -> ilerleme, ('cancel', iş) -> True
+
+    def progress(self, done, total, message=None):
+        if self.shared.get(('cancel', self.job_id)):
+            raise JobCancelled()
+        self.shared[self.job_id] = (done, total, message)
+
+
+def _run(func, job_id, shared, args):
+    shared[job_id] = (0, 1, None)
+    return func(JobContext(job_id, shared), *args)
+
+
+class _Job:
+    def __init__(self, key, end_ms):
+        self.key = key
+        self.end_ms = end_ms
+        self.future = None
+        self.cached = None  # önbellekten gelen sonuç
+        self.high_water = None
+        self.finished_at = None
+
+
+class JobManager:
+    def __init__(self, max_workers=MAX_WORKERS, writer=sample_writer):
+        self.max_workers = max_workers
+        self.writer = writer
+        self.hits = 0
+        self.misses = 0
+        self._executor = None
+        self._manager = None
+        self._shared = None
+        self._jobs = {}  # iş kimliği -> _Job
+        self._running = {}  # anahtar -> iş kimliği (aynı girdili işler birleşir)
+        self._results = OrderedDict()  # anahtar -> (sonuç, high_water, end_ms)
+        self._lock = threading.Lock()
+
+    def _start(self):
+        if self._executor is None:
+            context = multiprocessing.get_context('spawn')
+            self._manager = context.Manager()
+            self._shared = self._manager.dict()
+            self._executor = ProcessPoolExecutor(self.max_workers, mp_context=context)
+            atexit.register(self.shutdown)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._manager.shutdown()
+                self._executor = self._manager = self._shared = None
+
+    def submit(self, func, *args, end_ms=None):
+        """İşi kuyruğa alır ve kimliğini döndürür; end_ms verilirse sonuç önbelleği ona göre geçersizlenir."""
+        key = (func.__module__, func.__qualname__, args)
+        with self._lock:
+            self._purge()
+            job_id = self._running.get(key)
+            if job_id is not None:
+                return job_id
+
+            job_id = uuid.uuid4().hex
+            job = self._jobs[job_id] = _Job(key, end_ms)
+            cached = self._results.get(key)
+            if cached is not None and self._valid(*cached[1:]):
+                self._results.move_to_end(key)
+                self.hits += 1
+                job.cached = cached[0]
+                job.finished_at = time.time()
+                return job_id
+            self._results.pop(key, None)
+            self.misses += 1
+
+            self._start()
+            job.high_water = self.writer.high_water  # veri okunmadan önceki durum
+            job.future = self._executor.submit(_run, func, job_id, self._shared, args)
+            self._running[key] = job_id
+        job.future.add_done_callback(lambda future: self._finished(job_id))
+        return job_id
+
+    def _valid(self, high_water, end_ms):
+        return end_ms is None or end_ms <= high_water - SETTLE_MS or high_water == self.writer.high_water
+
+    def _finished(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.finished_at = time.time()
+            if self._running.get(job.key) == job_id:
+                del self._running[job.key]
+            if self._state(job) == DONE:
+                self._results[job.key] = (job.future.result(), job.high_water, job.end_ms)
+                while len(self._results) > MAX_RESULTS:
+                    self._results.popitem(last=False)
+            if self._shared is not None:
+                self._shared.pop(job_id, None)
+                self._shared.pop(('cancel', job_id), None)
+
+    def _purge(self):
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > JOB_TTL:
+                del self._jobs[job_id]
+
+    def _state(self, job):
+        future = job.future
+        if future is None:
+            return DONE  # önbellekten
+        if future.cancelled():
+            return CANCELLED
+        if not future.done():
+            return RUNNING if future.running() else QUEUED
+        error = future.exception()
+        if isinstance(error, JobCancelled):
+            return CANCELLED
+        return FAILED if error is not None else DONE
+
+    def status(self, job_id):
+        """{'state', 'done', 'total', 'message', 'error'}; bilinmeyen iş için None."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        state = self._state(job)
+        done, total, message = 0, 1, None
+        if state == DONE:
+            done = total = 1
+        elif state == RUNNING and self._shared is not None:
+            try:
+                done, total, message = self._shared.get(job_id, (0, 1, None))
+            except (OSError, EOFError):  # Manager kapanıyor
+                pass
+        error = str(job.future.exception()) if state == FAILED else None
+        return {'state': state, 'done': done, 'total': total, 'message': message, 'error': error}
+
+    def result(self, job_id):
+        job = self._jobs[job_id]
+        if job.future is None:
+            return job.cached
+        return job.future.result()
+
+    def cancel(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None or job.future is None or job.future.done():
+            return False
+        with self._lock:
+            if self._running.get(job.key) == job_id:
+                del self._running[job.key]  # aynı girdilerle yeni istek yeni iş başlatsın
+        # Kuyruktaki iş hemen, çalışan iş bir sonraki ctx.progress() çağrısında durur
+        if not job.future.cancel():
+            self._shared[('cancel', job_id)] = True
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'running': len(self._running),
+                    'results': len(self._results)}
+
+
+analysis_jobs = JobManager()
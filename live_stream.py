@@ -0,0 +1,128 @@
+"""Yeni örnekleri tüm açık sayfalara Server-Sent Events ile gönderen yayın merkezi.
+
+SampleWriter her batch'i yazdıktan sonra publish() çağırır; batch bir kez JSON'a
+çevrilir ve tüm abonelerin kuyruğuna aynı mesaj konur. Böylece izleyici sayısı
+veritabanı yükünü değiştirmez (sayfalar canlı modda sorgu yapmaz).
+
+    GET /stream?since=<epoch ms>
+
+Her olayın kimliği (id) o batch'ten sonraki high_water değeridir. Bağlantı koparsa
+tarayıcı Last-Event-ID ile yeniden bağlanır ve aradaki mesajlar HISTORY'den tekrar
+gönderilir; istenen nokta geçmişten daha eskiyse `reset` olayı gönderilir ve sayfa
+veriyi baştan okur. Mesajları yetiştiremeyen abonenin bağlantısı kapatılır.
+"""
+import json
+import math
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+
+from flask import Blueprint, Response, request, stream_with_context
+
+HISTORY = 600  # yeniden bağlananlar için saklanan batch sayısı
+MAX_PENDING = 256  # abone başına gönderilmeyi bekleyen en fazla mesaj
+HEARTBEAT = 15  # saniye, boşta bağlantının koptuğunu anlamak için
+RETRY_MS = 2000  # tarayıcının yeniden bağlanma beklemesi
+
+live_stream_blueprint = Blueprint('live_stream', __name__)
+
+
+def _value(value):
+    # JSON NaN desteklemez
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def encode(rows, high_water):
+    """Batch satırlarını (timestamp, sensor_id, mV, ...) SSE mesajına çevirir."""
+    data = json.dumps({
+        'high_water': high_water,
+        'rows': [[timestamp, datetime.fromtimestamp(timestamp / 1000).isoformat(timespec='milliseconds'),
+                  sensor_id, *map(_value, values)] for timestamp, sensor_id, *values in rows],
+    }, separators=(',', ':'))
+    return f'id: {high_water}\nevent: samples\ndata: {data}\n\n'.encode()
+
+
+class _Subscriber:
+    def __init__(self):
+        self.queue = queue.Queue(MAX_PENDING)
+        self.closed = False
+
+
+class LiveHub:
+    def __init__(self, history=HISTORY):
+        self.published = 0
+        self.dropped = 0  # yetişemediği için kapatılan abone
+        self._history = deque(maxlen=history)  # (high_water, mesaj)
+        self._floor = 0  # geçmişten atılmış en yeni high_water
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, rows, high_water):
+        if not rows:
+            return
+        message = encode(rows, high_water)
+        with self._lock:
+            if len(self._history) == self._history.maxlen:
+                self._floor = self._history[0][0]
+            self._history.append((high_water, message))
+            self.published += 1
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.queue.put_nowait(message)
+                except queue.Full:
+                    subscriber.closed = True
+                    self._subscribers.discard(subscriber)
+                    self.dropped += 1
+
+    def subscribe(self, since=None):
+        """Yeni abone ve since'ten sonraki mesajlar; geçmiş yetmiyorsa backlog None."""
+        subscriber = _Subscriber()
+        with self._lock:
+            if since is None:
+                backlog = []
+            elif since < self._floor:
+                backlog = None
+            else:
+                backlog = [message for high_water, message in self._history if high_water > since]
+            self._subscribers.add(subscriber)
+        return subscriber, backlog
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stream(self, since=None):
+        subscriber, backlog = self.subscribe(since)
+        try:
+            yield f'retry: {RETRY_MS}\n\n'.encode()
+            if backlog is None:
+                yield b'event: reset\ndata: {}\n\n'
+            else:
+                yield from backlog
+            while not subscriber.closed:
+                try:
+                    yield subscriber.queue.get(timeout=HEARTBEAT)
+                except queue.Empty:
+                    yield b': ping\n\n'
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self):
+        with self._lock:
+            return {'subscribers': len(self._subscribers), 'published': self.published,
+                    'dropped': self.dropped}
+
+
+live_hub = LiveHub()
+
+
+@live_stream_blueprint.route('/stream')
+def stream():
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        since = int(since) if since else None
+    except ValueError:
+        since = None
+    return Response(stream_with_context(live_hub.stream(since)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
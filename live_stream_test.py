@@ -0,0 +1,85 @@
+import json
+import math
+
+from flask import Flask
+
+import live_stream
+from live_stream import LiveHub, encode, live_stream_blueprint
+
+
+def _batch(high_water):
+    return [(high_water, '1', 1000.0, math.nan, None, None)]
+
+
+def _payload(message):
+    return json.loads(message.decode().split('data: ', 1)[1])
+
+
+def test_encode_uses_high_water_as_event_id():
+    message = encode(_batch(1_700_000_000_123), 1_700_000_000_123)
+    assert message.startswith(b'id: 1700000000123\nevent: samples\n')
+    rows = _payload(message)['rows']
+    assert rows[0][0] == 1_700_000_000_123 and rows[0][2:] == ['1', 1000.0, None, None, None]
+
+
+def test_backlog_after_since():
+    hub = LiveHub(history=10)
+    for high_water in (100, 200, 300):
+        hub.publish(_batch(high_water), high_water)
+    hub.publish([], 400)  # boş batch yayınlanmaz
+
+    _, backlog = hub.subscribe(since=100)
+    assert [_payload(message)['high_water'] for message in backlog] == [200, 300]
+    _, backlog = hub.subscribe(since=None)
+    assert backlog == []
+    assert hub.stats() == {'subscribers': 2, 'published': 3, 'dropped': 0}
+
+
+def test_floor_moves_when_history_overflows():
+    hub = LiveHub(history=3)
+    for high_water in range(1, 6):
+        hub.publish(_batch(high_water), high_water)
+    # 1 ve 2 geçmişten atıldı: 2'den sonrası tam, 1'den sonrası eksik
+    _, backlog = hub.subscribe(since=2)
+    assert [_payload(message)['high_water'] for message in backlog] == [3, 4, 5]
+    _, backlog = hub.subscribe(since=1)
+    assert backlog is None
+
+
+def test_stream_sends_reset_and_live_messages():
+    hub = LiveHub(history=1)
+    hub.publish(_batch(1), 1)
+    hub.publish(_batch(2), 2)
+    stream = hub.stream(since=0)
+    assert next(stream).startswith(b'retry: ')
+    assert next(stream) == b'event: reset\ndata: {}\n\n'
+    hub.publish(_batch(3), 3)
+    assert _payload(next(stream))['high_water'] == 3
+    stream.close()
+    assert hub.stats()['subscribers'] == 0
+
+
+def test_slow_subscriber_is_dropped(monkeypatch):
+    monkeypatch.setattr(live_stream, 'MAX_PENDING', 2)
+    hub = LiveHub()
+    subscriber, _ = hub.subscribe()
+    for high_water in range(1, 4):
+        hub.publish(_batch(high_water), high_water)
+    assert subscriber.closed
+    assert hub.stats() == {'subscribers': 0, 'published': 3, 'dropped': 1}
+
+
+def test_stream_endpoint_reads_last_event_id(monkeypatch):
+    hub = LiveHub(history=2)
+    for high_water in (10, 20):
+        hub.publish(_batch(high_water), high_water)
+    monkeypatch.setattr(live_stream, 'live_hub', hub)
+    app = Flask(__name__)
+    app.register_blueprint(live_stream_blueprint)
+
+    response = app.test_client().get('/stream', headers={'Last-Event-ID': '10'}, buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunks = response.response
+    assert next(chunks).startswith(b'retry: ')
+    assert _payload(next(chunks))['high_water'] == 20
+    response.close()
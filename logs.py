@@ -0,0 +1,136 @@
+"""Uygulama genelinde loglama: kuyruklu (bloklamayan) handler, modül başına seviye,
+tekrarlayan mesajların sınırlanması ve isteğe bağlı JSON-lines dosyası.
+
+Modüller `log = logging.getLogger(__name__)` ile yazar. setup_logging() kök logger'a
+bir QueueHandler bağlar: acquisition loop'u ve yazıcı thread'i sadece kayıt nesnesini
+kuyruğa koyar, biçimlendirme ve konsol/dosya yazma ayrı bir thread'de (QueueListener)
+yapılır. Aynı mesaj (logger, şablon, argümanlar) RATE_WINDOW içinde RATE_BURST kereden
+fazla gelirse bastırılır; pencere dolduktan sonraki ilk mesaja bastırılanların sayısı
+eklenir. Böylece ölü bir sensör konsolu doldurmaz.
+
+Ortam değişkenleri:
+    LOG_LEVELS="INFO,sensor_class=DEBUG,pymodbus=ERROR"  (ilk öğe kök seviye)
+    LOG_FILE=logs/sensor_logger.jsonl                     (JSON-lines, LOG_FILE_BYTES'ta döner)
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+LEVELS = {'': 'INFO', 'pymodbus': 'WARNING'}
+RATE_BURST = 5  # pencere başına aynı mesajdan en fazla
+RATE_WINDOW = 60.0  # saniye
+RATE_KEYS = 1000  # takip edilen farklı mesaj sayısı sınırı
+LOG_FILE_BYTES = 10 * 1024 * 1024
+LOG_FILE_BACKUPS = 5
+FORMAT = '%(asctime)s %(levelname)-7s %(name)s: %(message)s'
+
+_listener = None
+
+
+class RateLimitFilter(logging.Filter):
+    """Aynı mesajı RATE_WINDOW başına RATE_BURST kez geçirir, fazlasını sayıp bastırır."""
+
+    def __init__(self, burst=RATE_BURST, window=RATE_WINDOW):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._seen = {}  # anahtar -> [pencere başlangıcı, geçen, bastırılan]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        try:
+            key = (record.name, record.levelno, record.msg, repr(record.args))
+        except Exception:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is None or now - entry[0] >= self.window:
+                suppressed = entry[2] if entry is not None else 0
+                if entry is None and len(self._seen) >= RATE_KEYS:
+                    self._prune(now)
+                self._seen[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if entry[1] < self.burst:
+                entry[1] += 1
+                return True
+            entry[2] += 1
+            return False
+
+    def _prune(self, now):
+        for key in [key for key, entry in self._seen.items() if now - entry[0] >= self.window]:
+            del self._seen[key]
+        if len(self._seen) >= RATE_KEYS:
+            self._seen.clear()
+
+
+class _SuppressedFormatter(logging.Formatter):
+    def format(self, record):
+        text = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        return f'{text} ({suppressed} tekrar bastırıldı)' if suppressed else text
+
+
+class JsonFormatter(logging.Formatter):
+    """Her kayıt için tek satır JSON."""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        if getattr(record, 'suppressed', 0):
+            data['suppressed'] = record.suppressed
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+def parse_levels(text):
+    """"INFO,sensor_class=DEBUG" -> {'': 'INFO', 'sensor_class': 'DEBUG'}"""
+    levels = {}
+    for item in filter(None, (part.strip() for part in (text or '').split(','))):
+        name, _, level = item.rpartition('=')
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(levels=None, log_file=None):
+    """Kök logger'ı kuyruklu handler'a bağlar; ikinci çağrı sadece seviyeleri günceller."""
+    global _listener
+    levels = {**LEVELS, **parse_levels(os.environ.get('LOG_LEVELS')), **(levels or {})}
+    for name, level in levels.items():
+        logging.getLogger(name or None).setLevel(level)
+    if _listener is not None:
+        return
+
+    console = logging.StreamHandler()
+    console.setFormatter(_SuppressedFormatter(FORMAT))
+    handlers = [console]
+    log_file = log_file or os.environ.get('LOG_FILE')
+    if log_file:
+        os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+        sink = logging.handlers.RotatingFileHandler(log_file, maxBytes=LOG_FILE_BYTES,
+                                                    backupCount=LOG_FILE_BACKUPS, encoding='utf-8')
+        sink.setFormatter(JsonFormatter())
+        handlers.append(sink)
+
+    records = queue.Queue(-1)
+    handler = logging.handlers.QueueHandler(records)
+    handler.addFilter(RateLimitFilter())
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)  # kuyrukta kalanlar kapanışta yazılır
@@ -0,0 +1,211 @@
+"""Prometheus metin formatında metrikler (/metrics).
+
+Okuma, yazma ve callback süreleri ölçüldükleri yerde Counter / Gauge / Histogram
+nesnelerine işlenir; kuyruk derinliği, önbellek sayaçları gibi durum değerleri ise
+function= ile verilen fonksiyonlardan sadece /metrics istendiğinde okunur. Ölçüm
+yolu bir kilit ve birkaç toplama işlemidir, metin yalnızca istek geldiğinde üretilir.
+
+    GET /metrics
+
+Ek bağımlılık gerektirmez; prometheus_client ile aynı formatı (0.0.4) üretir.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import Blueprint, Response, g, request
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# saniye; modbus okuması, SQLite commit'i ve Dash callback'i aynı ölçekte
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+metrics_blueprint = Blueprint('metrics', __name__)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metrik zaten tanımlı: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:  # bir fonksiyonun hatası bütün çıktıyı bozmasın
+                lines.append(f'# {metric.name}: {e}')
+                continue
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(f'{name}{labels} {_format_value(value)}' for name, labels, value in samples)
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help, labels=(), function=None, registry=REGISTRY):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        # function: etiketsiz metrikte sayı, etiketlide (etiket değerleri, sayı) çiftleri döndürür
+        self.function = function
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def samples(self):
+        if self.function is not None:
+            result = self.function()
+            items = [((), result)] if not self.labels else result
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        for key, value in items:
+            yield self.name, _format_labels(self.labels, key), value
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        super().__init__(name, help, labels, registry=registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # kova başına (birikimsiz) sayı + son eleman +Inf, toplam
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield f'{self.name}_bucket', _format_labels(self.labels, key, ('le', _format_value(bound))), cumulative
+            labels = _format_labels(self.labels, key)
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, cumulative
+
+
+def register_stats(prefix, stats, counters=()):
+    """Bir stats() sözlüğünü (örn. query_cache.stats) metrik olarak yayınlar.
+
+    counters içindeki anahtarlar <prefix>_<anahtar>_total sayacı, diğerleri gauge olur.
+    """
+    for key in stats():
+        metric = Counter if key in counters else Gauge
+        name = f'{prefix}_{key}_total' if key in counters else f'{prefix}_{key}'
+        metric(name, f'{prefix} {key}', function=lambda key=key: stats()[key])
+
+
+# Dash callback'leri
+
+callback_seconds = Histogram('dash_callback_seconds', "Dash callback isteğinin sunucudaki süresi", ['callback'])
+callback_errors = Counter('dash_callback_errors_total', "Hata ile biten Dash callback istekleri", ['callback'])
+
+
+def callback_label(callback):
+    """Callback fonksiyonunun kısa adı, örn. graphs.update_all"""
+    return f"{callback.__module__.rsplit('.', 1)[-1]}.{callback.__name__}"
+
+
+def _callback_name(app, output):
+    callback = app.callback_map.get(output, {}).get('callback')
+    return output if callback is None else callback_label(callback)
+
+
+def instrument_callbacks(app):
+    """Her Dash callback isteğinin süresini callback fonksiyonunun adıyla kaydeder."""
+    path = app.config.routes_pathname_prefix + '_dash-update-component'
+    names = {}
+
+    @app.server.before_request
+    def _start_timer():
+        if request.path == path:
+            g.callback_started = time.perf_counter()
+
+    @app.server.after_request
+    def _record_callback(response):
+        started = g.pop('callback_started', None)
+        if started is not None:
+            output = (request.get_json(silent=True) or {}).get('output', '?')
+            name = names.get(output)
+            if name is None:
+                name = names[output] = _callback_name(app, output)
+            callback_seconds.observe(time.perf_counter() - started, callback=name)
+            if response.status_code >= 500:
+                callback_errors.inc(callback=name)
+        return response
+
+
+@metrics_blueprint.route('/metrics')
+def metrics():
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
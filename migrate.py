@@ -0,0 +1,125 @@
+"""sensor_data veritabanını güncel şema sürümüne taşır.
+
+v2: eski düzendeki tablo (metin zaman damgası, anahtarsız) yeni tabloya kopyalanır.
+Uygulama çalışırken de çalıştırılabilir: satırlar CHUNK_SIZE'lık parçalar halinde,
+her parça kendi kısa transaction'ında kopyalanır; bu sırada eklenen satırlar son
+adımda kısa bir kilit altında aktarılır ve tablolar yer değiştirir. Yarıda kalırsa
+tekrar çalıştırıldığında kaldığı yerden devam eder.
+v3: özet tablolar (rollups.py) oluşturulur ve ham veriden günlük dilimlerle doldurulur.
+v4: yüzdelik sketch tabloları (sketches.py) aynı şekilde oluşturulup doldurulur.
+
+Kullanım:
+    python migrate.py [sensor_data.db]
+"""
+import sqlite3
+import sys
+import time
+
+from database import (DB_PATH, SCHEMA_VERSION, SENSOR_DATA_INDEXES, create_sensor_data,
+                      schema_version, table_exists, to_epoch_ms)
+from rollups import create_rollup_tables, rebuild_rollups
+from sketches import create_sketch_tables, rebuild_sketches
+
+CHUNK_SIZE = 50000
+NEW_TABLE = 'sensor_data_v2'
+
+
+def _source_columns(conn):
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(sensor_data)')}
+    # Çok eski veritabanlarında average_mV yerine temp sütunu bulunur
+    average_mV = 'average_mV' if 'average_mV' in columns else 'temp' if 'temp' in columns else 'NULL'
+    average_chlorine = 'average_chlorine' if 'average_chlorine' in columns else 'NULL'
+    return f'timestamp, sensor_id, mV, chlorine, {average_mV}, {average_chlorine}'
+
+
+def _progress(conn):
+    conn.execute('CREATE TABLE IF NOT EXISTS schema_migration (last_rowid INTEGER)')
+    row = conn.execute('SELECT last_rowid FROM schema_migration').fetchone()
+    if row is None:
+        conn.execute('INSERT INTO schema_migration VALUES (0)')
+        return 0
+    return row[0]
+
+
+def _copy_chunk(conn, select, last_rowid):
+    rows = conn.execute(select, (last_rowid, CHUNK_SIZE)).fetchall()
+    if not rows:
+        return last_rowid, 0
+    converted = []
+    for rowid, timestamp, sensor_id, *values in rows:
+        if timestamp is None or sensor_id is None:
+            continue
+        converted.append((str(sensor_id), to_epoch_ms(timestamp), *values))
+    conn.executemany(f'''
+        INSERT OR IGNORE INTO {NEW_TABLE} (sensor_id, timestamp, mV, chlorine, average_mV, average_chlorine)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', converted)
+    last_rowid = rows[-1][0]
+    conn.execute('UPDATE schema_migration SET last_rowid = ?', (last_rowid,))
+    return last_rowid, len(rows)
+
+
+def _migrate_v2(conn, verbose):
+    conn.execute('PRAGMA busy_timeout=5000')
+    create_sensor_data(conn, NEW_TABLE)
+    select = f'SELECT rowid, {_source_columns(conn)} FROM sensor_data WHERE rowid > ? ORDER BY rowid LIMIT ?'
+    last_rowid = _progress(conn)
+
+    copied = 0
+    started = time.monotonic()
+    while True:
+        conn.execute('BEGIN')
+        last_rowid, count = _copy_chunk(conn, select, last_rowid)
+        conn.execute('COMMIT')
+        copied += count
+        if verbose and count:
+            print(f"{copied} satır kopyalandı ({time.monotonic() - started:.0f} s)")
+        if count < CHUNK_SIZE:
+            break
+
+    # Son adım: yazarları kısa süre durdurup kalan satırları aktar ve tabloları değiştir
+    conn.execute('BEGIN IMMEDIATE')
+    while True:
+        last_rowid, count = _copy_chunk(conn, select, last_rowid)
+        if count < CHUNK_SIZE:
+            break
+    conn.execute('DROP TABLE sensor_data')
+    conn.execute(f'ALTER TABLE {NEW_TABLE} RENAME TO sensor_data')
+    for index in SENSOR_DATA_INDEXES:
+        conn.execute(index)
+    conn.execute('DROP TABLE schema_migration')
+    conn.execute('PRAGMA user_version = 2')
+    conn.execute('COMMIT')
+
+
+def _migrate_v3(conn, verbose):
+    create_rollup_tables(conn)
+    rebuild_rollups(conn, verbose)
+    conn.execute('PRAGMA user_version = 3')
+
+
+def _migrate_v4(conn, verbose):
+    create_sketch_tables(conn)
+    rebuild_sketches(conn, verbose)
+    conn.execute('PRAGMA user_version = 4')
+
+
+def migrate(path=DB_PATH, verbose=False):
+    conn = sqlite3.connect(path, isolation_level=None)  # transaction'ları elle yönetiyoruz
+    try:
+        if not table_exists(conn, 'sensor_data'):
+            return
+        if schema_version(conn) < 2:
+            _migrate_v2(conn, verbose)
+        if schema_version(conn) < 3:
+            _migrate_v3(conn, verbose)
+        if schema_version(conn) < 4:
+            _migrate_v4(conn, verbose)
+        if verbose:
+            print(f"Taşıma tamamlandı, şema sürümü {SCHEMA_VERSION}")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    migrate(sys.argv[1] if len(sys.argv) > 1 else DB_PATH, verbose=True)
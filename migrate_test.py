@@ -0,0 +1,82 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+import migrate
+from database import SCHEMA_VERSION, initialize_database, schema_version, to_epoch_ms
+from rollups import table_name as rollup_table
+from sketches import table_name as sketch_table
+
+START = datetime(2025, 3, 1, 12, 0, 0)
+
+
+def _legacy_database(path, count):
+    """İlk sürümdeki düzen: metin zaman damgası, anahtarsız tablo, user_version 0."""
+    with sqlite3.connect(path) as conn:
+        conn.execute('''CREATE TABLE sensor_data
+                        (timestamp DATETIME, sensor_id TEXT, mV REAL, chlorine REAL, average_mV REAL, average_chlorine REAL)''')
+        rows = [(str(START + timedelta(seconds=i)), str(1 + i % 2), 1000.0 + i, 0.5, 1000.0, 0.5) for i in range(count)]
+        rows.append(rows[0])  # eski tabloda tekrar eden satır
+        rows.append((None, '1', 1.0, 1.0, None, None))  # zaman damgası olmayan satır atlanır
+        conn.executemany('INSERT INTO sensor_data VALUES (?, ?, ?, ?, ?, ?)', rows)
+    return rows
+
+
+@pytest.mark.parametrize('chunk_size', [50000, 7])
+def test_v1_database_is_migrated_to_current_schema(tmp_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(migrate, 'CHUNK_SIZE', chunk_size)
+    path = str(tmp_path / 'sensor_data.db')
+    _legacy_database(path, 100)
+    initialize_database(path)
+
+    with sqlite3.connect(path) as conn:
+        assert schema_version(conn) == SCHEMA_VERSION
+        assert conn.execute("SELECT name FROM sqlite_master WHERE name IN ('schema_migration', 'sensor_data_v2')"
+                            ).fetchall() == []
+        rows = conn.execute('SELECT sensor_id, timestamp, mV FROM sensor_data ORDER BY timestamp').fetchall()
+        assert len(rows) == 100
+        assert rows[0] == ('1', to_epoch_ms(START), 1000.0)
+        assert rows[-1][1] - rows[0][1] == 99_000
+        # Yeni tablo (sensor_id, timestamp) anahtarıyla kümelenir
+        assert 'WITHOUT ROWID' in conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'sensor_data'").fetchone()[0]
+        assert conn.execute(f'SELECT SUM(mV_n), SUM(mV_sum) FROM {rollup_table("1m")}').fetchone() == (
+            100, sum(1000.0 + i for i in range(100)))
+        assert conn.execute(f"SELECT SUM(n) FROM {sketch_table('1h')} WHERE field = 'chlorine'").fetchone() == (100,)
+
+
+def test_interrupted_copy_resumes(tmp_path, monkeypatch):
+    monkeypatch.setattr(migrate, 'CHUNK_SIZE', 10)
+    path = str(tmp_path / 'sensor_data.db')
+    _legacy_database(path, 35)
+    calls = []
+    copy_chunk = migrate._copy_chunk
+
+    def interrupted(conn, select, last_rowid):
+        calls.append(last_rowid)
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        return copy_chunk(conn, select, last_rowid)
+
+    monkeypatch.setattr(migrate, '_copy_chunk', interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        migrate.migrate(path)
+    monkeypatch.setattr(migrate, '_copy_chunk', copy_chunk)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute('SELECT last_rowid FROM schema_migration').fetchone() == (20,)
+
+    migrate.migrate(path)
+    with sqlite3.connect(path) as conn:
+        assert schema_version(conn) == SCHEMA_VERSION
+        assert conn.execute('SELECT COUNT(*) FROM sensor_data').fetchone() == (35,)
+
+
+def test_current_database_is_left_alone(db_path):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('INSERT INTO sensor_data (timestamp, sensor_id, mV) VALUES (1, ?, 2.0)', ('1',))
+    initialize_database(db_path)
+    migrate.migrate(db_path)
+    with sqlite3.connect(db_path) as conn:
+        assert schema_version(conn) == SCHEMA_VERSION
+        assert conn.execute('SELECT timestamp, sensor_id, mV FROM sensor_data').fetchall() == [(1, '1', 2.0)]
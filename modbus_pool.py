@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from contextlib import suppress
+
+from pymodbus import FramerType
+from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.exceptions import ModbusException
+
+from metrics import Gauge
+
+log = logging.getLogger(__name__)
+
+REQUEST_TIMEOUT = 1.0  # saniye, tek bir istek için üst sınır
+
+
+class ExceptionResponse(Exception):
+    """Cihaz isteğe Modbus exception yanıtı verdi (örn. 0x0B gateway target failed)."""
+
+    def __init__(self, block, response):
+        super().__init__(f"{block}: {response}")
+        self.response = response
+
+
+def _retrieve(task):
+    # İptal edilen istek pymodbus'ta ModbusIOException ile biter; sonucu alınmazsa asyncio
+    # kapanışta "Task exception was never retrieved" yazar
+    if not task.cancelled():
+        task.exception()
+
+
+class GatewayLink:
+    """Bir RS485-TCP gateway'e açılan tek, paylaşılan bağlantı.
+
+    Aynı gateway'e bağlı problar sadece unit_id ile ayrılır. İstekler bir kuyruğa
+    alınır ve tek bir worker tarafından art arda gönderilir; RTU çerçevesinde
+    transaction id olmadığı için hatta aynı anda tek istek bulunabilir.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.client = None
+        self.users = 0
+        self._queue = asyncio.Queue()
+        self._worker = None
+        self._connecting = None
+
+    def __str__(self):
+        return f"{self.host}:{self.port}"
+
+    @property
+    def connected(self):
+        return self.client is not None and self.client.connected
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    async def connect(self):
+        if self.connected:
+            return True
+        # Aynı anda bağlanmaya çalışan sensörler tek bir denemeyi paylaşır
+        if self._connecting is None or self._connecting.done():
+            self._connecting = asyncio.create_task(self._connect())
+        return await asyncio.shield(self._connecting)
+
+    async def _connect(self):
+        if self.client is None:
+            self.client = AsyncModbusTcpClient(
+                host=self.host,
+                port=self.port,
+                framer=FramerType("rtu"),
+                timeout=REQUEST_TIMEOUT,
+                retries=0,
+                reconnect_delay=0  # yeniden bağlanma burada, gateway başına bir kez yapılır
+            )
+        try:
+            return await self.client.connect()
+        except Exception as e:
+            log.warning("Gateway %s bağlantı hatası: %s", self, e)
+            return False
+
+    async def execute(self, method, **kwargs):
+        """İstemci metodunu (örn. read_input_registers) kuyruk sırasıyla çalıştırır."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((method, kwargs, future))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run(), name=f"gateway-{self}")
+        return await future
+
+    async def _run(self):
+        while True:
+            method, kwargs, future = await self._queue.get()
+            if future.done():  # çağıran vazgeçti
+                continue
+            try:
+                if not await self.connect():
+                    raise ConnectionError(f"Gateway {self} bağlanamadı")
+                request = asyncio.ensure_future(getattr(self.client, method)(**kwargs))
+                request.add_done_callback(_retrieve)
+                result = await asyncio.wait_for(request, REQUEST_TIMEOUT)
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def close(self):
+        """Bağlantıyı kapatır; kuyrukta bekleyen istekler ConnectionError ile biter."""
+        if self._connecting is not None:
+            self._connecting.cancel()
+        # Önce istemci kapanır ki hattaki istek iptal beklemeden hata ile bitsin
+        if self.client is not None:
+            self.client.close()
+        while not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(ConnectionError(f"Gateway {self} kapatıldı"))
+        worker, self._worker = self._worker, None
+        if worker is not None:
+            worker.cancel()
+            with suppress(asyncio.CancelledError, ModbusException):
+                await worker
+
+
+class GatewayPool:
+    """(host, port) başına tek GatewayLink tutan havuz."""
+
+    def __init__(self):
+        self._links = {}
+
+    def acquire(self, host, port):
+        key = (host, int(port))
+        link = self._links.get(key)
+        if link is None:
+            link = self._links[key] = GatewayLink(*key)
+        link.users += 1
+        return link
+
+    async def release(self, link):
+        link.users -= 1
+        if link.users <= 0:
+            self._links.pop((link.host, link.port), None)
+            await link.close()
+
+    def links(self):
+        return list(self._links.values())
+
+
+gateway_pool = GatewayPool()
+
+Gauge('modbus_gateway_queue_depth', "Gateway kuyruğunda gönderilmeyi bekleyen istekler", ['gateway'],
+      function=lambda: [((str(link),), link.pending) for link in gateway_pool.links()])
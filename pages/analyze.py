@@ -1,33 +1,25 @@
-import sqlite3
 from datetime import timedelta, datetime
-from itertools import combinations
 
 import dash
 from dash import dcc, html, callback
 from dash.dependencies import Input, Output, State
 import dash_bootstrap_components as dbc
 import plotly.express as px
-import pandas as pd
+import plotly.graph_objs as go
+from plotly.subplots import make_subplots
 import numpy as np
 
-dash.register_page(__name__, path='/analyze')
-
-
-# Initialize databases
-def initialize_database():
-    with sqlite3.connect('sensor_data.db') as conn:
-        c = conn.cursor()
-        c.execute('''CREATE TABLE IF NOT EXISTS sensor_data
-                     (timestamp DATETIME, sensor_id TEXT, mV REAL, chlorine REAL, average_mV REAL, average_chlorine REAL)''')
-        conn.commit()
+from analysis import NUMERIC_COLUMNS, correlation_job
+from database import to_epoch_ms
+from decimation import decimate, point_budget
+from jobs import CANCELLED, DONE, FAILED, QUEUED, analysis_jobs
+from queries import MAX_POINTS
+from query_cache import query_cache
+from sketches import QUANTILES, read_sketches, summarize
 
+dash.register_page(__name__, path='/analyze')
 
-def initialize_calibration_database():
-    with sqlite3.connect('sensor_calibration_data.db') as conn:
-        c = conn.cursor()
-        c.execute('''CREATE TABLE IF NOT EXISTS calibration_data
-                     (sensor_id TEXT, mV REAL, chlorine REAL)''')
-        conn.commit()
+HISTOGRAM_BINS = 100  # çok örnekli dağılım grafiklerinde kutu sayısı
 
 
 # Layout
@@ -75,9 +67,26 @@ layout = dbc.Container([
         dbc.Tab(label="İstatistiksel Analiz", tab_id="tab-statistics"),
         dbc.Tab(label="Zaman Serisi Analizi", tab_id="tab-timeseries"),
     ], id="analyze-tabs", active_tab="tab-correlation"),
-    html.Div(id="analyze-tab-content", className="p-4")
+    dbc.Row([
+        dbc.Col(html.Label("Gecikme analizi (korelasyon)", className="form-label"), width="auto"),
+        dbc.Col(dbc.Select(
+            id='lag-metric',
+            options=[{'label': 'Kapalı', 'value': ''}, {'label': 'mV', 'value': 'mV'},
+                     {'label': 'Klor', 'value': 'chlorine'}],
+            value=''
+        ), md=2)
+    ], align="center", className="mt-3"),
+    html.Div(id="analyze-tab-content", className="p-4"),
+    dcc.Store(id='analyze-graph-width')
 ], fluid=True)
 
+# Nokta bütçesi için tarayıcı penceresinin genişliği
+dash.clientside_callback(
+    "function(tab) { return window.innerWidth; }",
+    Output('analyze-graph-width', 'data'),
+    Input('analyze-tabs', 'active_tab')
+)
+
 
 # Callbacks
 @callback(
@@ -86,9 +95,10 @@ layout = dbc.Container([
     Input('start-time', 'value'),
     Input('end-date', 'date'),
     Input('end-time', 'value'),
-    Input("analyze-tabs", "active_tab")
+    Input("analyze-tabs", "active_tab"),
+    Input("lag-metric", "value")
 )
-def render_tab_content(start_date, start_time, end_date, end_time, active_tab):
+def render_tab_content(start_date, start_time, end_date, end_time, active_tab, lag_metric):
     start_date = start_date.split('T')[0] if start_date else (datetime.now() - timedelta(days=1)).date()
     end_date = end_date.split('T')[0] if end_date else datetime.now().date()
 
@@ -98,83 +108,110 @@ def render_tab_content(start_date, start_time, end_date, end_time, active_tab):
     start_datetime = datetime.strptime(f"{start_date} {start_time}", "%Y-%m-%d %H:%M")
     end_datetime = datetime.strptime(f"{end_date} {end_time}", "%Y-%m-%d %H:%M")
 
-    with sqlite3.connect('sensor_data.db') as conn:
-        query = """
-            SELECT * 
-            FROM sensor_data 
-            WHERE timestamp BETWEEN ? AND ? 
-            ORDER BY timestamp
-        """
-        df = pd.read_sql(query, conn, params=(start_datetime, end_datetime))
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-
+    # Korelasyon ayrı süreçte iş olarak çalışır (jobs.py), sayfa ilerlemeyi izler
+    start_ms, end_ms = to_epoch_ms(start_datetime), to_epoch_ms(end_datetime)
     if active_tab == "tab-correlation":
-        return correlation_analysis(df)
+        return job_view(analysis_jobs.submit(correlation_job, start_ms, end_ms, lag_metric, end_ms=end_ms), active_tab)
     elif active_tab == "tab-statistics":
-        return statistical_analysis(df)
+        # Özet, önceden hesaplanmış kova sketch'leri birleştirilerek bulunur (sketches.py)
+        return statistical_analysis(summarize(start_ms, end_ms))
     elif active_tab == "tab-timeseries":
-        return timeseries_analysis(df)
+        # update_timeseries ile aynı önbellek anahtarı (pencere + çözünürlük): grafik aynı sorguyu kullanır
+        return timeseries_analysis(query_cache.read_range(start_datetime, end_datetime, columns=['mV'],
+                                                          max_points=MAX_POINTS))
     return html.Div("Lütfen bir sekme seçin")
 
 
-def correlation_analysis(df):
-    if df.empty or len(df['sensor_id'].unique()) < 2:
+def job_view(job_id, tab):
+    status = analysis_jobs.status(job_id)
+    if status['state'] == DONE:
+        return JOB_RENDERERS[tab](analysis_jobs.result(job_id))
+    return html.Div([
+        dcc.Store(id='job-info', data={'id': job_id, 'tab': tab}),
+        dbc.Row([
+            dbc.Col(dbc.Progress(id='job-progress', value=0, striped=True, animated=True), width=10),
+            dbc.Col(dbc.Button("İptal", id='job-cancel', color="secondary", size="sm"), width=2)
+        ], align="center", className="mb-3"),
+        html.Div(id='job-result'),
+        dcc.Interval(id='job-poll', interval=500)
+    ])
+
+
+@callback(
+    [Output('job-result', 'children'),
+     Output('job-progress', 'value'),
+     Output('job-progress', 'label'),
+     Output('job-poll', 'disabled')],
+    Input('job-poll', 'n_intervals'),
+    State('job-info', 'data')
+)
+def poll_job(n, job_info):
+    status = analysis_jobs.status(job_info['id'])
+    if status is None:
+        return dbc.Alert("İş bulunamadı, lütfen tekrar deneyin.", color="warning"), 0, "", True
+    percent = 100 * status['done'] / status['total'] if status['total'] else 0
+    if status['state'] == DONE:
+        return JOB_RENDERERS[job_info['tab']](analysis_jobs.result(job_info['id'])), 100, "", True
+    if status['state'] == CANCELLED:
+        return dbc.Alert("Analiz iptal edildi.", color="secondary"), percent, "", True
+    if status['state'] == FAILED:
+        return dbc.Alert(f"Analiz hatası: {status['error']}", color="danger"), percent, "", True
+    label = status['message'] or ("Sırada bekliyor" if status['state'] == QUEUED else "")
+    return dash.no_update, percent, label, False
+
+
+@callback(
+    Output('job-cancel', 'disabled'),
+    Input('job-cancel', 'n_clicks'),
+    State('job-info', 'data'),
+    prevent_initial_call=True
+)
+def cancel_job(n_clicks, job_info):
+    analysis_jobs.cancel(job_info['id'])
+    return True
+
+
+def correlation_analysis(result):
+    if result is None:
         return dbc.Alert("Korelasyon analizi için en az iki sensör gereklidir.", color="warning")
 
-    numeric_cols = ['timestamp', 'mV', 'chlorine', 'average_mV', 'average_chlorine']
-    sensor_groups = df.groupby('sensor_id')
-    sensor_dfs = {sensor_id: group[numeric_cols] for sensor_id, group in sensor_groups}
-
-    corr_data = []
-    for (s1, df1), (s2, df2) in combinations(sensor_dfs.items(), 2):
-        merged = pd.merge_asof(
-            df1.sort_values('timestamp'),
-            df2.sort_values('timestamp'),
-            on='timestamp',
-            direction='nearest',
-            tolerance=pd.Timedelta(seconds=10),
-            suffixes=(f'_{s1}', f'_{s2}')
-        )
-        if merged.empty:
-            continue
-
-        corr_matrix = merged.corr(numeric_only=True)
-        cross_corr = corr_matrix.loc[
-            [col for col in corr_matrix.columns if str(s1) in col],
-            [col for col in corr_matrix.columns if str(s2) in col]
-        ]
-        corr_data.append((cross_corr, f'Sensör {s1} vs {s2}', s1, s2))
-
-    if not corr_data:
+    matrix = result['corr']
+    if matrix.isna().all().all():
         return dbc.Alert("Yeterli veri bulunamadı.", color="warning")
 
-    graphs = []
-    for idx, (matrix, title, s1, s2) in enumerate(corr_data):
-        fig = px.imshow(
-            matrix,
-            x=matrix.columns,
-            y=matrix.index,
-            color_continuous_scale='RdBu',
-            zmin=-1,
-            zmax=1,
-            title=title
-        )
-        fig.update_layout(
-            height=500,
-            xaxis_title=f"Sensör {s2} Özellikleri",
-            yaxis_title=f"Sensör {s1} Özellikleri"
-        )
-        graphs.append(dbc.Col(dcc.Graph(figure=fig), md=6))
-
-    return dbc.Row(graphs)
-
-
-def statistical_analysis(df):
-    if df.empty:
+    # Tüm sensör/sütun çiftleri tek matriste; aynı sensörün sütunları yan yana
+    fig = px.imshow(
+        matrix,
+        x=matrix.columns,
+        y=matrix.index,
+        color_continuous_scale='RdBu',
+        zmin=-1,
+        zmax=1,
+        title=f"Korelasyon ({result['grid_s']:g} s ortak zaman ızgarası)"
+    )
+    fig.update_layout(height=max(500, 20 * len(matrix)))
+    children = [dbc.Col(dcc.Graph(figure=fig), width=12)]
+
+    lags = result['lags']
+    if lags is not None:
+        children.append(dbc.Col(dbc.Card([
+            dbc.CardHeader("Gecikmeli Çapraz Korelasyon (sensör 2, sensör 1'i lag_s saniye geriden izler)"),
+            dbc.CardBody(dash.dash_table.DataTable(
+                data=lags.round({'lag_s': 3, 'corr': 3}).to_dict('records'),
+                columns=[{'name': i, 'id': i} for i in lags.columns],
+                sort_action="native",
+                page_size=15
+            ))
+        ]), width=12))
+    return dbc.Row(children)
+
+
+def statistical_analysis(stats):
+    if stats.empty:
         return dbc.Alert("Veri bulunamadı.", color="warning")
 
-    numeric_cols = ['mV', 'chlorine', 'average_mV', 'average_chlorine']
-    stats = df.groupby('sensor_id')[numeric_cols].describe().stack(0).reset_index()
+    sensor_ids = list(stats['sensor_id'].unique())
+    numeric_cols = NUMERIC_COLUMNS
 
     return dbc.Row([
         dbc.Col([
@@ -193,8 +230,8 @@ def statistical_analysis(df):
                 dbc.CardBody([
                     dcc.Dropdown(
                         id='sensor-selector',
-                        options=[{'label': i, 'value': i} for i in df['sensor_id'].unique()],
-                        value=df['sensor_id'].iloc[0]
+                        options=[{'label': i, 'value': i} for i in sensor_ids],
+                        value=sensor_ids[0]
                     ),
                     dcc.Dropdown(
                         id='metric-selector',
@@ -221,15 +258,31 @@ def update_distribution_plot(sensor, metric, start_date, start_time, end_date, e
     start_datetime = datetime.strptime(f"{start_date} {start_time}", "%Y-%m-%d %H:%M")
     end_datetime = datetime.strptime(f"{end_date} {end_time}", "%Y-%m-%d %H:%M")
 
-    with sqlite3.connect('sensor_data.db') as conn:
-        query = "SELECT * FROM sensor_data WHERE timestamp BETWEEN ? AND ?"
-        df = pd.read_sql(query, conn, params=(start_datetime, end_datetime))
-
-    filtered = df[df['sensor_id'] == sensor]
-    fig = px.histogram(filtered, x=metric, marginal='box', title=f"{sensor} - {metric} Dağılımı")
+    sketch = read_sketches(to_epoch_ms(start_datetime), to_epoch_ms(end_datetime), [sensor]).get((sensor, metric))
+
+    # Ham örnekler yerine sketch kutularından histogram ve kutu istatistikleri çizilir
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.02)
+    if sketch is not None:
+        values, weights = sketch.histogram()
+        counts, edges = np.histogram(values, bins=min(HISTOGRAM_BINS, len(values)), weights=weights)
+        q1, median, q3 = sketch.quantiles(QUANTILES)
+        iqr = q3 - q1
+        fig.add_trace(go.Box(
+            q1=[q1], median=[median], q3=[q3],
+            lowerfence=[max(sketch.min, q1 - 1.5 * iqr)], upperfence=[min(sketch.max, q3 + 1.5 * iqr)],
+            orientation='h', name=metric, showlegend=False
+        ), row=1, col=1)
+        fig.add_trace(go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges), name=metric, showlegend=False
+        ), row=2, col=1)
+    fig.update_layout(title=f"{sensor} - {metric} Dağılımı", bargap=0)
     return fig
 
 
+# İş sonucunu sekme içeriğine çeviren fonksiyonlar
+JOB_RENDERERS = {"tab-correlation": correlation_analysis}
+
+
 def timeseries_analysis(df):
     if df.empty:
         return dbc.Alert("Veri bulunamadı.", color="warning")
@@ -256,16 +309,19 @@ def timeseries_analysis(df):
      Input('start-date', 'date'),
      Input('start-time', 'value'),
      Input('end-date', 'date'),
-     Input('end-time', 'value')]
+     Input('end-time', 'value')],
+    State('analyze-graph-width', 'data')
 )
-def update_timeseries(metric, start_date, start_time, end_date, end_time):
+def update_timeseries(metric, start_date, start_time, end_date, end_time, graph_width):
     start_datetime = datetime.strptime(f"{start_date} {start_time}", "%Y-%m-%d %H:%M")
     end_datetime = datetime.strptime(f"{end_date} {end_time}", "%Y-%m-%d %H:%M")
 
-    with sqlite3.connect('sensor_data.db') as conn:
-        query = "SELECT * FROM sensor_data WHERE timestamp BETWEEN ? AND ?"
-        df = pd.read_sql(query, conn, params=(start_datetime, end_datetime))
+    df = query_cache.read_range(start_datetime, end_datetime, columns=[metric], max_points=MAX_POINTS)
 
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    fig = px.line(df, x='timestamp', y=metric, color='sensor_id', title="Zaman Serisi Analizi")
-    return fig
\ No newline at end of file
+    budget = point_budget(graph_width, mode='minmax')
+    fig = go.Figure()
+    for sensor_id, df_sensor in df.groupby('sensor_id'):
+        x, y = decimate(df_sensor['timestamp'], df_sensor[metric], budget, mode='minmax')
+        fig.add_trace(go.Scatter(x=x, y=y, mode='lines', name=sensor_id))
+    fig.update_layout(title="Zaman Serisi Analizi", xaxis_title='timestamp', yaxis_title=metric, legend_title='sensor_id')
+    return fig
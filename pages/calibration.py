@@ -5,10 +5,15 @@ from dash import html, dcc, callback
 from dash.dependencies import Input, Output, State
 from scipy import stats
 import dash_bootstrap_components as dbc
+from pymodbus.exceptions import ModbusException
 from sensor_class import sensor_list
+from acquisition import acquisition_service
+from modbus_pool import ExceptionResponse
 import sqlite3
 import json
+import logging
 dash.register_page(__name__)
+log = logging.getLogger(__name__)
 
 layout = dbc.Container([
     dbc.Row([
@@ -115,7 +120,7 @@ def calculate_calibration(df):
         r = coefficients.rvalue
 
         regression_line = a * x + b
-        print(a, b, r, regression_line)
+        log.debug("Kalibrasyon: a=%s b=%s r=%s", a, b, r)
         return a, b, r, regression_line
     except:
         return 0, 0, 0, []
@@ -180,7 +185,7 @@ def update_calibration_graph(sensor_id, n_clicks):
         df = pd.DataFrame({'mV': mV_data, 'chlorine': chlorine_data})
         a, b, r,regression_line = calculate_calibration(df)
         sensor = next((s for s in sensor_list if s.sensor_id == sensor_id), None)
-        if sensor is not None:
+        if sensor is not None and hasattr(sensor, 'calibration_a_b'):
             sensor.calibration_a_b(a,b)
 
         try:
@@ -220,15 +225,34 @@ def update_calibration_graph(sensor_id, n_clicks):
             )
     return dash.no_update
 
-@callback([Input('btn-send', 'n_clicks'),
-               Input('calibration-sensor', 'value')])
+@callback(Output('calibration-status', 'children'),
+          [Input('btn-send', 'n_clicks'),
+           Input('calibration-sensor', 'value')])
 def send_calibration(n_clicks, sensor_id):
     sensor_id = sensor_id[-1]
     sensor = next((s for s in sensor_list if s.sensor_id == sensor_id), None)
     ctx = dash.callback_context
-    if "btn-send" in ctx.triggered[0]['prop_id']:
-        print(sensor)
-        sensor.calibration()
+    if not ctx.triggered or "btn-send" not in ctx.triggered[0]['prop_id']:
+        return dash.no_update
+    if sensor is None:
+        return dbc.Alert(f"Sensör {sensor_id} tanımlı değil.", color="warning")
+    if not hasattr(sensor, 'calibration'):
+        return dbc.Alert(f"Sensör {sensor_id} referans sensörü, kalibrasyon gönderilemez.", color="warning")
+    if sensor.a is None or sensor.b is None:
+        return dbc.Alert("Önce 'Hesapla' ile kalibrasyon katsayılarını hesaplayın.", color="warning")
+
+    log.info("Kalibrasyon gönderiliyor: %s", sensor)
+    try:
+        # Modbus istemcisi acquisition servisinin event loop'una ait
+        written = acquisition_service.run(sensor.calibration(), timeout=5)
+    except TimeoutError:
+        log.warning("%s: kalibrasyon zaman aşımı", sensor_id)
+        return dbc.Alert(f"Sensör {sensor_id} yanıt vermedi (zaman aşımı).", color="danger")
+    except (ConnectionError, ExceptionResponse, ModbusException, RuntimeError, ValueError) as e:
+        log.warning("%s: kalibrasyon gönderilemedi: %s", sensor_id, e)
+        return dbc.Alert(f"Kalibrasyon gönderilemedi: {e}", color="danger")
+    return dbc.Alert(f"Sensör {sensor_id} kalibre edildi, cihazdan okunan a={written['cal_a']:.4f}, "
+                     f"b={written['cal_b']:.4f}.", color="success")
 
 @callback(
     [Input("btn-reset-point", "n_clicks"),
@@ -256,5 +280,5 @@ def display_click_data(clickData,n_clicks):
         return dash.no_update
     else:
         clickData = clickData['points'][0]
-    print(clickData)
+    log.debug("Seçilen nokta: %s", clickData)
     return f"x = {clickData['x']}, y = {clickData['y']}"
@@ -1,16 +1,21 @@
-import sqlite3
 from datetime import timedelta, datetime
-import threading
+import json
+import logging
+import math
 import dash
-import pandas as pd
 import plotly.graph_objs as go
 from dash import dash_table
 from dash import dcc, html, callback
 from dash.dependencies import Input, Output, State
 import dash_bootstrap_components as dbc
-from dash.exceptions import PreventUpdate
-from sensor_class import sensor_list
+from acquisition import acquisition_service
+from db_writer import sample_writer
+from decimation import decimate, point_budget
+from export import export_url
+from queries import MAX_POINTS, read_latest
+from query_cache import query_cache
 dash.register_page(__name__, path='/')
+log = logging.getLogger(__name__)
 
 
 layout = dbc.Container([
@@ -73,6 +78,8 @@ layout = dbc.Container([
                                 dbc.Input(
                                     id='read-interval-input',
                                     type='number',
+                                    min=0,
+                                    step='any',
                                     className="numeric-input"
                                 ),
                                 dbc.Button("Güncelle",
@@ -141,8 +148,11 @@ layout = dbc.Container([
             dbc.Row([
                 dbc.Col([
                     dbc.ButtonGroup([
-                        dbc.Button("CSV İndir", id='btn-csv', color="success", className="me-2"),
-                        dbc.Button("Excel İndir", id='btn-excel', color="warning")
+                        # İndirme sunucudaki /export ucundan akış halinde yapılır
+                        dbc.Button("CSV İndir", id='btn-csv', color="success", className="me-2",
+                                   external_link=True),
+                        dbc.Button("Parquet İndir", id='btn-parquet', color="warning",
+                                   external_link=True)
                     ], className="mb-3")
                 ], width=12)
             ]),
@@ -174,22 +184,28 @@ layout = dbc.Container([
     ], className="shadow-sm"),
 
     # Arkaplan Güncelleme Komponentleri
-    dcc.Store(id='read-interval-n', storage_type='local'),
-    dcc.Interval(
-        id='interval-component',
-        interval=1 * 1000,  # 1 second
-        n_intervals=0
-    ),
-    dcc.Interval(
-        id='read-interval-n',
-        interval=500,
-        n_intervals=0
-    ),
-    dcc.Download(id="download-data")
+    # Veri toplama sunucu tarafındaki acquisition servisinde yapılır, sayfa sadece okur.
+    # Canlı modda yeni örnekler /stream'den gelir (assets/live_stream.js)
+    dcc.Store(id='graph-width'),
+    dcc.Store(id='live-cursor'),
+    dcc.Store(id='live-reset'),
+    dcc.Store(id='live-stream'),
 ])],
     )],fluid=True ,className="py-4")
 
-from datetime import datetime
+
+# Nokta bütçesi için tarayıcı penceresinin genişliği
+dash.clientside_callback(
+    "function(mode) { return window.innerWidth; }",
+    Output('graph-width', 'data'),
+    Input('live-mode', 'value')
+)
+
+
+GRAPH_COLUMNS = ['mV', 'chlorine', 'average_mV', "average_chlorine"]
+GRAPH_IDS = ['mV-graph', 'chlorine-graph', 'average_mV-graph', 'chlorine-average-graph']
+LIVE_ROWS = 200  # canlı modda ilk yüklemede okunan satır / tabloda tutulan satır sayısı
+LIVE_MAX_POINTS = 500  # canlı modda iz başına tutulan en fazla nokta
 
 
 @callback(
@@ -198,17 +214,17 @@ from datetime import datetime
      Output('average_mV-graph', 'figure'),
      Output('chlorine-average-graph', 'figure'),
      Output('sensor-table', 'data'),
-     Output('interval-component', 'disabled')],
-    [Input('interval-component', 'n_intervals'),
-     Input('live-mode', 'value'),
+     Output('live-cursor', 'data')],
+    [Input('live-mode', 'value'),
      Input('start-date', 'date'),
      Input('start-time', 'value'),
      Input('end-date', 'date'),
      Input('end-time', 'value'),
-     Input('sensor-selector', 'value')],
-    [State('interval-component', 'disabled')]
+     Input('sensor-selector', 'value'),
+     Input('live-reset', 'data')],
+    [State('graph-width', 'data')]
 )
-def update_all(n, live_mode, start_date, start_time, end_date, end_time, active_sensors, is_disabled):
+def update_all(live_mode, start_date, start_time, end_date, end_time, active_sensors, live_reset, graph_width):
     try:
         # Tarih formatını düzeltme
         start_date = start_date.split('T')[0] if start_date else None
@@ -223,122 +239,99 @@ def update_all(n, live_mode, start_date, start_time, end_date, end_time, active_
         end_datetime = datetime.strptime(f"{end_date} {end_time}", "%Y-%m-%d %H:%M")
 
         # Veritabanı sorgusu
-        with sqlite3.connect('sensor_data.db') as conn:
-            if not active_sensors:
-                df = pd.DataFrame(columns=['timestamp', 'sensor_id', 'mV', 'chlorine', 'average_mV', 'average_chlorine'])
-            elif live_mode == "live":
-                query = f"""
-                    SELECT * FROM sensor_data
-                    WHERE sensor_id IN ({','.join(['?'] * len(active_sensors))})
-                    ORDER BY timestamp DESC
-                    LIMIT 200
-                """
-                df = pd.read_sql(query, conn, params=active_sensors)
-            else:
-                query = f"""
-                    SELECT * FROM sensor_data
-                    WHERE sensor_id IN ({','.join(['?'] * len(active_sensors))})
-                    AND timestamp BETWEEN ? AND ?
-                    ORDER BY timestamp DESC
-                """
-                params = active_sensors + [start_datetime, end_datetime]
-                df = pd.read_sql(query, conn, params=params)
+        if live_mode == "live":
+            # Akış yazıcının high_water'ından devam eder; seçili sensörler uzun süre sessizse
+            # ya da hiç verisi yoksa bile cursor hub geçmişinde kalır (aksi halde sürekli reset)
+            written = sample_writer.high_water
+            df = read_latest(active_sensors, limit=LIVE_ROWS)
+        else:
+            df = query_cache.read_range(start_datetime, end_datetime, active_sensors, descending=True, max_points=MAX_POINTS)
 
-        # Grafikleri oluşturma
+        # Grafikleri oluşturma (izler grafik genişliğine göre seyreltilir)
+        # İz sırası active_sensors sırasıdır; canlı moddaki extendTraces bu sıraya göre ekler
+        budget = point_budget(graph_width)
         figures = []
-        for col, title in zip(['mV', 'chlorine', 'average_mV', "average_chlorine"],
+        for col, title in zip(GRAPH_COLUMNS,
                               ['mV', 'Chlorine', 'Moving Average', 'Chlorine Average']):
             fig = go.Figure()
             for sensor_id in active_sensors:
                 df_sensor = df[df['sensor_id'] == sensor_id]
+                x, y = decimate(df_sensor['timestamp'], df_sensor[col], budget)
                 fig.add_trace(go.Scatter(
-                    x=df_sensor['timestamp'],
-                    y=df_sensor[col],
+                    x=x,
+                    y=y,
                     mode='lines+markers',
                     name=f'Sensor {sensor_id}'
                 ))
             fig.update_layout(title=f'{title} Graph')
             figures.append(fig)
 
-        return (*figures, df.to_dict('records'), live_mode != "live")
+        # Canlı modda bu istemcinin gördüğü en yeni örnek (high-water mark)
+        cursor = ({'high_water': max(written, df.attrs['high_water']), 'rows': len(df)}
+                  if live_mode == "live" else None)
+        return (*figures, df.to_dict('records'), cursor)
 
     except Exception as e:
-        print(f"Hata oluştu: {str(e)}")
-        return [go.Figure()] * 4, [], True
+        log.exception("Grafikler güncellenemedi: %s", e)
+        return (*[go.Figure()] * 4, [], None)
+
+
+# Canlı modda akış bu istemcinin gördüğü en yeni örnekten (cursor) devam eder;
+# cursor None ise (tarih aralığı modu) akış kapatılır
+dash.clientside_callback(
+    f"""function(cursor, sensors, table) {{
+        return window.liveStream.configure(cursor, sensors || [], table || [], {json.dumps({
+            'graphs': GRAPH_IDS, 'columns': GRAPH_COLUMNS, 'maxPoints': LIVE_MAX_POINTS,
+            'maxRows': LIVE_ROWS, 'table': 'sensor-table', 'reset': 'live-reset'})});
+    }}""",
+    Output('live-stream', 'data'),
+    Input('live-cursor', 'data'),
+    [State('sensor-selector', 'value'),
+     State('sensor-table', 'data')]
+)
 
 
 @callback(
-    Output("download-data", "data"),
-    [Input("btn-csv", "n_clicks"),
-     Input("btn-excel", "n_clicks"),
-     Input('start-date', 'date'),
+    [Output('btn-csv', 'href'),
+     Output('btn-parquet', 'href')],
+    [Input('start-date', 'date'),
      Input('start-time', 'value'),
      Input('end-date', 'date'),
-     Input('end-time', 'value')],
-    prevent_initial_call=True
+     Input('end-time', 'value'),
+     Input('sensor-selector', 'value')]
 )
-def download_data(btn_csv, btn_excel, start_date, start_time, end_date, end_time):
+def update_download_links(start_date, start_time, end_date, end_time, active_sensors):
+    # Tarih ve saatleri birleştirme
+    start_date = start_date.split('T')[0] if start_date else datetime.now().strftime('%Y-%m-%d')
+    end_date = end_date.split('T')[0] if end_date else datetime.now().strftime('%Y-%m-%d')
+    start_time = start_time or "00:00"
+    end_time = end_time or "23:59"
     try:
-        # Tetikleyici kontrolü
-        ctx = dash.callback_context
-        if not ctx.triggered:
-            raise PreventUpdate
-
-        # Tarih ve saatleri birleştirme
-        start_date = start_date.split('T')[0] if start_date else datetime.now().strftime('%Y-%m-%d')
-        end_date = end_date.split('T')[0] if end_date else datetime.now().strftime('%Y-%m-%d')
-        start_time = start_time or "00:00"
-        end_time = end_time or "23:59"
-
         start_datetime = datetime.strptime(f"{start_date} {start_time}", "%Y-%m-%d %H:%M")
         end_datetime = datetime.strptime(f"{end_date} {end_time}", "%Y-%m-%d %H:%M")
+    except ValueError as e:
+        log.warning("İndirme bağlantısı hatası: %s", e)
+        return dash.no_update, dash.no_update
 
-        # Veritabanı sorgusu
-        with sqlite3.connect('sensor_data.db') as conn:
-            df = pd.read_sql('''
-                SELECT * FROM sensor_data
-                WHERE timestamp BETWEEN ? AND ?
-                ORDER BY timestamp DESC
-            ''', conn, params=(start_datetime, end_datetime))
-
-        # Dosya formatına göre indirme
-        if 'btn-csv' in ctx.triggered[0]['prop_id']:
-            return dcc.send_data_frame(df.to_csv, "sensor_data.csv", index=False)
-        elif 'btn-excel' in ctx.triggered[0]['prop_id']:
-            return dcc.send_data_frame(df.to_excel, "sensor_data.xlsx", index=False)
-
-    except Exception as e:
-        print(f"İndirme hatası: {str(e)}")
-        return dash.no_update
+    return (export_url('csv', start_datetime, end_datetime, active_sensors or []),
+            export_url('parquet', start_datetime, end_datetime, active_sensors or []))
 
 @callback(
-    [Output('read-interval-output-container', 'children'),
-     Output('read-interval-n', 'interval')],
+    Output('read-interval-output-container', 'children'),
     [Input('read-interval-input', 'value'),
      Input('update-interval', 'n_clicks')],
     prevent_initial_call=True
 )
-def update_interval_settings(interval_value,n_clicks):
-    """Update interval display and actual interval timing"""
+def update_interval_settings(interval_value, n_clicks):
+    """Update the acquisition service's default read period (saniye)"""
     ctx = dash.callback_context
-    if 'update-interval' in ctx.triggered[0]['prop_id']:
-        interval_ms = int(interval_value)
-        status_text = f"Veri okuma aralığı: {interval_value} ms"
-        return status_text, interval_ms
-    else:
+    if 'update-interval' not in ctx.triggered[0]['prop_id'] or interval_value in (None, ''):
         return dash.no_update
-
-@callback([Input('read-interval-n', 'n_intervals')],
-    [State('read-interval-n', 'interval'),
-     State('sensor-selector', 'value')]
-)
-def collect_data(n_interval, n, active_sensors):
-    if n is None or n == 0:
-        return dash.no_update
-    print("trig",sensor_list,n_interval)
-    # Collect data only from active sensors
     try:
-        for sensor in sensor_list:
-            sensor.generate_sensor_data()
-    except Exception as e:
-        print(e)
+        period = float(interval_value)
+    except (TypeError, ValueError):
+        period = math.nan
+    if not math.isfinite(period) or period <= 0:
+        return f"Geçersiz okuma aralığı: {interval_value} (pozitif bir saniye değeri girin)"
+    acquisition_service.set_default_period(period)
+    return f"Veri okuma aralığı: {period:g} s"
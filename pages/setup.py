@@ -1,14 +1,20 @@
 import json
+import logging
+import time
 
 import dash
 import dash_bootstrap_components as dbc
 from dash import html, dcc, callback
 from dash.dependencies import Input, Output, State
 
+from acquisition import acquisition_service
+from adaptive import AdaptiveRate
 from functions import load_sensors_from_file, save_sensors_to_file, check_connection
+from health import CONNECTED, DEGRADED, OPEN
 from sensor_class import Sensor, sensor_list, ReferanceSensor
 
 dash.register_page(__name__)
+log = logging.getLogger(__name__)
 
 
 # Layout'u fonksiyon olarak tanımla (HER SAYFA YÜKLENİŞİNDE TAZELENSİN)
@@ -25,6 +31,9 @@ def layout():
                     dbc.Col(dbc.Input(id="ip-input", placeholder="IP Adresi", type="text")),
                     dbc.Col(dbc.Input(id="port-input", placeholder="Port", type="text")),
                     dbc.Col(dbc.Input(id="id-input", placeholder="Sensör ID", type="text")),
+                    dbc.Col(dbc.Input(id="period-input", placeholder="Okuma Aralığı (ms)", type="number")),
+                    dbc.Col(dbc.Input(id="max-period-input", placeholder="En Uzun Aralık (ms)", type="number")),
+                    dbc.Col(dbc.Input(id="deadband-input", placeholder="Ölü Bant", type="number")),
                     dbc.Col( dbc.Select(
                         id='sensor-type',
                         options=[{'label': "Sensor", 'value': "Sensor"},
@@ -34,7 +43,8 @@ def layout():
                         className="me-2 mb-2"
                     ),),
                     dbc.Col(dbc.Button("Sensör Ekle", id="add-sensor-btn", color="primary"))
-                ])
+                ]),
+                dbc.Checkbox(id="deadband-filter", label="Ölü bant içinde kalan örnekleri kaydetme", value=False)
             ])
         ], className="mb-4"),
 
@@ -43,6 +53,11 @@ def layout():
             dbc.Col([
                 html.H4("Aktif Sensörler"),
                 html.Div(id="sensor-list", children=show_sensors())  # show_sensors() her yüklemede çağrılacak
+            ], width=6),
+            dbc.Col([
+                html.H4("Bağlantı Durumu"),
+                html.Div(id="device-health", children=show_device_health()),
+                dcc.Interval(id="device-health-interval", interval=2000)
             ], width=6)
         ])
     ])
@@ -56,6 +71,9 @@ def show_sensors():
             dbc.CardBody([
                 html.H5(f"Sensör ID: {s['id']}"),
                 html.P(f"IP: {s['ip']}:{s['port']}"),
+                html.P(f"Okuma Aralığı: {s['period']} ms" if s.get('period') else "Okuma Aralığı: varsayılan"),
+                html.P(f"Uyarlamalı: ölü bant {s['deadband']}, en uzun {s.get('max_period') or '-'} ms"
+                       f"{', filtreli' if s.get('deadband_filter') else ''}") if s.get('deadband') is not None else None,
                 html.P(f"Durum: {s['status']}",
                        className="text-success" if s['status'] == "aktif" else "text-danger"),
                 dbc.Button("Sil", id={"type": "delete-btn", "index": s['id']}, color="danger")
@@ -65,6 +83,35 @@ def show_sensors():
     ]
 
 
+HEALTH_COLORS = {CONNECTED: "success", DEGRADED: "warning", OPEN: "danger"}
+
+
+# Acquisition servisindeki canlı bağlantı durumu (health.py)
+def show_device_health():
+    rows = []
+    for state in acquisition_service.device_states():
+        detail = state['last_error'] or ""
+        if state['next_retry'] is not None:
+            detail += f" (yeniden deneme {max(state['next_retry'] - time.time(), 0):.0f} s, deneme {state['attempts']})"
+        rows.append(html.Tr([
+            html.Td(state['device']),
+            html.Td(dbc.Badge(state['state'], color=HEALTH_COLORS.get(state['state'], "secondary"))),
+            html.Td(detail if state['state'] != CONNECTED else "")
+        ]))
+    if not rows:
+        return html.P("Sensör yok")
+    return dbc.Table([html.Thead(html.Tr([html.Th("Sensör"), html.Th("Durum"), html.Th("Ayrıntı")])),
+                      html.Tbody(rows)], size="sm")
+
+
+@callback(
+    Output("device-health", "children"),
+    Input("device-health-interval", "n_intervals")
+)
+def update_device_health(n):
+    return show_device_health()
+
+
 @callback(
     [Output("sensor-store", "data", allow_duplicate=True),
      Output("sensor-list", "children")],
@@ -73,10 +120,15 @@ def show_sensors():
     [State("ip-input", "value"),
      State("port-input", "value"),
      State("id-input", "value"),
+     State("period-input", "value"),
+     State("max-period-input", "value"),
+     State("deadband-input", "value"),
+     State("deadband-filter", "value"),
      State("sensor-type", "value")],
     prevent_initial_call=True
 )
-def handle_sensor_actions(add_clicks, delete_clicks, ip, port, sensor_id, sensor_type):
+def handle_sensor_actions(add_clicks, delete_clicks, ip, port, sensor_id, period, max_period, deadband,
+                          deadband_filter, sensor_type):
     ctx = dash.callback_context
     trigger = ctx.triggered[0]["prop_id"].split(".")[0]
 
@@ -97,18 +149,19 @@ def handle_sensor_actions(add_clicks, delete_clicks, ip, port, sensor_id, sensor
             "ip": ip,
             "port": port,
             "sensor-type": sensor_type,
+            "period": int(period) if period else None,
+            "max_period": int(max_period) if max_period else None,
+            "deadband": float(deadband) if deadband is not None else None,
+            "deadband_filter": bool(deadband_filter),
             "status": "aktif" if is_active else "pasif"
         }
         sensors.append(new_sensor)
-        if sensor_type == "Referance":
-            sensor_list.append(ReferanceSensor(new_sensor["id"], new_sensor["ip"], new_sensor["port"]))
-        else:
-            sensor_list.append(Sensor(new_sensor["id"], new_sensor["ip"], new_sensor["port"]))
+        sensor_list.append(build_sensor(new_sensor))
         save_sensors_to_file(sensors)
 
     elif "delete-btn" in trigger:
         deleted_id = json.loads(trigger).get("index")
-        print([s for s in sensor_list if s.sensor_id == deleted_id])
+        log.info("Sensör silindi: %s", deleted_id)
         sensor_list.remove([s for s in sensor_list if s.sensor_id == deleted_id][0])
         sensors = [s for s in sensors if s["id"] != deleted_id]
         save_sensors_to_file(sensors)
@@ -117,18 +170,29 @@ def handle_sensor_actions(add_clicks, delete_clicks, ip, port, sensor_id, sensor
     return sensors, show_sensors()
 
 
+# sensors.json kaydından sensör nesnesi oluştur
+def build_sensor(s):
+    # Okuma aralığı dosyada ms olarak tutulur, servis saniye ile çalışır
+    period = s["period"] / 1000 if s.get("period") else None
+    if s["sensor-type"] in ("Referance", "ReferanceSensor"):
+        # Aynı ADAM modülündeki referanslar "address"/"channel" ile ayrılır
+        new_sensor = ReferanceSensor(s["id"], s["ip"], int(s["port"]), period=period,
+                                     address=int(s.get("address", 1)), channel=int(s.get("channel", 0)))
+    else:
+        new_sensor = Sensor(s["id"], s["ip"], int(s["port"]), period=period, model=s.get("model"))
+    if s.get("deadband") is not None:
+        # Sinyal sakinken okuma aralığı max_period'a kadar uzar (adaptive.py)
+        max_period = s["max_period"] / 1000 if s.get("max_period") else None
+        new_sensor.adaptive = AdaptiveRate(s["deadband"], max_period, filter_samples=bool(s.get("deadband_filter")))
+    new_sensor.status = s["status"]
+    return new_sensor
+
+
 # Uygulama başlangıcında sensörleri yükle
 def initialize_connections():
     sensors = load_sensors_from_file()
     for s in sensors:
         if not any(sensor.sensor_id == s["id"] for sensor in sensor_list):
-            if s["sensor-type"] == "Referance":
-                new_sensor = ReferanceSensor(s["id"], s["ip"], s["port"])
-                new_sensor.status = s["status"]
-                sensor_list.append(new_sensor)
-            else:
-                new_sensor = Sensor(s["id"], s["ip"], s["port"])
-                new_sensor.status = s["status"]
-                sensor_list.append(new_sensor)
+            sensor_list.append(build_sensor(s))
 
 initialize_connections()
\ No newline at end of file
@@ -0,0 +1,322 @@
+"""Sayfa callback'leri için isteğe bağlı, örneklemeli profil (PROFILE_CALLBACKS=1).
+
+Açıkken pages paketindeki her callback sarılır. Çalışan callback'in thread'i bir örnekleyici
+thread tarafından INTERVAL aralıkla yoklanır (sys._current_frames) ve her örnek yığındaki
+en dıştaki tanınan modüle göre bir aşamaya yazılır:
+
+    query      queries, query_cache, rollups, sketches, archive, jobs (SQLite / arşiv okuma)
+    dataframe  pandas, numpy, scipy, decimation
+    figure     plotly figürleri ve Dash bileşenleri
+    serialize  Dash'in yanıtı JSON'a çevirmesi
+    other      callback'in kendi kodu ve geri kalanı
+
+Aşama süreleri toplam sürenin örnek oranıyla bulunur; INTERVAL'dan kısa callback'lerde
+örnek olmayabilir. Yanıtın (JSON) boyutu da kaydedilir. Son HISTORY çağrı /debug/profile
+sayfasında en yavaştan başlayarak listelenir.
+
+Ortam değişkenleri:
+    PROFILE_CALLBACKS=1         profili açar (kapalıyken hiçbir şey sarılmaz)
+    PROFILE_SAMPLE=0.2          profillenen çağrı oranı
+    PROFILE_INTERVAL_MS=1       örnekleme aralığı
+    PROFILE_DUMP=cprofile       her profillenen çağrının cProfile dökümü (.prof) de tutulur;
+                                pyinstrument kuruluysa PROFILE_DUMP=pyinstrument HTML rapor verir.
+                                Döküm alınan çağrı yavaşlar, aşama süreleri buna göre okunmalı.
+"""
+import cProfile
+import html
+import io
+import itertools
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+from dash import _callback
+from flask import Blueprint, Response, abort, jsonify, request
+
+from metrics import callback_label
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:  # pyinstrument yoksa sadece cProfile dökümü alınabilir
+    PyinstrumentProfiler = None
+
+HISTORY = 200  # saklanan son çağrı
+INTERVAL = 0.001  # saniye
+SAMPLE = 1.0
+REPORT_LINES = 40  # cProfile raporunda gösterilen fonksiyon
+
+# (aşama, modül önekleri); yığında dıştan içe ilk eşleşen modül aşamayı belirler
+PHASES = (
+    ('query', ('queries', 'query_cache', 'rollups', 'sketches', 'archive', 'database', 'jobs', 'sqlite3',
+               'pyarrow')),
+    ('serialize', ('dash._utils', 'plotly.io._json', 'json', 'orjson')),
+    ('figure', ('plotly', 'dash.development', 'dash.html', 'dash.dcc', 'dash.dash_table',
+                'dash_bootstrap_components')),
+    ('dataframe', ('pandas', 'numpy', 'scipy', 'decimation')),
+)
+PHASE_NAMES = [name for name, _ in PHASES] + ['other']
+
+profile_blueprint = Blueprint('profile', __name__)
+_module_phases = {}  # modül adı -> aşama ('' tanınmıyor)
+
+
+def _phase_of(module):
+    phase = _module_phases.get(module)
+    if phase is None:
+        phase = ''
+        for name, prefixes in PHASES:
+            if any(module == prefix or module.startswith(prefix + '.') for prefix in prefixes):
+                phase = name
+                break
+        _module_phases[module] = phase
+    return phase
+
+
+class Invocation:
+    _ids = itertools.count(1)
+
+    def __init__(self, name):
+        self.id = next(self._ids)
+        self.name = name
+        self.started = time.time()
+        self.total = 0.0  # saniye
+        self.samples = dict.fromkeys(PHASE_NAMES, 0)
+        self.payload = 0  # JSON yanıt, bayt
+        self.error = None
+        self.report = None  # metin (cProfile) ya da HTML (pyinstrument)
+        self.dump = None  # .prof (marshal edilmiş pstats)
+        self.thread_id = threading.get_ident()
+
+    def sample(self, frame, stop_code):
+        # Sarmalayıcıya kadar yığını topla, sonra dıştan içe ilk tanınan modülü bul
+        stack = []
+        while frame is not None and frame.f_code is not stop_code:
+            stack.append(frame.f_globals.get('__name__', ''))
+            frame = frame.f_back
+        phase = 'other'
+        for module in reversed(stack):
+            found = _phase_of(module)
+            if found:
+                phase = found
+                break
+        self.samples[phase] += 1
+
+    def phases(self):
+        """Aşama -> ms; örnek yoksa boş."""
+        count = sum(self.samples.values())
+        if not count:
+            return {}
+        return {name: self.total * 1000 * n / count for name, n in self.samples.items() if n}
+
+    def as_dict(self):
+        return {'id': self.id, 'callback': self.name, 'started': self.started,
+                'total_ms': self.total * 1000, 'phases_ms': self.phases(),
+                'samples': sum(self.samples.values()), 'payload_bytes': self.payload,
+                'error': self.error, 'dump': self.report is not None}
+
+
+class Sampler:
+    """Çalışan callback'lerin thread'lerini INTERVAL aralıkla yoklayan tek thread."""
+
+    def __init__(self, interval=INTERVAL):
+        self.interval = interval
+        self._active = {}  # thread id -> Invocation
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def add(self, invocation):
+        with self._lock:
+            self._active[invocation.thread_id] = invocation
+            self._wake.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+
+    def remove(self, invocation):
+        with self._lock:
+            self._active.pop(invocation.thread_id, None)
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._active.values())
+                if not active:
+                    self._wake.clear()  # çalışan callback yokken uyu
+                    continue
+            frames = sys._current_frames()
+            for invocation in active:
+                frame = frames.get(invocation.thread_id)
+                if frame is not None:
+                    invocation.sample(frame, _call.__code__)
+
+
+class CallbackProfiler:
+    def __init__(self, sample=SAMPLE, interval=INTERVAL, dump=None, history=HISTORY):
+        if dump == 'pyinstrument' and PyinstrumentProfiler is None:
+            raise RuntimeError("PROFILE_DUMP=pyinstrument için pyinstrument kurulu olmalı")
+        if dump not in (None, 'cprofile', 'pyinstrument'):
+            raise ValueError(f"Bilinmeyen PROFILE_DUMP: {dump}")
+        self.sample = sample
+        self.dump = dump
+        self.sampler = Sampler(interval)
+        self.history = deque(maxlen=history)
+        self._cprofile = threading.Lock()  # aynı anda tek cProfile
+
+    def wrap(self, callback):
+        name = callback_label(callback)
+
+        @wraps(callback)
+        def profiled(*args, **kwargs):
+            if self.sample < 1 and random.random() >= self.sample:
+                return callback(*args, **kwargs)
+            return self._profile(name, callback, args, kwargs)
+
+        profiled.profiled = True
+        return profiled
+
+    def _profile(self, name, callback, args, kwargs):
+        invocation = Invocation(name)
+        dumper = self._dumper()
+        self.sampler.add(invocation)
+        started = time.perf_counter()
+        try:
+            result = _call(callback, args, kwargs, dumper)
+            if isinstance(result, (str, bytes)):
+                invocation.payload = len(result)
+            return result
+        except BaseException as e:  # PreventUpdate dahil, kaydedilip tekrar fırlatılır
+            invocation.error = type(e).__name__
+            raise
+        finally:
+            invocation.total = time.perf_counter() - started
+            self.sampler.remove(invocation)
+            if dumper is not None:
+                self._finish_dump(invocation, dumper)
+            self.history.append(invocation)
+
+    def _dumper(self):
+        if self.dump == 'pyinstrument':
+            return PyinstrumentProfiler(interval=self.sampler.interval, async_mode='disabled')
+        if self.dump == 'cprofile' and self._cprofile.acquire(blocking=False):
+            return cProfile.Profile()
+        return None
+
+    def _finish_dump(self, invocation, dumper):
+        if isinstance(dumper, cProfile.Profile):
+            try:
+                dumper.create_stats()
+                invocation.dump = marshal.dumps(dumper.stats)
+                out = io.StringIO()
+                pstats.Stats(dumper, stream=out).sort_stats('cumulative').print_stats(REPORT_LINES)
+                invocation.report = out.getvalue()
+            finally:
+                self._cprofile.release()
+        else:
+            invocation.report = dumper.output_html()
+
+    def slowest(self, limit=50, name=None):
+        invocations = [inv for inv in list(self.history) if name is None or inv.name == name]
+        return sorted(invocations, key=lambda inv: inv.total, reverse=True)[:limit]
+
+    def find(self, invocation_id):
+        return next((inv for inv in list(self.history) if inv.id == invocation_id), None)
+
+
+def _call(callback, args, kwargs, dumper):
+    # Örnekleyici yığını bu çerçeveye kadar yürür; callback'in kendisi ve Dash'in
+    # serileştirmesi bunun içinde kalır
+    if dumper is None:
+        return callback(*args, **kwargs)
+    if isinstance(dumper, cProfile.Profile):
+        return dumper.runcall(callback, *args, **kwargs)
+    dumper.start()
+    try:
+        return callback(*args, **kwargs)
+    finally:
+        dumper.stop()
+
+
+profiler = None  # install_profiler ile oluşturulur
+
+
+def install_profiler(app):
+    """PROFILE_CALLBACKS açıksa pages callback'lerini sarar ve /debug/profile'ı ekler."""
+    global profiler
+    if os.environ.get('PROFILE_CALLBACKS', '').lower() not in ('1', 'true', 'yes'):
+        return None
+    profiler = CallbackProfiler(
+        sample=float(os.environ.get('PROFILE_SAMPLE', SAMPLE)),
+        interval=float(os.environ.get('PROFILE_INTERVAL_MS', INTERVAL * 1000)) / 1000,
+        dump=os.environ.get('PROFILE_DUMP') or None)
+    # Dash kayıtları ilk istekte GLOBAL_CALLBACK_MAP'ten app.callback_map'e taşır (aynı sözlükler)
+    for entry in [*_callback.GLOBAL_CALLBACK_MAP.values(), *app.callback_map.values()]:
+        callback = entry.get('callback')
+        if callback is None or getattr(callback, 'profiled', False):
+            continue
+        if 'pages' in callback.__module__.split('.'):
+            entry['callback'] = profiler.wrap(callback)
+    app.server.register_blueprint(profile_blueprint)
+    return profiler
+
+
+# /debug/profile
+
+def _cell(value):
+    return f'<td>{html.escape(str(value))}</td>'
+
+
+@profile_blueprint.route('/debug/profile')
+def profile_list():
+    if profiler is None:
+        abort(404)
+    limit = request.args.get('limit', 50, type=int)
+    invocations = profiler.slowest(limit, request.args.get('callback'))
+    if request.args.get('format') == 'json':
+        return jsonify([inv.as_dict() for inv in invocations])
+
+    rows = []
+    for inv in invocations:
+        phases = inv.phases()
+        link = f'<a href="/debug/profile/{inv.id}">döküm</a>' if inv.report is not None else ''
+        rows.append('<tr>' + _cell(time.strftime('%H:%M:%S', time.localtime(inv.started))) + _cell(inv.name)
+                    + _cell(f'{inv.total * 1000:.1f}')
+                    + ''.join(_cell(f'{phases[name]:.1f}' if name in phases else '') for name in PHASE_NAMES)
+                    + _cell(f'{inv.payload / 1024:.1f}') + _cell(sum(inv.samples.values()))
+                    + _cell(inv.error or '') + f'<td>{link}</td></tr>')
+    header = ''.join(f'<th>{name}</th>' for name in
+                     ['zaman', 'callback', 'toplam ms', *[f'{name} ms' for name in PHASE_NAMES], 'yanıt KB',
+                      'örnek', 'hata', ''])
+    body = (f'<h3>En yavaş {len(invocations)} callback (son {profiler.history.maxlen} çağrı)</h3>'
+            f'<table border="1" cellpadding="4" style="border-collapse:collapse;font-family:monospace">'
+            f'<tr>{header}</tr>{"".join(rows)}</table>')
+    return f'<html><head><title>Callback profili</title></head><body>{body}</body></html>'
+
+
+@profile_blueprint.route('/debug/profile/<int:invocation_id>')
+def profile_report(invocation_id):
+    invocation = profiler.find(invocation_id) if profiler is not None else None
+    if invocation is None or invocation.report is None:
+        abort(404)
+    if invocation.dump is None:  # pyinstrument HTML raporu
+        return invocation.report
+    return (f'<html><body><p>{html.escape(invocation.name)}, {invocation.total * 1000:.1f} ms '
+            f'(<a href="/debug/profile/{invocation.id}.prof">.prof indir</a>, snakeviz / pstats ile açılır)</p>'
+            f'<pre>{html.escape(invocation.report)}</pre></body></html>')
+
+
+@profile_blueprint.route('/debug/profile/<int:invocation_id>.prof')
+def profile_dump(invocation_id):
+    invocation = profiler.find(invocation_id) if profiler is not None else None
+    if invocation is None or invocation.dump is None:
+        abort(404)
+    return Response(invocation.dump, mimetype='application/octet-stream', headers={
+        'Content-Disposition': f'attachment; filename=callback_{invocation.id}.prof'})
@@ -0,0 +1,123 @@
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from archive import manifest_for, read_archive
+from database import DB_PATH, from_epoch_ms, to_epoch_ms
+from rollups import choose_resolution, read_rollup
+
+COLUMNS = ['timestamp', 'sensor_id', 'mV', 'chlorine', 'average_mV', 'average_chlorine']
+MAX_POINTS = 2000  # tarih aralığı grafiklerinde iz başına hedef nokta sayısı
+CHUNK_SIZE = 10000  # iter_range ile okunan satır grubu
+
+
+def select_columns(columns):
+    columns = columns or COLUMNS
+    # timestamp ve sensor_id her zaman gerekli (grafik/gruplama)
+    return ['timestamp', 'sensor_id'] + [c for c in columns if c in COLUMNS and c not in ('timestamp', 'sensor_id')]
+
+
+def _in_clause(sensor_ids):
+    return f"sensor_id IN ({','.join(['?'] * len(sensor_ids))})"
+
+
+def _frame(rows, columns):
+    df = pd.DataFrame(rows, columns=columns)
+    # Canlı akışın (/stream) devam noktası için en yeni örnek (epoch ms, datetime'a çevirmeden önce)
+    df.attrs['high_water'] = int(df['timestamp'].max()) if len(df) else 0
+    df['timestamp'] = from_epoch_ms(df['timestamp'])
+    return df
+
+
+def read_latest(sensor_ids, limit=200, columns=None, path=DB_PATH):
+    """Seçilen sensörlerin en yeni `limit` satırını (yeniden eskiye) döndürür."""
+    columns = select_columns(columns)
+    if not sensor_ids:
+        return _frame([], columns)
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute(f'''
+            SELECT {', '.join(columns)} FROM sensor_data
+            WHERE {_in_clause(sensor_ids)}
+            ORDER BY timestamp DESC
+            LIMIT ?
+        ''', (*sensor_ids, limit)).fetchall()
+    return _frame(rows, columns)
+
+
+def read_range(start, end, sensor_ids=None, columns=None, descending=False, max_points=None, path=DB_PATH):
+    """[start, end] aralığındaki satırları döndürür; sensor_ids None ise tüm sensörler.
+
+    max_points verilirse ve aralık yeterince uzunsa ham veri yerine, iz başına yaklaşık
+    max_points nokta veren en kaba özet tablo okunur (sütunlar kova ortalaması olur,
+    ayrıca <sütun>_min / <sütun>_max eklenir).
+    """
+    columns = select_columns(columns)
+    if sensor_ids is not None and not sensor_ids:
+        return _frame([], columns)
+    start_ms, end_ms = to_epoch_ms(start), to_epoch_ms(end)
+    resolution = choose_resolution(start_ms, end_ms, max_points) if max_points else None
+
+    with sqlite3.connect(path) as conn:
+        if resolution is not None:
+            rows, names = read_rollup(conn, resolution, start_ms, end_ms, sensor_ids, columns[2:], descending)
+            return _frame(rows, names)
+
+        rows = conn.execute(*_range_query(start_ms, end_ms, sensor_ids, columns, descending)).fetchall()
+    return _frame(with_archive(rows, start_ms, end_ms, sensor_ids, columns, descending, path), columns)
+
+
+def with_archive(rows, start_ms, end_ms, sensor_ids, columns, descending=False, path=DB_PATH):
+    """SQLite satırlarına aralıktaki arşiv (archive.py) satırlarını ekler; DataFrame döndürür."""
+    df = pd.DataFrame(rows, columns=columns)
+    cold = read_archive(start_ms, end_ms, sensor_ids, columns, path)
+    if cold.empty:
+        return df
+    if df.empty:
+        return cold.iloc[::-1].reset_index(drop=True) if descending else cold
+    df = pd.concat([cold, df], ignore_index=True)
+    if df['timestamp'].min() < cold['timestamp'].max():
+        # Arşivleme sırasında aynı satır kısa süre iki tarafta da bulunabilir
+        df = df.drop_duplicates(['sensor_id', 'timestamp'], keep='last')
+    return df.sort_values('timestamp', ascending=not descending, kind='stable', ignore_index=True)
+
+
+def iter_range(start, end, sensor_ids=None, columns=None, chunk_size=CHUNK_SIZE, path=DB_PATH):
+    """Aralıktaki ham satırları (timestamp epoch ms) chunk_size'lık listeler halinde üretir.
+
+    Tüm aralık belleğe alınmaz; dışa aktarma gibi uzun aralıklar için. Arşivdeki
+    (daha eski) satırlar önce, gün dosyası başına okunarak gelir.
+    """
+    columns = select_columns(columns)
+    if sensor_ids is not None and not sensor_ids:
+        return
+    start_ms, end_ms = to_epoch_ms(start), to_epoch_ms(end)
+    archived = manifest_for(path).select(start_ms, end_ms, sensor_ids)
+    for name in archived:
+        meta = manifest_for(path).files[name]
+        cold = read_archive(max(start_ms, meta['min']), min(end_ms, meta['max']), sensor_ids, columns, path)
+        # NaN yerine None: SQLite satırlarıyla aynı biçim
+        cold = cold.astype(object).where(cold.notna(), None)
+        for i in range(0, len(cold), chunk_size):
+            yield list(cold.iloc[i:i + chunk_size].itertuples(index=False, name=None))
+    with closing(sqlite3.connect(path)) as conn:
+        cursor = conn.execute(*_range_query(start_ms, end_ms, sensor_ids, columns))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+
+def _range_query(start_ms, end_ms, sensor_ids, columns, descending=False):
+    where = 'timestamp BETWEEN ? AND ?'
+    params = [start_ms, end_ms]
+    if sensor_ids is not None:
+        where = f'{_in_clause(sensor_ids)} AND {where}'
+        params = list(sensor_ids) + params
+    sql = f'''
+        SELECT {', '.join(columns)} FROM sensor_data
+        WHERE {where}
+        ORDER BY timestamp {'DESC' if descending else 'ASC'}
+    '''
+    return sql, params
@@ -0,0 +1,126 @@
+"""Tarih aralığı sorguları için sayfalar arasında paylaşılan DataFrame önbelleği.
+
+Her pencere (başlangıç, bitiş, çözünürlük) için tüm sensörler ve sütunlar tek sorguyla
+okunup bir kez DataFrame'e çevrilir; sensör/sütun seçimi bu DataFrame'den süzülür.
+Böylece analiz sayfasındaki callback'ler ve grafik sayfası aynı pencere için
+SQLite'a tekrar gitmez.
+
+Geçerlilik SampleWriter.high_water (yazılmış en yeni örnek) ile kontrol edilir: pencere
+okunduğunda yazılmış veriden yeterince eskiyse (SETTLE_MS) sonuç değişmez; değilse
+high_water değişene kadar geçerlidir. Bellek MAX_BYTES ile sınırlıdır, en uzun süredir
+kullanılmayan girdi önce çıkarılır (LRU).
+"""
+import threading
+from collections import OrderedDict
+
+from database import to_epoch_ms
+from db_writer import sample_writer
+from queries import COLUMNS, read_range, select_columns
+from rollups import choose_resolution
+
+MAX_BYTES = 256 * 1024 * 1024
+# Kuyrukta bekleyen örnekler high_water'dan en fazla bu kadar eski olabilir
+SETTLE_MS = 5000
+
+
+class _Entry:
+    def __init__(self, df, high_water, end_ms):
+        self.df = df
+        self.high_water = high_water
+        self.end_ms = end_ms
+        self.nbytes = int(df.memory_usage(deep=True).sum())
+
+
+class QueryCache:
+    def __init__(self, max_bytes=MAX_BYTES, writer=sample_writer):
+        self.max_bytes = max_bytes
+        self.writer = writer
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'entries': len(self._entries), 'bytes': self.nbytes}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def read_range(self, start, end, sensor_ids=None, columns=None, descending=False, max_points=None):
+        """queries.read_range ile aynı sonucu önbellekten döndürür."""
+        columns = select_columns(columns)
+        if sensor_ids is not None and not sensor_ids:
+            return read_range(start, end, sensor_ids, columns)
+        start_ms, end_ms = to_epoch_ms(start), to_epoch_ms(end)
+        resolution = choose_resolution(start_ms, end_ms, max_points) if max_points else None
+        key = (start_ms, end_ms, resolution)
+
+        df = self._get(key, start_ms, end_ms, max_points)
+        df = self._select(df, sensor_ids, columns, resolution)
+        return df.iloc[::-1] if descending else df
+
+    def _valid(self, entry):
+        return entry.end_ms <= entry.high_water - SETTLE_MS or entry.high_water == self.writer.high_water
+
+    def _get(self, key, start_ms, end_ms, max_points):
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and not self._valid(entry):
+                    self._remove(key)
+                    entry = None
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.df
+                loading = self._loading.get(key)
+                if loading is None:
+                    # Aynı pencere için eşzamanlı callback'ler tek sorguyu bekler
+                    loading = self._loading[key] = threading.Event()
+                    self.misses += 1
+                    break
+            loading.wait()
+
+        try:
+            high_water = self.writer.high_water  # sorgudan önce: sonradan yazılanlar daha yeni sayılır
+            df = read_range(start_ms, end_ms, columns=COLUMNS, max_points=max_points)
+            with self._lock:
+                self._store(key, _Entry(df, high_water, end_ms))
+            return df
+        finally:
+            with self._lock:
+                del self._loading[key]
+            loading.set()
+
+    def _store(self, key, entry):
+        if key in self._entries:
+            self._remove(key)
+        if entry.nbytes > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self.nbytes += entry.nbytes
+        while self.nbytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        self.nbytes -= self._entries.pop(key).nbytes
+
+    @staticmethod
+    def _select(df, sensor_ids, columns, resolution):
+        if resolution is not None:
+            # Özet tablolarda her sütunun yanında <sütun>_min / <sütun>_max bulunur
+            columns = columns[:2] + [f'{c}{suffix}' for c in columns[2:] for suffix in ('', '_min', '_max')]
+        if sensor_ids is not None:
+            df = df[df['sensor_id'].isin(sensor_ids)]
+        return df[columns]
+
+
+query_cache = QueryCache()
@@ -0,0 +1,84 @@
+import sqlite3
+
+import pytest
+
+from conftest import insert_rows
+from query_cache import SETTLE_MS, QueryCache
+from queries import read_range
+from rollups import rebuild_rollups
+
+
+class FakeWriter:
+    def __init__(self, high_water):
+        self.high_water = high_water
+
+
+START = 1_700_000_000_000
+
+
+@pytest.fixture
+def rows(project_db):
+    rows = [(START + 1000 * i, sensor, 1000.0 + i, 1.0, None, None) for i in range(600) for sensor in ('1', '2')]
+    insert_rows(project_db, rows)
+    return rows
+
+
+def test_second_read_is_a_hit_and_matches_query(rows):
+    cache = QueryCache(writer=FakeWriter(START + 600_000))
+    first = cache.read_range(START, START + 300_000, ['1'], ['mV'])
+    second = cache.read_range(START, START + 300_000, ['2'], ['mV', 'chlorine'])
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+    expected = read_range(START, START + 300_000, ['1'], ['mV'])
+    assert first.reset_index(drop=True).equals(expected)
+    assert list(second.columns) == ['timestamp', 'sensor_id', 'mV', 'chlorine']
+    assert set(second['sensor_id']) == {'2'}
+    descending = cache.read_range(START, START + 300_000, ['1'], ['mV'], descending=True)
+    assert descending['timestamp'].is_monotonic_decreasing
+
+
+def test_recent_window_is_invalidated_by_new_writes(rows, project_db):
+    writer = FakeWriter(START + 599_000)
+    cache = QueryCache(writer=writer)
+    end = START + 700_000  # yazılmış veriden yeni: high_water değişince geçersiz
+    assert len(cache.read_range(START, end, ['1'])) == 600
+
+    insert_rows(project_db, [(START + 600_000, '1', 1.0, 1.0, None, None)])
+    assert len(cache.read_range(START, end, ['1'])) == 600  # high_water değişmedi
+    writer.high_water = START + 600_000
+    assert len(cache.read_range(START, end, ['1'])) == 601
+    assert cache.stats()['misses'] == 2
+
+
+def test_settled_window_stays_valid(rows):
+    writer = FakeWriter(START + 600_000)
+    cache = QueryCache(writer=writer)
+    end = START + 600_000 - SETTLE_MS
+    cache.read_range(START, end)
+    writer.high_water += 60_000
+    cache.read_range(START, end)
+    assert cache.stats()['hits'] == 1
+
+
+def test_lru_eviction_by_bytes(rows):
+    cache = QueryCache(writer=FakeWriter(START + 600_000))
+    cache.read_range(START, START + 100_000)
+    one_entry = cache.stats()['bytes']
+    cache.max_bytes = int(one_entry * 2.5)
+    cache.read_range(START, START + 100_001)
+    cache.read_range(START, START + 100_000)  # en son kullanılan
+    cache.read_range(START, START + 100_002)
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and stats['entries'] == 2
+    cache.read_range(START, START + 100_000)
+    assert cache.stats()['hits'] == 2
+
+
+def test_rollup_window_selects_min_max_columns(rows, project_db):
+    with sqlite3.connect(project_db) as conn:
+        rebuild_rollups(conn)
+    cache = QueryCache(writer=FakeWriter(START + 600_000))
+    df = cache.read_range(START, START + 599_000, ['1'], ['mV'], max_points=20)
+    assert list(df.columns) == ['timestamp', 'sensor_id', 'mV', 'mV_min', 'mV_max']
+    assert len(df) == 60  # 10 s kovalar
+    assert df['mV_min'].iloc[0] == 1000.0 and df['mV_max'].iloc[0] == 1009.0
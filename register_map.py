@@ -0,0 +1,121 @@
+"""Sensör modellerinin Modbus register haritaları ve okuma planlayıcısı.
+
+Her model için hangi değerin hangi adreste, hangi tipte durduğu tanımlanır. Planlayıcı
+bu register'ları mümkün olan en az sayıda istekte okunacak bloklara birleştirir: iki
+register arasındaki boşluk MAX_GAP'ten küçükse ayrı istek yerine boşluk da okunur
+(RTU hattında her istek yaklaşık 10 register'lık ek yük getirir). Nadiren değişen
+register'lar (every > 1) sadece her `every` okumada bir istenir; every=None olanlar
+(kalibrasyon katsayıları) periyodik okunmaz, sadece adıyla istendiğinde okunur.
+"""
+from pymodbus.client import ModbusTcpClient
+
+MAX_GAP = 10  # bu kadar register'lık boşluk ayrı istekten ucuz
+MAX_COUNT = 125  # Modbus tek istekte en fazla 125 register okur
+
+DATATYPE = ModbusTcpClient.DATATYPE
+DATA_TYPES = {
+    'int16': DATATYPE.INT16,
+    'uint16': DATATYPE.UINT16,
+    'int32': DATATYPE.INT32,
+    'uint32': DATATYPE.UINT32,
+    'float32': DATATYPE.FLOAT32,
+    'float64': DATATYPE.FLOAT64,
+}
+READ_METHODS = {
+    'input': 'read_input_registers',
+    'holding': 'read_holding_registers',
+}
+
+
+class Register:
+    def __init__(self, address, data_type='float32', word_order='big', scale=1.0, table='input', every=1):
+        self.address = address
+        self.data_type = data_type
+        self.word_order = word_order
+        self.scale = scale
+        self.table = table
+        self.every = every  # kaç okumada bir okunacağı; None ise sadece istendiğinde
+        self.count = DATA_TYPES[data_type].value[1]  # register (word) sayısı
+
+    @property
+    def end(self):
+        return self.address + self.count
+
+    def decode(self, registers):
+        value = ModbusTcpClient.convert_from_registers(
+            registers, data_type=DATA_TYPES[self.data_type], word_order=self.word_order)
+        return value * self.scale if self.scale != 1.0 else value
+
+
+REGISTER_MAPS = {
+    'chlorine_probe': {
+        'cal': Register(0),  # kalibre edilmiş değer
+        'raw': Register(12),  # ham mV
+        # Kalibrasyon katsayıları: Sensor.calibration yazar ve geri okuyarak doğrular
+        'cal_a': Register(25, 'float64', table='holding', every=None),
+        'cal_b': Register(30, 'float64', table='holding', every=None),
+    },
+}
+DEFAULT_MODEL = 'chlorine_probe'
+
+
+class Block:
+    """Tek istekte okunan ardışık register aralığı."""
+
+    def __init__(self, table, address, count, every, fields):
+        self.table = table
+        self.address = address
+        self.count = count
+        self.every = every
+        self.fields = fields  # (ad, Register) çiftleri
+
+    @property
+    def method(self):
+        return READ_METHODS[self.table]
+
+    def decode(self, registers):
+        return {name: reg.decode(registers[reg.address - self.address:reg.end - self.address])
+                for name, reg in self.fields}
+
+    def __repr__(self):
+        return f"Block({self.table}, {self.address}, {self.count}, every={self.every})"
+
+
+def plan_reads(register_map, names=None, max_gap=MAX_GAP, max_count=MAX_COUNT):
+    """İstenen register'ları (varsayılan: periyodik okunanlar) en az sayıda bloğa birleştirir.
+
+    Hızlı bir bloğa yakın düşen yavaş register'lar ayrı istek açmak yerine o bloğa
+    eklenir; blok, içindeki en sık okunması gereken register kadar sık okunur.
+    """
+    if names is None:
+        names = [name for name, reg in register_map.items() if reg.every is not None]
+    fields = [(name, register_map[name]) for name in names]
+    fields.sort(key=lambda item: (item[1].table, item[1].address))
+
+    blocks = []
+    for name, reg in fields:
+        last = blocks[-1] if blocks else None
+        if (last is not None and last.table == reg.table
+                and reg.address - (last.address + last.count) <= max_gap
+                and reg.end - last.address <= max_count):
+            last.count = max(last.count, reg.end - last.address)
+            last.every = min(filter(None, (last.every, reg.every)), default=None)
+            last.fields.append((name, reg))
+        else:
+            blocks.append(Block(reg.table, reg.address, reg.count, reg.every, [(name, reg)]))
+    return blocks
+
+
+class RegisterPlan:
+    """Bir sensörün okuma planı; her okumada sırası gelen blokları verir."""
+
+    def __init__(self, model=None, names=None):
+        self.model = model or DEFAULT_MODEL
+        self.blocks = plan_reads(REGISTER_MAPS[self.model], names)
+        self.values = {}  # son okunan değerler (yavaş register'lar burada kalır)
+        self._polls = 0
+
+    def due(self):
+        blocks = [block for block in self.blocks if self._polls % block.every == 0]
+        self._polls += 1
+        return blocks
@@ -0,0 +1,56 @@
+import pytest
+from pymodbus.client import ModbusTcpClient
+
+from register_map import DATA_TYPES, MAX_GAP, REGISTER_MAPS, Register, RegisterPlan, plan_reads
+
+
+def test_chlorine_probe_polls_one_input_block():
+    plan = RegisterPlan()
+    assert [(block.table, block.address, block.count, block.every) for block in plan.blocks] == [('input', 0, 14, 1)]
+    # Kalibrasyon katsayıları periyodik plana girmez, adıyla istenince okunur
+    calibration = plan_reads(REGISTER_MAPS['chlorine_probe'], ('cal_a', 'cal_b'))
+    assert [(block.table, block.address, block.count) for block in calibration] == [('holding', 25, 9)]
+
+
+def test_plan_merges_small_gaps_only():
+    register_map = {
+        'a': Register(0),
+        'b': Register(2 + MAX_GAP),  # boşluk tam MAX_GAP: birleşir
+        'c': Register(4 + 2 * MAX_GAP + 1),  # boşluk MAX_GAP + 1: ayrı istek
+        'd': Register(3, table='holding'),
+    }
+    blocks = plan_reads(register_map)
+    assert [(block.table, block.address, block.count) for block in blocks] == [
+        ('holding', 3, 2), ('input', 0, 4 + MAX_GAP), ('input', 4 + 2 * MAX_GAP + 1, 2)]
+    assert [name for name, _ in blocks[1].fields] == ['a', 'b']
+
+
+def test_plan_respects_max_count_and_every():
+    register_map = {
+        'fast': Register(0, every=1),
+        'slow': Register(4, every=10),
+        'far': Register(6, 'float64', every=10),
+    }
+    blocks = plan_reads(register_map, max_count=8)
+    assert [(block.address, block.count, block.every) for block in blocks] == [(0, 6, 1), (6, 4, 10)]
+
+
+def test_plan_due_schedule():
+    plan = RegisterPlan()
+    plan.blocks = plan_reads({'fast': Register(0), 'slow': Register(40, every=3)})
+    due = [[block.address for block in plan.due()] for _ in range(7)]
+    assert due == [[0, 40], [0], [0], [0, 40], [0], [0], [0, 40]]
+
+
+@pytest.mark.parametrize('data_type, word_order, value', [
+    ('float32', 'big', 812.5),
+    ('float64', 'little', -0.0123456789),
+    ('int16', 'big', -12),
+    ('uint32', 'big', 70000),
+])
+def test_register_decode_roundtrip(data_type, word_order, value):
+    register = Register(0, data_type, word_order=word_order)
+    registers = ModbusTcpClient.convert_to_registers(value, DATA_TYPES[data_type], word_order=word_order)
+    assert len(registers) == register.count
+    assert register.decode(registers) == pytest.approx(value)
+    assert Register(0, data_type, word_order=word_order, scale=0.5).decode(registers) == pytest.approx(value / 2)
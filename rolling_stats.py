@@ -0,0 +1,127 @@
+import bisect
+import math
+import sqlite3
+from collections import deque
+
+import pandas as pd
+
+from archive import manifest_for, read_archive
+from database import DB_PATH
+
+WINDOW_SIZE = 100  # hareketli ortalama için son örnek sayısı
+RESYNC_EVERY = 10000  # kayan nokta hatası birikmesin diye toplamlar bu aralıkla yeniden hesaplanır
+
+
+class RollingWindow:
+    """Son `size` örnek üzerinde O(1) güncellenen ortalama/varyans.
+
+    İsteğe bağlı olarak üstel hareketli ortalama (ema_alpha) ve medyan
+    (track_median, pencere sıralı tutulur) da hesaplanır.
+    """
+
+    def __init__(self, size=WINDOW_SIZE, ema_alpha=None, track_median=False):
+        self.size = size
+        self.ema_alpha = ema_alpha
+        self.values = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.ema = None
+        self._sorted = [] if track_median else None
+        self._adds = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, value):
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return self
+        value = float(value)
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+        if self._sorted is not None:
+            bisect.insort(self._sorted, value)
+
+        if len(self.values) > self.size:
+            old = self.values.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+            if self._sorted is not None:
+                del self._sorted[bisect.bisect_left(self._sorted, old)]
+
+        if self.ema_alpha is not None:
+            self.ema = value if self.ema is None else self.ema_alpha * value + (1 - self.ema_alpha) * self.ema
+
+        self._adds += 1
+        if self._adds % RESYNC_EVERY == 0:
+            self.total = math.fsum(self.values)
+            self.total_sq = math.fsum(v * v for v in self.values)
+        return self
+
+    def extend(self, values):
+        for value in values:
+            self.add(value)
+        return self
+
+    @property
+    def mean(self):
+        return self.total / len(self.values) if self.values else None
+
+    @property
+    def variance(self):
+        n = len(self.values)
+        if n < 2:
+            return 0.0
+        mean = self.total / n
+        return max(self.total_sq / n - mean * mean, 0.0)
+
+    @property
+    def median(self):
+        if not self._sorted:
+            return None
+        n = len(self._sorted)
+        mid = n // 2
+        return self._sorted[mid] if n % 2 else (self._sorted[mid - 1] + self._sorted[mid]) / 2
+
+
+def load_history(sensor_id, columns, limit=WINDOW_SIZE, path=DB_PATH):
+    """Bir sensörün son `limit` örneğini eskiden yeniye sütun listeleri olarak döndürür.
+
+    SQLite'taki satırlar yetmezse (eski veri archive.py ile taşınmışsa) eksik kısım
+    arşivin en yeni dosyalarından tamamlanır.
+    """
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute(f'''
+            SELECT timestamp, {', '.join(columns)} FROM sensor_data
+            WHERE sensor_id = ?
+            ORDER BY timestamp DESC
+            LIMIT ?
+        ''', (sensor_id, limit)).fetchall()
+    rows.reverse()
+    if len(rows) < limit:
+        before = rows[0][0] if rows else None
+        rows = _archived_history(sensor_id, columns, limit - len(rows), before, path) + rows
+    return {column: [row[i + 1] for row in rows] for i, column in enumerate(columns)}
+
+
+def _archived_history(sensor_id, columns, limit, before, path):
+    """Arşivdeki, before'dan (epoch ms) eski son `limit` satır; en yeni dosyadan geriye okunur."""
+    files = manifest_for(path).refresh()
+    names = sorted((name for name, meta in files.items() if sensor_id in meta['sensors']),
+                   key=lambda name: files[name]['max'], reverse=True)
+    frames = []
+    found = 0
+    for name in names:
+        meta = files[name]
+        end_ms = meta['max'] if before is None else min(meta['max'], before - 1)
+        if end_ms < meta['min']:
+            continue
+        df = read_archive(meta['min'], end_ms, [sensor_id], ['timestamp', *columns], path)
+        frames.append(df)
+        found += len(df)
+        if found >= limit:
+            break
+    if not frames:
+        return []
+    df = pd.concat(frames[::-1], ignore_index=True).tail(limit)
+    return list(df.itertuples(index=False, name=None))
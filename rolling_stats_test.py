@@ -0,0 +1,56 @@
+import math
+import time
+
+import numpy as np
+import pytest
+
+from archive import DAY_MS, archive_old_data
+from conftest import insert_rows
+from rolling_stats import RollingWindow, load_history
+
+
+def test_rolling_window_matches_numpy():
+    rng = np.random.default_rng(1)
+    values = rng.normal(1000, 50, 1000)
+    window = RollingWindow(size=100, ema_alpha=0.1, track_median=True)
+    ema = None
+    for value in values:
+        window.add(value)
+        ema = value if ema is None else 0.1 * value + 0.9 * ema
+
+    last = values[-100:]
+    assert len(window) == 100
+    assert window.mean == pytest.approx(last.mean())
+    assert window.variance == pytest.approx(last.var())
+    assert window.median == pytest.approx(np.median(last))
+    assert window.ema == pytest.approx(ema)
+
+
+def test_rolling_window_skips_missing_values():
+    window = RollingWindow(size=3).extend([1.0, None, math.nan, 2.0, 3.0, 4.0])
+    assert list(window.values) == [2.0, 3.0, 4.0]
+    assert window.mean == pytest.approx(3.0)
+    assert RollingWindow().mean is None
+    assert RollingWindow().variance == 0.0
+
+
+def test_load_history_returns_oldest_first(db_path):
+    insert_rows(db_path, [(1000 * i, '1', float(i), i / 10, None, None) for i in range(150)])
+    insert_rows(db_path, [(1000 * i, '2', -1.0, None, None, None) for i in range(5)])
+
+    history = load_history('1', ('mV', 'chlorine'), limit=100, path=db_path)
+    assert history['mV'] == [float(i) for i in range(50, 150)]
+    assert history['chlorine'][-1] == pytest.approx(14.9)
+
+
+def test_load_history_continues_into_archive(db_path):
+    old = int(time.time() * 1000) - 40 * DAY_MS
+    old -= old % DAY_MS
+    recent = int(time.time() * 1000) - 60_000
+    insert_rows(db_path, [(old + 1000 * i, '1', float(i), None, None, None) for i in range(80)])
+    insert_rows(db_path, [(recent + 1000 * i, '1', 1000.0 + i, None, None, None) for i in range(30)])
+    assert archive_old_data(path=db_path) == 80
+
+    history = load_history('1', ('mV',), limit=100, path=db_path)['mV']
+    assert history == [float(i) for i in range(10, 80)] + [1000.0 + i for i in range(30)]
+    assert load_history('2', ('mV',), path=db_path) == {'mV': []}
@@ -0,0 +1,138 @@
+"""Uzun aralık grafikleri için sensör başına 10 s / 1 dk / 1 sa özet tabloları.
+
+Her kova için sütun başına min, max, toplam ve sayı tutulur (ortalama = toplam / sayı).
+Tablolar SampleWriter her batch'i yazarken aynı transaction içinde güncellenir.
+"""
+import sqlite3
+
+from database import DB_PATH
+
+RESOLUTIONS = {  # tablo eki -> kova genişliği (ms), inceden kabaya
+    '10s': 10_000,
+    '1m': 60_000,
+    '1h': 3_600_000,
+}
+VALUE_COLUMNS = ('mV', 'chlorine', 'average_mV', 'average_chlorine')
+REBUILD_CHUNK = 24 * 3_600_000  # yeniden hesaplama bir günlük dilimlerle yapılır
+
+_AGGREGATES = [(column, suffix) for column in VALUE_COLUMNS for suffix in ('min', 'max', 'sum', 'n')]
+_FIELDS = [f'{column}_{suffix}' for column, suffix in _AGGREGATES]
+
+
+def table_name(resolution):
+    return f'sensor_data_{resolution}'
+
+
+def create_rollup_tables(conn):
+    fields = ', '.join(f'{field} {"INTEGER" if field.endswith("_n") else "REAL"}' for field in _FIELDS)
+    for resolution in RESOLUTIONS:
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table_name(resolution)}
+            (sensor_id TEXT NOT NULL, bucket INTEGER NOT NULL, {fields},
+             PRIMARY KEY (sensor_id, bucket)) WITHOUT ROWID
+        ''')
+
+
+def _merge_sql(resolution):
+    # Var olan kovayla birleştir; NULL (o sütunda veri yok) tarafı yok sayılır
+    updates = []
+    for column, suffix in _AGGREGATES:
+        field = f'{column}_{suffix}'
+        if suffix in ('min', 'max'):
+            updates.append(f'{field} = {suffix}(coalesce({field}, excluded.{field}), coalesce(excluded.{field}, {field}))')
+        else:
+            updates.append(f'{field} = coalesce({field}, 0) + coalesce(excluded.{field}, 0)')
+    return f'''
+        INSERT INTO {table_name(resolution)} (sensor_id, bucket, {', '.join(_FIELDS)})
+        VALUES ({', '.join(['?'] * (len(_FIELDS) + 2))})
+        ON CONFLICT (sensor_id, bucket) DO UPDATE SET {', '.join(updates)}
+    '''
+
+
+def update_rollups(conn, rows):
+    """Yeni yazılan ham satırları (timestamp, sensor_id, mV, ...) özet tablolara ekler."""
+    for resolution, width in RESOLUTIONS.items():
+        buckets = {}
+        for timestamp, sensor_id, *values in rows:
+            key = (sensor_id, timestamp - timestamp % width)
+            agg = buckets.get(key)
+            if agg is None:
+                agg = buckets[key] = [None, None, 0.0, 0] * len(VALUE_COLUMNS)
+            for i, value in enumerate(values):
+                if value is None:
+                    continue
+                j = i * 4
+                agg[j] = value if agg[j] is None else min(agg[j], value)
+                agg[j + 1] = value if agg[j + 1] is None else max(agg[j + 1], value)
+                agg[j + 2] += value
+                agg[j + 3] += 1
+        conn.executemany(_merge_sql(resolution), [(*key, *agg) for key, agg in buckets.items()])
+
+
+def rebuild_rollups(conn, verbose=False):
+    """Özet tabloları SQLite'taki ham veriden, günlük dilimlerle yeniden hesaplar."""
+    first, last = conn.execute('SELECT MIN(timestamp), MAX(timestamp) FROM sensor_data').fetchone()
+    if first is None:
+        return
+    # Arşive taşınmış (archive.py) günlerin kovaları korunur
+    for resolution in RESOLUTIONS:
+        conn.execute(f'DELETE FROM {table_name(resolution)} WHERE bucket >= ?', (first - first % REBUILD_CHUNK,))
+    selects = ', '.join(
+        f'{"total" if suffix == "sum" else "count" if suffix == "n" else suffix}({column})'
+        for column, suffix in _AGGREGATES
+    )
+    # Dilim sınırları tüm çözünürlüklerin katı olduğundan kovalar dilimler arasında bölünmez
+    start = first - first % REBUILD_CHUNK
+    while start <= last:
+        end = start + REBUILD_CHUNK
+        for resolution, width in RESOLUTIONS.items():
+            conn.execute(f'''
+                INSERT INTO {table_name(resolution)} (sensor_id, bucket, {', '.join(_FIELDS)})
+                SELECT sensor_id, timestamp - timestamp % {width}, {selects}
+                FROM sensor_data
+                WHERE timestamp >= ? AND timestamp < ?
+                GROUP BY sensor_id, timestamp - timestamp % {width}
+            ''', (start, end))
+        conn.commit()
+        if verbose:
+            print(f"Özet tablolar: {start} - {end} tamamlandı")
+        start = end
+
+
+def choose_resolution(start_ms, end_ms, max_points):
+    """Aralıkta yaklaşık max_points nokta verecek en kaba çözünürlük; yoksa None (ham veri).
+
+    Çözünürlükler arasındaki adım 6x ve üzeri olduğundan hedefin yarısına kadar inilir,
+    aksi halde 1920 nokta veren 1 dk yerine 11520 nokta veren 10 s seçilirdi.
+    """
+    chosen = None
+    for resolution, width in RESOLUTIONS.items():
+        if (end_ms - start_ms) / width >= max_points / 2:
+            chosen = resolution
+    return chosen
+
+
+def read_rollup(conn, resolution, start_ms, end_ms, sensor_ids, columns, descending=False):
+    """Kova başlangıç zamanı ve sütun başına ortalama/min/max içeren satırlar döndürür."""
+    fields = []
+    names = ['timestamp', 'sensor_id']
+    for column in columns:
+        fields += [f'{column}_sum / nullif({column}_n, 0)', f'{column}_min', f'{column}_max']
+        names += [column, f'{column}_min', f'{column}_max']
+    where = 'bucket BETWEEN ? AND ?'
+    params = [start_ms - start_ms % RESOLUTIONS[resolution], end_ms]
+    if sensor_ids is not None:
+        where = f"sensor_id IN ({','.join(['?'] * len(sensor_ids))}) AND {where}"
+        params = list(sensor_ids) + params
+    rows = conn.execute(f'''
+        SELECT bucket, sensor_id, {', '.join(fields)} FROM {table_name(resolution)}
+        WHERE {where}
+        ORDER BY bucket {'DESC' if descending else 'ASC'}
+    ''', params).fetchall()
+    return rows, names
+
+
+if __name__ == '__main__':
+    with sqlite3.connect(DB_PATH) as conn:
+        create_rollup_tables(conn)
+        rebuild_rollups(conn, verbose=True)
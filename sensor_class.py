@@ -1,169 +1,215 @@
-import socket
-import sqlite3
+import asyncio
+import logging
+import math
 from datetime import datetime
-from time import sleep
 
-import pandas as pd
-from pymodbus import FramerType
-from pymodbus.client import ModbusTcpClient
+from pymodbus.client import AsyncModbusTcpClient
+
+from adam_client import adam_pool
+from db_writer import sample_writer
+from health import DeviceHealth, read_errors
+from modbus_pool import ExceptionResponse, gateway_pool
+from register_map import DATA_TYPES, REGISTER_MAPS, RegisterPlan, plan_reads
+from rolling_stats import RollingWindow, load_history
+
+log = logging.getLogger(__name__)
 
 
 class Sensor:
-    def __init__(self, sensor_id, host, port, unit_id=1):
+    def __init__(self, sensor_id, host, port, unit_id=1, period=None, model=None):
         self.unit_id = unit_id  # Modbus slave unit ID
+        self.register_plan = RegisterPlan(model)  # model None ise DEFAULT_MODEL
         self.sensor_id = str(sensor_id)
+        self.period = period  # saniye, None ise servis varsayılanı kullanılır
         self.c_mv = []
         self.c_chlorine = []
         self.host = host
         self.port = port
-        self.client = ModbusTcpClient(
-            host=host,
-            port=port,
-            framer= FramerType("rtu")
-        )
-        self.connect()
+        # Aynı gateway'deki sensörler tek bağlantıyı paylaşır; bağlantı acquisition
+        # servisinin loop'unda connect() içinde havuzdan alınır
+        self.link = None
+        self.connection = False
+        self.stats = {'mV': RollingWindow(), 'chlorine': RollingWindow()}
+        self.adaptive = None  # AdaptiveRate, sensors.json'da deadband verilmişse
+        self.health = DeviceHealth(self.sensor_id, self.reconnect)
+        self.a = self.b = None  # kalibrasyon sayfasında hesaplanan katsayılar
 
     def __str__(self):
         return f"{self.sensor_id, self.host, self.port}"
 
-    def connect(self):
-        try:
-            a = self.client.connect()
-            self.connection = a
-            print(self.connection)
-            return a
-        except Exception as e:
-            print(e)
-            self.connection = False
+    async def connect(self):
+        if self.link is None:
+            self.link = gateway_pool.acquire(self.host, self.port)
+        a = await self.link.connect()
+        self.connection = a
+        log.debug("%s: gateway %s:%s bağlantı %s", self.sensor_id, self.host, self.port, a)
+        return a
+
+    async def reconnect(self):
+        # Devre açıkken arka planda çağrılır: bağlantı ve probun kendisi yanıt vermeli
+        if not await self.connect():
             return False
-
-
-    def read_registers(self):
-        DATATYPE = self.client.DATATYPE
-        response = self.client.read_input_registers(address=0, count=50, slave=self.unit_id)
-        sensor_voltage_cal = self.client.convert_from_registers(response.registers[0:2], data_type=DATATYPE.FLOAT32, word_order='big')
-        sensor_voltage_raw = self.client.convert_from_registers(response.registers[12:14], data_type=DATATYPE.FLOAT32, word_order='big')
-        #print(response_cal,sensor_voltage_cal)
-
-        return sensor_voltage_raw, sensor_voltage_cal
+        await self.read_registers()
+        return True
+
+    async def close(self):
+        self.health.close()
+        link, self.link = self.link, None
+        self.connection = False
+        if link is not None:
+            await gateway_pool.release(link)
+
+    async def read_registers(self):
+        # Sadece haritadaki register'lar, planlayıcının birleştirdiği bloklarla okunur
+        values = self.register_plan.values
+        for block in self.register_plan.due():
+            response = await self.link.execute(block.method, address=block.address, count=block.count, slave=self.unit_id)
+            if response.isError():
+                if block.every == 1:
+                    # Ölçüm register'ları okunamadı: okuma başarısız sayılır (devre kesici, metrik)
+                    raise ExceptionResponse(block, response)
+                # Yavaş register'lar (every > 1) okunamazsa ölçüm yine kaydedilir
+                log.warning("%s: %s okunamadı: %s", self.sensor_id, block, response)
+                read_errors.inc(sensor=self.sensor_id, kind='exception')
+                continue
+            values.update(block.decode(response.registers))
+
+        return values['raw'], values['cal']
 
     def calibration_a_b(self,a,b):
         self.a = a
         self.b = b
 
-    def calibration(self):
-        DATATYPE = self.client.DATATYPE
-        a_registers = self.client.convert_to_registers(self.a,DATATYPE.FLOAT64, word_order='big')
-        b_registers = self.client.convert_to_registers(self.b, DATATYPE.FLOAT64, word_order='big')
+    async def calibration(self):
+        if (self.link is None or not self.link.connected) and not await self.connect():
+            raise ConnectionError(f"Gateway {self.host}:{self.port} bağlanamadı")
+        register_map = REGISTER_MAPS[self.register_plan.model]
         # Write calibration parameters
-        self.client.write_registers(address=25, values=a_registers, slave=self.unit_id)
-        sleep(0.01)
-        self.client.write_registers(address=30, values=b_registers, slave=self.unit_id)
-        print("Calibre edildi")
-
-    def generate_sensor_data(self):
-        if self.connection:
-            try:
-                mV, chlorine = self.read_registers()
-            except Exception as e:
-                print(f"Error reading sensor registers: {e}")
-                return  # Exit if we can't read sensor data
-
-            # Get historical data for averaging
-            try:
-                with sqlite3.connect('sensor_data.db') as conn:
-                    # Get historical mV average
-                    query = """
-                        SELECT mV FROM sensor_data
-                        WHERE sensor_id = ?
-                        ORDER BY timestamp DESC
-                        LIMIT 100
-                    """
-                    df = pd.read_sql(query, conn, params=(self.sensor_id,))
-                    # Calculate average (default to 0 if no history)
-                    average_mV = df["mV"].mean() if not df.empty and 'mV' in df.columns else 0
-                    average_chlorine = df["chlorine"].mean() if not df.empty and 'chlorine' in df.columns else 0
-                    if type(average_chlorine) == list:
-                        print(average_chlorine)
-
-                    # Insert new data
-                    timestamp = datetime.now()
-                    print(timestamp, self.sensor_id, mV, chlorine, average_mV, average_chlorine)
-                    c = conn.cursor()
-                    c.execute('''
-                        INSERT INTO sensor_data (timestamp, sensor_id, mV, chlorine, average_mV, average_chlorine)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (timestamp, self.sensor_id, mV, chlorine, average_mV, average_chlorine))
-                    conn.commit()
-
-            except sqlite3.Error as e:
-                print(f"Database error: {e}")
-            except Exception as e:
-                print(f"Unexpected error: {e}")
+        for name, value in (('cal_a', self.a), ('cal_b', self.b)):
+            register = register_map[name]
+            values = AsyncModbusTcpClient.convert_to_registers(value, DATA_TYPES[register.data_type], word_order=register.word_order)
+            response = await self.link.execute('write_registers', address=register.address, values=values, slave=self.unit_id)
+            if response.isError():
+                raise ExceptionResponse(name, response)
+            await asyncio.sleep(0.01)
+        # Cihazın katsayıları gerçekten aldığı geri okunarak doğrulanır
+        written = await self.read_values(('cal_a', 'cal_b'))
+        if not (math.isclose(written['cal_a'], self.a) and math.isclose(written['cal_b'], self.b)):
+            raise ValueError(f"Cihazdaki katsayılar yazılanlardan farklı: a={written['cal_a']}, b={written['cal_b']}")
+        log.info("%s: kalibre edildi (a=%s, b=%s)", self.sensor_id, self.a, self.b)
+        return written
+
+    async def read_values(self, names):
+        """Haritadaki register'ları adıyla, periyodik plandan bağımsız olarak okur."""
+        values = {}
+        for block in plan_reads(REGISTER_MAPS[self.register_plan.model], names):
+            response = await self.link.execute(block.method, address=block.address, count=block.count, slave=self.unit_id)
+            if response.isError():
+                raise ExceptionResponse(block, response)
+            values.update(block.decode(response.registers))
+        return values
+
+    def warm_start(self):
+        # Hareketli ortalamalar başlangıçta örneklerin yazıldığı veritabanından bir kez doldurulur
+        history = load_history(self.sensor_id, ('mV', 'chlorine'), path=sample_writer.path)
+        for column, values in history.items():
+            self.stats[column].extend(values)
+
+    async def generate_sensor_data(self):
+        try:
+            if (self.link is None or not self.link.connected) and not await self.connect():
+                raise ConnectionError(f"Gateway {self.host}:{self.port} bağlanamadı")
+            mV, chlorine = await self.read_registers()
+            self.store_sample(mV, chlorine)
+        except Exception as e:
+            log.warning("%s: okuma hatası: %s", self.sensor_id, e)
+            self.health.record_failure(e)
+            return  # Exit if we can't read sensor data
+
+        # Sadece çözülüp kuyruğa alınan okuma başarılı sayılır
+        self.health.record_success()
+
+    def store_sample(self, mV, chlorine):
+        average_mV = self.stats['mV'].add(mV).mean
+        average_chlorine = self.stats['chlorine'].add(chlorine).mean
+        # Ortalamalar her okumayla güncellenir; değişmeyen örnek kaydedilmeyebilir
+        if self.adaptive is not None and not self.adaptive.update(mV):
+            return
+
+        # Insert new data (toplu yazıcı kuyruğuna)
+        timestamp = datetime.now()
+        log.debug("%s mV=%s chlorine=%s ort_mV=%s ort_chlorine=%s",
+                  self.sensor_id, mV, chlorine, average_mV, average_chlorine)
+        sample_writer.submit(timestamp, self.sensor_id, mV, chlorine, average_mV, average_chlorine)
 
 class ReferanceSensor:
-    def __init__(self, sensor_id, host, port):
+    def __init__(self, sensor_id, host, port, period=None, address=1, channel=0):
         self.sensor_id = str(sensor_id)
+        self.period = period
         self.c_mv = []
         self.c_chlorine = []
-        self.s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        try:
-            self.s.connect((host, port))
-        except Exception as e:
-            print(e)
-
-    def read_analog(self):
-        # Gönderilecek hex veri (23 30 31 30 0D)
-        hex_data = bytes.fromhex('233031300D')
-        self.s.sendall(hex_data)
-        response = self.s.recv(1024)  # Yanıtı al (1024 byte'lık buffer)
-        response = response.decode('utf-8').strip('> \r\n')  # ">-10.20\r" → "-10.20"
-        print(response)
-        try:
-            mA = float(response)
-        except ValueError:
-            print("Analog Okuma Geçersiz sayı formatı!")
+        self.stats = {'chlorine': RollingWindow()}
+        self.adaptive = None
+        self.host = host
+        self.port = port
+        self.address = address  # ADAM modül adresi
+        self.channel = channel  # modüldeki analog giriş
+        # Aynı modüldeki referanslar tek bağlantıyı ve tek #AA okumasını paylaşır
+        self.link = None
+        self.health = DeviceHealth(self.sensor_id, self.reconnect)
+
+    async def connect(self):
+        if self.link is None:
+            self.link = adam_pool.acquire(self.host, self.port)
+        return await self.link.connect()
+
+    async def read_analog(self):
+        if self.link is None:
+            await self.connect()
+        # #AA ile modüldeki tüm kanallar tek istekte okunur
+        values = await self.link.read_module(self.address)
+        mA = values[self.channel]
 
         if 3.9 <= mA <= 20.1:
             Chlorine = ((mA - 4) / 16) * 2
         else:
-            print("analog kabloyu kontrol et")
+            log.warning("%s: %s mA aralık dışında, analog kabloyu kontrol et", self.sensor_id, mA)
             Chlorine = 0
         return Chlorine
 
-    def generate_sensor_data(self):
+    async def reconnect(self):
+        await self.read_analog()
+        return True
+
+    async def close(self):
+        self.health.close()
+        if self.link is not None:
+            adam_pool.release(self.link)
+            self.link = None
+
+    def warm_start(self):
+        history = load_history(self.sensor_id, ('chlorine',), path=sample_writer.path)
+        self.stats['chlorine'].extend(history['chlorine'])
+
+    async def generate_sensor_data(self):
         try:
             # Read sensor data
-            chlorine = self.read_analog()
+            chlorine = await self.read_analog()
+            self.store_sample(chlorine)
         except Exception as e:
-            print(f"Error reading sensor registers: {e}")
+            log.warning("%s: okuma hatası: %s", self.sensor_id, e)
+            self.health.record_failure(e)
             return  # Exit if we can't read sensor data
 
-        # Get historical data for averaging
-        try:
-            with sqlite3.connect('sensor_data.db') as conn:
-                # Get historical mV average
-                query = """
-                    SELECT mV FROM sensor_data
-                    WHERE sensor_id = ?
-                    ORDER BY timestamp DESC
-                    LIMIT 100
-                """
-                df = pd.read_sql(query, conn, params=(self.sensor_id,))
-                average_chlorine = df["chlorine"].mean() if not df.empty and 'chlorine' in df.columns else None
-                # Insert new data
-                timestamp = datetime.now()
-                c = conn.cursor()
-                c.execute('''
-                    INSERT INTO sensor_data (timestamp, sensor_id, chlorine, average_chlorine)
-                    VALUES (?, ?, ?, ?)
-                ''', (timestamp, self.sensor_id, chlorine, average_chlorine))
-                conn.commit()
-
-        except sqlite3.Error as e:
-            print(f"Database error: {e}")
-        except Exception as e:
-            print(f"Unexpected error: {e}")
+        self.health.record_success()
+
+    def store_sample(self, chlorine):
+        average_chlorine = self.stats['chlorine'].add(chlorine).mean
+        if self.adaptive is not None and not self.adaptive.update(chlorine):
+            return
+        # Insert new data (toplu yazıcı kuyruğuna)
+        timestamp = datetime.now()
+        sample_writer.submit(timestamp, self.sensor_id, chlorine=chlorine, average_chlorine=average_chlorine)
 
 #sensor1 = Sensor(1, host="10.37.64.20" , port=502)
 #sensor2 = Sensor(2, host="10.37.64.21" , port=502)
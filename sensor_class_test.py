@@ -1,55 +1,128 @@
-import random
-import sqlite3
-from datetime import datetime
+import asyncio
 
-from pyModbusTCP.client import ModbusClient
+import pytest
+from pymodbus.pdu import ExceptionResponse as ModbusExceptionResponse
 
+import sensor_class
+from conftest import insert_rows
+from health import CONNECTED, DEGRADED, OPEN
+from modbus_pool import gateway_pool
+from sensor_class import ReferanceSensor, Sensor
+from simulator import start_adam_modules, start_probes, stop_adam_modules, stop_probes
 
-class Sensor:
-    def __init__(self, sensor_id):
-        self.sensor_id = str(sensor_id)
-        self.c_mv = []
-        self.c_chlorine =[]
 
-    def read_data(self):
-        pass
+@pytest.fixture
+def submitted(monkeypatch):
+    samples = []
+    monkeypatch.setattr(sensor_class.sample_writer, 'submit',
+                        lambda timestamp, sensor_id, *values, **named: samples.append((sensor_id, values, named)))
+    return samples
 
-    def calibration(self,a,b):
-        self.a = a
-        self.b = b
 
-    def calibration_data(self):
-        return self.c_mv, self.c_chlorine
+async def _with_probe(port, test):
+    servers = await start_probes(1, base_port=port)
+    probe = servers[0].context[1]
+    probe.noise = 0
+    try:
+        await test(probe)
+    finally:
+        await stop_probes(servers)
 
-    def add_calibration_data(self,mV,chlorine):
-        with sqlite3.connect('sensor_calibration_data.db') as conn:
-            c = conn.cursor()
-            c.execute('''
-                INSERT INTO sensor_calibration_data (sensor_id, mV, chlorine)
-                VALUES (?, ?, ?)
-            ''', (self.sensor_id, mV, chlorine))
-            conn.commit()
 
-    def generate_sensor_data(self):
-        mV = random.uniform(800, 1200)
-        chlorine = random.uniform(0, 3)
-        temp = random.uniform(10, 20)
+def test_sensor_reads_simulated_probe(free_port, submitted):
+    async def test(probe):
+        probe.set_reading(812.5, calibrated=1.25)
+        sensor = Sensor(1, '127.0.0.1', free_port)
+        await sensor.generate_sensor_data()
+        probe.set_reading(813.5, calibrated=1.75)
+        await sensor.generate_sensor_data()
+        await sensor.close()
+        assert sensor.health.state == CONNECTED
+        assert gateway_pool.links() == []
 
+    asyncio.run(_with_probe(free_port, test))
+    assert submitted == [('1', (812.5, 1.25, 812.5, 1.25), {}), ('1', (813.5, 1.75, 813.0, 1.5), {})]
 
-        timestamp = datetime.now()
-        with sqlite3.connect('sensor_data.db') as conn:
-            c = conn.cursor()
-            c.execute('''
-                INSERT INTO sensor_data (timestamp, sensor_id, mV, chlorine, temp)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (timestamp, self.sensor_id, mV, chlorine, temp))
-            conn.commit()
 
-    def modbus_tcp(self, ip):
-        self.client = ModbusClient(host=ip, port=502, auto_open=True)
+def test_calibration_is_written_and_verified(free_port):
+    async def test(probe):
+        sensor = Sensor(1, '127.0.0.1', free_port)
+        sensor.calibration_a_b(0.0025, -1.5)
+        written = await sensor.calibration()
+        assert written == {'cal_a': 0.0025, 'cal_b': -1.5}
+        assert (await sensor.read_values(('cal_a',))) == {'cal_a': 0.0025}
+        # Cihaz katsayıyı değiştirirse (yazma kabul edilmediyse) doğrulama başarısız olur
+        probe.setValues = lambda *args: None
+        sensor.calibration_a_b(1.0, 0.0)
+        with pytest.raises(ValueError):
+            await sensor.calibration()
+        await sensor.close()
 
+    asyncio.run(_with_probe(free_port, test))
 
-sensor1 = Sensor(1)
-sensor2 = Sensor(2)
-sensor_list = [sensor1, sensor2]
 
+def test_sensors_on_one_gateway_share_a_link(free_port, submitted):
+    async def test(probe):
+        sensors = [Sensor(i, '127.0.0.1', free_port) for i in (1, 2)]
+        await asyncio.gather(*(sensor.generate_sensor_data() for sensor in sensors))
+        assert sensors[0].link is sensors[1].link
+        assert sensors[0].link.users == 2
+        await sensors[0].close()
+        assert len(gateway_pool.links()) == 1
+        await sensors[1].close()
+        assert gateway_pool.links() == []
+
+    asyncio.run(_with_probe(free_port, test))
+    assert sorted(sensor_id for sensor_id, _, _ in submitted) == ['1', '2']
+
+
+class ExceptionLink:
+    """Her isteğe Modbus exception yanıtı (0x0B gateway target failed) veren bağlantı."""
+    connected = True
+
+    async def execute(self, method, **kwargs):
+        return ModbusExceptionResponse(0x04, 0x0B)
+
+
+def test_exception_responses_open_the_circuit(submitted):
+    async def test():
+        sensor = Sensor(1, '127.0.0.1', 1)
+        sensor.link = ExceptionLink()
+        states = []
+        for _ in range(3):
+            await sensor.generate_sensor_data()
+            states.append(sensor.health.state)
+        sensor.health.close()
+        return states
+
+    assert asyncio.run(test()) == [DEGRADED, DEGRADED, OPEN]
+    assert submitted == []
+
+
+def test_reference_sensor_reads_adam_channel(free_port, submitted):
+    async def test():
+        modules = await start_adam_modules(1, base_port=free_port)
+        modules[0].values[2] = 12.0
+        sensor = ReferanceSensor(3, '127.0.0.1', free_port, channel=2)
+        try:
+            await sensor.generate_sensor_data()
+        finally:
+            await sensor.close()
+            await stop_adam_modules(modules)
+        return sensor
+
+    sensor = asyncio.run(test())
+    assert sensor.health.state == CONNECTED
+    (sensor_id, _, named), = submitted
+    assert sensor_id == '3'
+    assert named['chlorine'] == pytest.approx(1.0, abs=0.02)  # 12 mA -> 1 ppm
+
+
+def test_warm_start_fills_rolling_windows(db_path, monkeypatch):
+    monkeypatch.setattr(sensor_class.sample_writer, 'path', db_path)
+    insert_rows(db_path, [(1000 * i, '1', 800.0 + i, 1.0, None, None) for i in range(150)])
+    sensor = Sensor(1, '127.0.0.1', 1)
+    sensor.warm_start()
+    assert len(sensor.stats['mV']) == 100
+    assert sensor.stats['mV'].mean == pytest.approx(800.0 + 99.5)
+    assert sensor.stats['chlorine'].mean == pytest.approx(1.0)
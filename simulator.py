@@ -0,0 +1,182 @@
+"""Laboratuvar donanımı olmadan acquisition'ı çalıştırmak için yerel sahte cihazlar.
+
+start_probes() RTU-over-TCP gateway'ler arkasında klor probları (Modbus),
+start_adam_modules() ADAM-4000 tarzı ASCII analog giriş modülleri başlatır. Her cihaz
+için yanıt gecikmesi (latency), ona eklenen rastgele sapma (jitter) ve yanıt vermeme
+olasılığı (dropout) ayarlanabilir; yanıt verilmeyen istekte istemci zaman aşımına düşer.
+
+    python simulator.py --probes 10 --adam 1
+"""
+import argparse
+import asyncio
+import random
+
+from pymodbus import FramerType
+from pymodbus.client import ModbusTcpClient
+from pymodbus.datastore import ModbusSequentialDataBlock, ModbusServerContext, ModbusSlaveContext
+from pymodbus.exceptions import NoSuchSlaveException
+from pymodbus.server import ModbusTcpServer
+
+from logs import setup_logging
+
+REGISTER_COUNT = 50
+ADAM_CHANNELS = 8
+NOISE_MV = 0.5  # her okumada ham mV'nin rastgele yürüyüş adımı (std)
+
+
+async def _respond_delay(latency, jitter):
+    delay = latency + (random.uniform(0, jitter) if jitter else 0)
+    if delay:
+        await asyncio.sleep(delay)
+
+
+class SimulatedProbe(ModbusSlaveContext):
+    """Sensor.read_registers'ın beklediği register düzeninde sahte klor probu."""
+
+    def __init__(self, mV=1000.0, latency=0.0, jitter=0.0, dropout=0.0, noise=NOISE_MV):
+        super().__init__(ir=ModbusSequentialDataBlock(0, [0] * (REGISTER_COUNT + 1)),
+                         hr=ModbusSequentialDataBlock(0, [0] * (REGISTER_COUNT + 1)))
+        self.latency = latency
+        self.jitter = jitter
+        self.dropout = dropout
+        self.noise = noise
+        self.set_reading(mV)
+        self.set_calibration(1.0, 0.0)
+
+    def set_reading(self, mV, calibrated=None):
+        DATATYPE = ModbusTcpClient.DATATYPE
+        self.mV = mV
+        calibrated = mV if calibrated is None else calibrated
+        # 0-1: kalibre edilmiş değer, 12-13: ham mV (FLOAT32, big word order)
+        self.setValues(4, 0, ModbusTcpClient.convert_to_registers(calibrated, DATATYPE.FLOAT32, word_order='big'))
+        self.setValues(4, 12, ModbusTcpClient.convert_to_registers(mV, DATATYPE.FLOAT32, word_order='big'))
+
+    def set_calibration(self, a, b):
+        DATATYPE = ModbusTcpClient.DATATYPE
+        # 25-28: a, 30-33: b (FLOAT64 holding register, Sensor.calibration yazar)
+        self.setValues(3, 25, ModbusTcpClient.convert_to_registers(a, DATATYPE.FLOAT64, word_order='big'))
+        self.setValues(3, 30, ModbusTcpClient.convert_to_registers(b, DATATYPE.FLOAT64, word_order='big'))
+
+    async def async_getValues(self, fc_as_hex, address, count=1):
+        # RS485 hattı + gateway gecikmesini taklit et
+        await _respond_delay(self.latency, self.jitter)
+        if self.dropout and random.random() < self.dropout:
+            # Sunucu ignore_missing_slaves ile başlatılır: bu istek yanıtsız kalır
+            raise NoSuchSlaveException(f"dropout ({address})")
+        if fc_as_hex == 4 and self.noise:
+            self.set_reading(self.mV + random.gauss(0, self.noise))
+        return self.getValues(fc_as_hex, address, count)
+
+
+async def start_probes(count, host='127.0.0.1', base_port=15020, latency=0.0, units=1, jitter=0.0, dropout=0.0):
+    """Her biri kendi portunda çalışan `count` adet RTU-over-TCP gateway başlatır.
+
+    Her gateway'in arkasında unit_id 1..units olan `units` adet prob bulunur.
+    """
+    servers = []
+    for i in range(count):
+        probes = {unit_id: SimulatedProbe(latency=latency, jitter=jitter, dropout=dropout)
+                  for unit_id in range(1, units + 1)}
+        context = ModbusServerContext(slaves=probes, single=False)
+        server = ModbusTcpServer(context, framer=FramerType.RTU, address=(host, base_port + i),
+                                 ignore_missing_slaves=True)
+        await server.listen()
+        servers.append(server)
+    return servers
+
+
+async def stop_probes(servers):
+    for server in servers:
+        await server.shutdown()
+
+
+class SimulatedAdam:
+    """adam_client.py'nin konuştuğu ASCII protokolünü yanıtlayan analog giriş modülü.
+
+    `#AA` tüm kanalları, `#AAN` tek kanalı döndürür; başka adrese `?AA` yanıtı verilir.
+    Kanallar 4-20 mA aralığında yavaşça değişir.
+    """
+
+    def __init__(self, address=1, channels=ADAM_CHANNELS, latency=0.0, jitter=0.0, dropout=0.0):
+        self.address = address
+        self.values = [random.uniform(6, 18) for _ in range(channels)]
+        self.latency = latency
+        self.jitter = jitter
+        self.dropout = dropout
+        self.server = None
+
+    def reply(self, command):
+        address = command[1:3]
+        if not command.startswith('#') or address != f'{self.address:02X}':
+            return f'?{address}'
+        self.values = [min(max(value + random.gauss(0, 0.01), 4.0), 20.0) for value in self.values]
+        channel = command[3:]
+        if channel:
+            if not channel.isdigit() or int(channel) >= len(self.values):
+                return f'?{address}'
+            return f'>{self.values[int(channel)]:+08.4f}'
+        return '>' + ''.join(f'{value:+08.4f}' for value in self.values)
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                command = (await reader.readuntil(b'\r'))[:-1].decode('ascii', 'replace')
+                await _respond_delay(self.latency, self.jitter)
+                if self.dropout and random.random() < self.dropout:
+                    continue  # yanıt yok, istemci zaman aşımına düşer
+                writer.write(self.reply(command).encode('ascii') + b'\r')
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def listen(self, host, port):
+        self.server = await asyncio.start_server(self._handle, host, port)
+
+
+async def start_adam_modules(count, host='127.0.0.1', base_port=15520, latency=0.0, jitter=0.0, dropout=0.0,
+                             channels=ADAM_CHANNELS):
+    """Her biri kendi portunda (adres 1) çalışan `count` adet ADAM modülü başlatır."""
+    modules = []
+    for i in range(count):
+        module = SimulatedAdam(channels=channels, latency=latency, jitter=jitter, dropout=dropout)
+        await module.listen(host, base_port + i)
+        modules.append(module)
+    return modules
+
+
+async def stop_adam_modules(modules):
+    for module in modules:
+        module.server.close()
+        await module.server.wait_closed()
+
+
+async def main(args):
+    servers = await start_probes(args.probes, args.host, args.port, args.latency, args.units, args.jitter, args.dropout)
+    modules = await start_adam_modules(args.adam, args.host, args.adam_port, args.latency, args.jitter, args.dropout)
+    print(f"{args.probes} gateway: {args.host}:{args.port}-{args.port + args.probes - 1} "
+          f"(unit 1-{args.units}), {args.adam} ADAM modülü: {args.adam_port}-{args.adam_port + args.adam - 1}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await stop_adam_modules(modules)
+        await stop_probes(servers)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--probes', type=int, default=2, help="gateway sayısı")
+    parser.add_argument('--units', type=int, default=1, help="gateway başına prob")
+    parser.add_argument('--adam', type=int, default=1, help="ADAM modülü sayısı")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=15020)
+    parser.add_argument('--adam-port', type=int, default=15520)
+    parser.add_argument('--latency', type=float, default=0.02, help="saniye")
+    parser.add_argument('--jitter', type=float, default=0.0, help="saniye, gecikmeye eklenen en fazla sapma")
+    parser.add_argument('--dropout', type=float, default=0.0, help="yanıtsız kalan istek oranı")
+    setup_logging()
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,329 @@
+"""İstatistik sekmesi için sensör/sütun başına 1 sa ve 1 gün kovalık birleştirilebilir özetler.
+
+Her kova sayı, toplam, kareler toplamı, min, max ve bir yüzdelik sketch'i tutar. Sketch
+logaritmik kutulu bir histogramdır (DDSketch): her değer göreli genişliği ALPHA olan
+kutuya düşer, kutu sayaçları toplanarak kovalar birleşir ve yüzdelikler en fazla ALPHA
+göreli hatayla bulunur. Bir aralığın özeti tam gün/saat kovaları birleştirilerek, sadece
+kenarlardaki kısmi saatler ham veriden okunarak hesaplanır.
+
+Açık kovalar SampleWriter'da bellekte güncellenir ve PERSIST_INTERVAL'da bir yazılır.
+"""
+import copy
+import math
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+
+import numpy as np
+import pandas as pd
+
+from database import DB_PATH
+from queries import with_archive
+from rollups import REBUILD_CHUNK, VALUE_COLUMNS
+
+RESOLUTIONS = {  # tablo eki -> kova genişliği (ms), kabadan inceye
+    '1d': 86_400_000,
+    '1h': 3_600_000,
+}
+ALPHA = 0.001  # yüzdeliklerde göreli hata
+PERSIST_INTERVAL = 5.0  # saniye, açık kovalar bu aralıkla yazılır
+QUANTILES = (0.25, 0.5, 0.75)
+
+_GAMMA = (1 + ALPHA) / (1 - ALPHA)
+_LOG_GAMMA = math.log(_GAMMA)
+_MIN_VALUE = 1e-9  # mutlak değeri bundan küçükler sıfır kutusuna düşer
+_OFFSET = 1 << 20  # kutu numarası pozitif kalsın; işaret anahtarın işaretinde
+
+
+def table_name(resolution):
+    return f'sensor_sketch_{resolution}'
+
+
+def create_sketch_tables(conn):
+    # Sorgular tüm sensörleri bir kova aralığında okur; anahtar bucket ile başlar
+    for resolution in RESOLUTIONS:
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table_name(resolution)}
+            (bucket INTEGER NOT NULL, sensor_id TEXT NOT NULL, field TEXT NOT NULL,
+             n INTEGER, total REAL, total_sq REAL, min REAL, max REAL, sketch BLOB,
+             PRIMARY KEY (bucket, sensor_id, field)) WITHOUT ROWID
+        ''')
+
+
+def _insert_sql(resolution, replace=False):
+    return f'''
+        INSERT {'OR REPLACE ' if replace else ''}INTO {table_name(resolution)}
+        (bucket, sensor_id, field, n, total, total_sq, min, max, sketch)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+
+
+def value_keys(values):
+    """Değerlerin kutu anahtarları; anahtar sırası değer sırasıyla aynıdır."""
+    magnitude = np.abs(values)
+    keys = np.ceil(np.log(np.maximum(magnitude, _MIN_VALUE)) / _LOG_GAMMA).astype(np.int64) + _OFFSET
+    keys = np.where(values > 0, keys, -keys)
+    keys[magnitude < _MIN_VALUE] = 0
+    return keys
+
+
+def key_values(keys):
+    """Kutu anahtarlarının temsilci değerleri (kutunun göreli ortası)."""
+    power = np.abs(keys) - _OFFSET
+    values = 2 * _GAMMA ** power.astype(float) / (_GAMMA + 1)
+    return np.where(keys > 0, values, np.where(keys < 0, -values, 0.0))
+
+
+class Sketch:
+    def __init__(self):
+        self.n = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.keys = np.empty(0, dtype=np.int64)  # sıralı kutu anahtarları
+        self.counts = np.empty(0, dtype=np.int64)
+
+    def add(self, values):
+        """NaN olmayan değerleri ekler; eklenen yoksa False döndürür."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return False
+        keys, counts = np.unique(value_keys(values), return_counts=True)
+        self._merge(len(values), values.sum(), (values * values).sum(), values.min(), values.max(), keys, counts)
+        return True
+
+    def _merge(self, n, total, total_sq, lo, hi, keys, counts):
+        self.n += int(n)
+        self.total += float(total)
+        self.total_sq += float(total_sq)
+        self.min = min(self.min, float(lo))
+        self.max = max(self.max, float(hi))
+        self.keys, inverse = np.unique(np.concatenate([self.keys, keys]), return_inverse=True)
+        self.counts = np.bincount(inverse, weights=np.concatenate([self.counts, counts])).astype(np.int64)
+
+    def merge(self, other):
+        if other.n:
+            self._merge(other.n, other.total, other.total_sq, other.min, other.max, other.keys, other.counts)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Tablo satırlarını (n, total, total_sq, min, max, sketch) tek seferde birleştirir."""
+        sketch = cls()
+        rows = [row for row in rows if row[0]]
+        if rows:
+            n, total, total_sq, lo, hi, blobs = zip(*rows)
+            pairs = np.frombuffer(b''.join(blobs), dtype='<i4').reshape(-1, 2)
+            sketch._merge(sum(n), math.fsum(total), math.fsum(total_sq), min(lo), max(hi),
+                          pairs[:, 0].astype(np.int64), pairs[:, 1].astype(np.int64))
+        return sketch
+
+    def row(self):
+        blob = np.column_stack([self.keys, self.counts]).astype('<i4').tobytes()
+        return self.n, self.total, self.total_sq, self.min, self.max, blob
+
+    @property
+    def mean(self):
+        return self.total / self.n if self.n else math.nan
+
+    @property
+    def std(self):
+        if self.n < 2:
+            return math.nan
+        return math.sqrt(max(self.total_sq - self.total * self.total / self.n, 0.0) / (self.n - 1))
+
+    def quantiles(self, qs):
+        if not self.n:
+            return np.full(len(qs), np.nan)
+        cumulative = np.cumsum(self.counts)
+        index = np.searchsorted(cumulative, np.asarray(qs) * (self.n - 1), side='right')
+        return np.clip(key_values(self.keys[index]), self.min, self.max)
+
+    def histogram(self):
+        """Kutu temsilci değerleri ve sayaçları."""
+        return np.clip(key_values(self.keys), self.min, self.max), self.counts
+
+
+class SketchAccumulator:
+    """SampleWriter'ın yazdığı batch'lerle açık kovaları bellekte güncelleyen yardımcı.
+
+    Bir kova ilk kez görüldüğünde tablodaki hali yüklenir (yeniden başlatmadan sonra
+    kaldığı yerden devam eder). Yazılmış ve yenisi açılmış kovalar bellekten atılır.
+    Sketch'ler yerinde değiştirilmez, kopyası güncellenir; böylece transaction() geri
+    alınan bir batch'ten önceki hali sözlüğün kopyasıyla geri yükleyebilir.
+    """
+
+    def __init__(self, persist_interval=PERSIST_INTERVAL):
+        self.persist_interval = persist_interval
+        self._open = {}  # (çözünürlük, sensör, sütun, kova) -> Sketch
+        self._dirty = set()
+        self._persisted_at = time.monotonic()
+
+    @property
+    def dirty(self):
+        return bool(self._dirty)
+
+    @contextmanager
+    def transaction(self):
+        """Blok hata ile biterse açık kovaları bloktan önceki haline döndürür."""
+        state = dict(self._open), set(self._dirty), self._persisted_at
+        try:
+            yield
+        except BaseException:
+            self._open, self._dirty, self._persisted_at = state
+            raise
+
+    def add(self, conn, rows):
+        """Ham satırları (timestamp, sensor_id, mV, ...) açık kovalara ekler."""
+        for resolution, width in RESOLUTIONS.items():
+            groups = {}
+            for timestamp, sensor_id, *values in rows:
+                groups.setdefault((sensor_id, timestamp - timestamp % width), []).append(values)
+            for (sensor_id, bucket), group in groups.items():
+                values = np.array(group, dtype=float)  # None -> NaN
+                for i, field in enumerate(VALUE_COLUMNS):
+                    key = (resolution, sensor_id, field, bucket)
+                    sketch = self._open.get(key)
+                    if sketch is None:
+                        sketch = self._open[key] = self._load(conn, key)
+                    updated = copy.copy(sketch)  # _merge dizileri yenisiyle değiştirir, sığ kopya yeter
+                    if updated.add(values[:, i]):
+                        self._open[key] = updated
+                        self._dirty.add(key)
+
+    def _load(self, conn, key):
+        resolution, sensor_id, field, bucket = key
+        row = conn.execute(f'''
+            SELECT n, total, total_sq, min, max, sketch FROM {table_name(resolution)}
+            WHERE bucket = ? AND sensor_id = ? AND field = ?
+        ''', (bucket, sensor_id, field)).fetchone()
+        return Sketch.from_rows([row] if row else [])
+
+    def persist(self, conn, force=False):
+        if not force and time.monotonic() - self._persisted_at < self.persist_interval:
+            return
+        rows = {resolution: [] for resolution in RESOLUTIONS}
+        for key in self._dirty:
+            resolution, sensor_id, field, bucket = key
+            rows[resolution].append((bucket, sensor_id, field, *self._open[key].row()))
+        for resolution, resolution_rows in rows.items():
+            conn.executemany(_insert_sql(resolution, replace=True), resolution_rows)
+        self._dirty.clear()
+        self._persisted_at = time.monotonic()
+
+        latest = {}
+        for resolution, sensor_id, field, bucket in self._open:
+            series = (resolution, sensor_id, field)
+            latest[series] = max(latest.get(series, bucket), bucket)
+        for key in list(self._open):
+            if key[3] < latest[key[:3]]:
+                del self._open[key]
+
+
+def _frame_sketches(df, width=None):
+    """DataFrame'deki satırları (sensör, sütun[, kova]) başına Sketch'e çevirir."""
+    keys = ['sensor_id'] if width is None else ['sensor_id', df['timestamp'] - df['timestamp'] % width]
+    sketches = {}
+    for group_key, group in df.groupby(keys, sort=False):
+        for field in VALUE_COLUMNS:
+            sketch = Sketch()
+            if sketch.add(group[field].to_numpy(dtype=float)):
+                sketches[(*group_key, field)] = sketch
+    return sketches
+
+
+def _read_raw(conn, start_ms, end_ms, sensor_ids=None, path=None):
+    """[start_ms, end_ms) ham satırları; path verilirse arşivdeki satırlar da eklenir."""
+    where = 'timestamp >= ? AND timestamp < ?'
+    params = [start_ms, end_ms]
+    if sensor_ids is not None:
+        where += f" AND sensor_id IN ({','.join(['?'] * len(sensor_ids))})"
+        params += list(sensor_ids)
+    columns = ['timestamp', 'sensor_id', *VALUE_COLUMNS]
+    rows = conn.execute(f'SELECT {", ".join(columns)} FROM sensor_data WHERE {where}', params).fetchall()
+    if path is None:
+        return pd.DataFrame(rows, columns=columns)
+    return with_archive(rows, start_ms, end_ms - 1, sensor_ids, columns, path=path)
+
+
+def rebuild_sketches(conn, verbose=False):
+    """Sketch tablolarını SQLite'taki ham veriden, günlük dilimlerle yeniden hesaplar."""
+    first, last = conn.execute('SELECT MIN(timestamp), MAX(timestamp) FROM sensor_data').fetchone()
+    if first is None:
+        return
+    # Arşive taşınmış günlerin kovaları korunur
+    start = first - first % REBUILD_CHUNK
+    for resolution in RESOLUTIONS:
+        conn.execute(f'DELETE FROM {table_name(resolution)} WHERE bucket >= ?', (start,))
+    while start <= last:
+        end = start + REBUILD_CHUNK
+        df = _read_raw(conn, start, end)
+        if not conn.in_transaction:
+            conn.execute('BEGIN')  # autocommit bağlantıda (migrate.py) satır başına commit olmasın
+        for resolution, width in RESOLUTIONS.items():
+            conn.executemany(_insert_sql(resolution), [(int(bucket), sensor_id, field, *sketch.row())
+                  for (sensor_id, bucket, field), sketch in _frame_sketches(df, width).items()])
+        conn.commit()
+        if verbose:
+            print(f"Sketch tabloları: {start} - {end} tamamlandı")
+        start = end
+
+
+def _segments(start_ms, end_ms, levels):
+    """[start, end) aralığını tam kovalara (çözünürlük, başlangıç, bitiş) böler; kalanlar ham (None)."""
+    if start_ms >= end_ms:
+        return []
+    if not levels:
+        return [(None, start_ms, end_ms)]
+    resolution, width = levels[0]
+    first = -(-start_ms // width) * width
+    last = end_ms - end_ms % width
+    if first >= last:
+        return _segments(start_ms, end_ms, levels[1:])
+    return _segments(start_ms, first, levels[1:]) + [(resolution, first, last)] + _segments(last, end_ms, levels[1:])
+
+
+def read_sketches(start_ms, end_ms, sensor_ids=None, path=DB_PATH):
+    """[start_ms, end_ms] aralığının (sensör, sütun) başına birleştirilmiş Sketch'leri."""
+    if sensor_ids is not None and not sensor_ids:
+        return {}
+    rows = {}
+    raw = []
+    with closing(sqlite3.connect(path)) as conn:
+        for resolution, first, last in _segments(start_ms, end_ms + 1, list(RESOLUTIONS.items())):
+            if resolution is None:
+                raw.append(_read_raw(conn, first, last, sensor_ids, path))
+                continue
+            where = 'bucket >= ? AND bucket < ?'
+            params = [first, last]
+            if sensor_ids is not None:
+                where += f" AND sensor_id IN ({','.join(['?'] * len(sensor_ids))})"
+                params += list(sensor_ids)
+            for sensor_id, field, *row in conn.execute(f'''
+                SELECT sensor_id, field, n, total, total_sq, min, max, sketch
+                FROM {table_name(resolution)} WHERE {where}
+            ''', params):
+                rows.setdefault((sensor_id, field), []).append(row)
+
+    sketches = {key: Sketch.from_rows(key_rows) for key, key_rows in rows.items()}
+    for df in raw:
+        for key, sketch in _frame_sketches(df).items():
+            sketches.setdefault(key, Sketch()).merge(sketch)
+    return {key: sketch for key, sketch in sketches.items() if sketch.n}
+
+
+def summarize(start_ms, end_ms, sensor_ids=None, path=DB_PATH):
+    """describe() biçiminde sensör/sütun başına özet; veri yoksa boş DataFrame."""
+    records = []
+    for (sensor_id, field), sketch in sorted(read_sketches(start_ms, end_ms, sensor_ids, path).items()):
+        q1, median, q3 = sketch.quantiles(QUANTILES)
+        records.append((sensor_id, field, sketch.n, sketch.mean, sketch.std, sketch.min, q1, median, q3, sketch.max))
+    return pd.DataFrame(records, columns=['sensor_id', 'metric', 'count', 'mean', 'std', 'min',
+                                          '25%', '50%', '75%', 'max'])
+
+
+if __name__ == '__main__':
+    with sqlite3.connect(DB_PATH) as conn:
+        create_sketch_tables(conn)
+        rebuild_sketches(conn, verbose=True)
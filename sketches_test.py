@@ -0,0 +1,100 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import insert_rows
+from db_writer import connect
+from sketches import ALPHA, QUANTILES, Sketch, SketchAccumulator, rebuild_sketches, summarize, table_name
+
+
+def _lower_quantile(values, q):
+    # Sketch.quantiles sıralı değerlerde q * (n - 1) sırasındaki elemanı yaklaşık verir
+    return np.sort(values)[int(q * (len(values) - 1))]
+
+
+@pytest.mark.parametrize('values', [
+    np.random.default_rng(3).lognormal(6, 1, 20_000),
+    np.random.default_rng(4).normal(0, 1, 20_000),  # negatif değerler ve sıfıra yakınlar
+])
+def test_quantiles_within_relative_error(values):
+    sketch = Sketch()
+    assert sketch.add(values)
+    for q, estimate in zip(QUANTILES, sketch.quantiles(QUANTILES)):
+        exact = _lower_quantile(values, q)
+        assert abs(estimate - exact) <= 2 * ALPHA * abs(exact) + 1e-9
+    assert sketch.n == len(values)
+    assert sketch.mean == pytest.approx(values.mean())
+    assert sketch.std == pytest.approx(values.std(ddof=1))
+    assert (sketch.min, sketch.max) == (values.min(), values.max())
+
+
+def test_merge_matches_single_sketch():
+    values = np.random.default_rng(5).uniform(800, 1200, 5000)
+    whole = Sketch()
+    whole.add(values)
+    parts = [Sketch() for _ in range(3)]
+    for part, chunk in zip(parts, np.array_split(values, 3)):
+        part.add(chunk)
+    merged = Sketch.from_rows([part.row() for part in parts])
+    assert merged.n == whole.n
+    assert merged.total == pytest.approx(whole.total)
+    assert merged.keys.tolist() == whole.keys.tolist()
+    assert merged.counts.tolist() == whole.counts.tolist()
+    assert merged.quantiles(QUANTILES).tolist() == whole.quantiles(QUANTILES).tolist()
+
+
+def test_empty_and_nan_only():
+    sketch = Sketch()
+    assert not sketch.add([np.nan, np.nan])
+    assert sketch.n == 0
+    assert np.isnan(sketch.quantiles(QUANTILES)).all()
+    assert np.isnan(sketch.mean) and np.isnan(sketch.std)
+
+
+def test_accumulator_transaction_restores_buckets(db_path):
+    accumulator = SketchAccumulator(persist_interval=0)
+    conn = connect(db_path)
+    rows = [(1000 * i, '1', float(i), 1.0, None, None) for i in range(10)]
+    with accumulator.transaction(), conn:
+        accumulator.add(conn, rows)
+        accumulator.persist(conn)
+
+    with pytest.raises(sqlite3.OperationalError):
+        with accumulator.transaction(), conn:
+            accumulator.add(conn, rows)
+            raise sqlite3.OperationalError('disk I/O error')
+    assert not accumulator.dirty
+    with accumulator.transaction(), conn:
+        accumulator.persist(conn, force=True)
+
+    n, total = conn.execute(f"SELECT n, total FROM {table_name('1h')} WHERE field = 'mV'").fetchone()
+    assert (n, total) == (10, 45.0)
+    conn.close()
+
+
+def test_summarize_matches_describe(db_path):
+    rng = np.random.default_rng(6)
+    start = 1_700_000_000_000
+    # İki buçuk gün: tam gün, tam saat ve kenarlardaki ham dilimler birlikte kullanılır
+    timestamps = start + np.arange(0, int(2.5 * 86_400_000), 60_000)
+    rows = [(int(t), sensor, float(v), None, None, None)
+            for sensor in ('1', '2') for t, v in zip(timestamps, rng.normal(1000, 30, len(timestamps)))]
+    insert_rows(db_path, rows)
+    with sqlite3.connect(db_path) as conn:
+        rebuild_sketches(conn)
+
+    begin, end = int(timestamps[17]), int(timestamps[-23])
+    summary = summarize(begin, end, path=db_path).set_index(['sensor_id', 'metric'])
+    df = pd.DataFrame(rows, columns=['timestamp', 'sensor_id', 'mV', 'chlorine', 'a', 'b'])
+    df = df[(df['timestamp'] >= begin) & (df['timestamp'] <= end)]
+    for sensor_id, group in df.groupby('sensor_id'):
+        expected = group['mV'].describe()
+        result = summary.loc[(sensor_id, 'mV')]
+        assert result['count'] == expected['count']
+        assert result['mean'] == pytest.approx(expected['mean'])
+        assert result['std'] == pytest.approx(expected['std'])
+        assert (result['min'], result['max']) == (expected['min'], expected['max'])
+        assert result['50%'] == pytest.approx(expected['50%'], rel=2 * ALPHA)
+    assert set(summary.index.get_level_values('metric')) == {'mV'}